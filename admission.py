@@ -0,0 +1,188 @@
+"""
+Admission control for tools/call.
+
+Each tool gets a semaphore limiting how many of its calls run against
+MongoDB at once, plus a bounded wait queue. A call that finds the queue
+full, or waits longer than the queue timeout, is rejected straight away
+with a JSON-RPC error instead of piling up behind a slow tool and
+draining the connection pool.
+
+Limits come from MCP_TOOL_CONCURRENCY / MCP_TOOL_QUEUE (defaults for every
+tool) and MCP_TOOL_LIMITS, e.g. "aggregate=4:8,find_documents=32:64"
+(concurrency:queue per tool). A concurrency of 0 means unlimited.
+"""
+import asyncio
+import os
+from typing import Any, AsyncIterator, Awaitable, Dict, Optional, Tuple
+
+# JSON-RPC server error code for calls rejected by admission control
+OVERLOADED = -32003
+
+
+class Overloaded(Exception):
+    """Raised when a tool's concurrency limit and wait queue are both full"""
+
+    rpc_code = OVERLOADED
+
+    def __init__(self, tool_name: str, reason: str):
+        super().__init__(f"Server overloaded: too many concurrent '{tool_name}' calls ({reason}), retry later")
+        self.tool_name = tool_name
+
+
+def _parse_limits(raw: str) -> Dict[str, Tuple[int, int]]:
+    """Parse "aggregate=4:8,find_documents=32" into {tool: (concurrency, queue)}"""
+    limits = {}
+    for item in raw.split(","):
+        if "=" in item:
+            name, value = item.split("=", 1)
+            concurrency, _, queue = value.partition(":")
+            limits[name.strip()] = (int(concurrency), int(queue) if queue else -1)
+    return limits
+
+
+class ToolLimiter:
+    """Semaphore with a bounded number of waiters"""
+
+    def __init__(self, tool_name: str, max_concurrent: int, max_queue: int, queue_timeout: float):
+        self.tool_name = tool_name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(max_concurrent) if max_concurrent > 0 else None
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+
+    async def __aenter__(self):
+        if self._semaphore is not None:
+            if self._semaphore.locked():
+                if self.waiting >= self.max_queue:
+                    self.rejected += 1
+                    raise Overloaded(self.tool_name, "queue full")
+                self.waiting += 1
+                # wait_for before Python 3.12 can drop a permit acquired just as
+                # the timeout fires, so the acquire runs as a task we clean up
+                acquire = asyncio.ensure_future(self._semaphore.acquire())
+                try:
+                    done, _ = await asyncio.wait((acquire,), timeout=self.queue_timeout)
+                except asyncio.CancelledError:
+                    self._abandon(acquire)
+                    raise
+                finally:
+                    self.waiting -= 1
+                if not done:
+                    self._abandon(acquire)
+                    self.rejected += 1
+                    raise Overloaded(self.tool_name, "timed out waiting in queue")
+            else:
+                await self._semaphore.acquire()
+        self.active += 1
+        self.admitted += 1
+        return self
+
+    def _abandon(self, acquire: "asyncio.Future") -> None:
+        """Give up on a queued acquire, handing back the permit if it got one anyway"""
+        acquire.cancel()
+        acquire.add_done_callback(self._release_if_acquired)
+
+    def _release_if_acquired(self, acquire: "asyncio.Future") -> None:
+        if not acquire.cancelled() and acquire.exception() is None:
+            self._semaphore.release()
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        self.active -= 1
+        if self._semaphore is not None:
+            self._semaphore.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "active": self.active,
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+        }
+
+
+class AdmissionController:
+    """Per-tool limiters, created on first use of each tool"""
+
+    def __init__(self, max_concurrent: int = 32, max_queue: int = 64, queue_timeout: float = 1.0,
+                 tool_limits: Optional[Dict[str, Tuple[int, int]]] = None):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.tool_limits = dict(tool_limits or {})
+        self._limiters: Dict[str, ToolLimiter] = {}
+        self.cancelled_on_disconnect = 0
+
+    @classmethod
+    def from_env(cls) -> "AdmissionController":
+        """
+        Build limits from MCP_TOOL_CONCURRENCY, MCP_TOOL_QUEUE,
+        MCP_TOOL_QUEUE_TIMEOUT_MS and MCP_TOOL_LIMITS
+        """
+        return cls(
+            max_concurrent=int(os.getenv("MCP_TOOL_CONCURRENCY", "32")),
+            max_queue=int(os.getenv("MCP_TOOL_QUEUE", "64")),
+            queue_timeout=int(os.getenv("MCP_TOOL_QUEUE_TIMEOUT_MS", "1000")) / 1000,
+            tool_limits=_parse_limits(os.getenv("MCP_TOOL_LIMITS", "aggregate=8:16")),
+        )
+
+    def limit(self, tool_name: str) -> ToolLimiter:
+        """The limiter to hold (async with) while a tool call runs"""
+        limiter = self._limiters.get(tool_name)
+        if limiter is None:
+            max_concurrent, max_queue = self.tool_limits.get(tool_name, (self.max_concurrent, self.max_queue))
+            if max_queue < 0:
+                max_queue = self.max_queue
+            limiter = self._limiters[tool_name] = ToolLimiter(
+                tool_name, max_concurrent, max_queue, self.queue_timeout
+            )
+        return limiter
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queue_timeout_ms": round(self.queue_timeout * 1000),
+            "cancelled_on_disconnect": self.cancelled_on_disconnect,
+            "tools": {name: limiter.stats() for name, limiter in sorted(self._limiters.items())},
+        }
+
+    async def limited_stream(self, tool_name: str, source: AsyncIterator[Any]) -> AsyncIterator[Any]:
+        """Hold the tool's limiter for as long as a streamed call is being read"""
+        async with self.limit(tool_name):
+            async for item in source:
+                yield item
+
+    async def until_disconnect(self, receive, work: Awaitable[Any]) -> Tuple[bool, Any]:
+        """
+        Run `work` until it finishes or the HTTP client disconnects, in which
+        case it is cancelled (closing any open cursors). `receive` is the ASGI
+        receive callable of a request whose body has already been read.
+        Returns (completed, result).
+        """
+        task = asyncio.ensure_future(work)
+
+        async def disconnected():
+            while (await receive())["type"] != "http.disconnect":
+                pass
+
+        watcher = asyncio.ensure_future(disconnected())
+        try:
+            await asyncio.wait({task, watcher}, return_when=asyncio.FIRST_COMPLETED)
+        except asyncio.CancelledError:
+            task.cancel()
+            raise
+        finally:
+            watcher.cancel()
+        if task.done():
+            return True, task.result()
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        self.cancelled_on_disconnect += 1
+        return False, None
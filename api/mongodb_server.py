@@ -205,193 +205,459 @@
 #     uvicorn.run(app, host="0.0.0.0", port=5000)
 
 
-from fastapi import FastAPI, Request, HTTPException
+import time
+# Cold-start bookkeeping starts before the heavy framework imports
+_MODULE_START = time.perf_counter()
+
+from fastapi import FastAPI, Request, HTTPException, Response
 from typing import Dict, Any, Optional, List
+import asyncio
+import contextvars
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 from mongodb_client import MongoDBClient
+from tool_registry import ToolRegistry
+from streaming import STREAM_BATCH_SIZE, negotiate_stream_format, stream_tool_call
 import os
 from dotenv import load_dotenv
 import json
+import logging
 from datetime import datetime
+import bson_codec
+import metrics
+import response_encoding
+import single_flight
+from admission import AdmissionController, Overloaded
+from tool_arguments import InvalidArguments
+from tenants import TenantManager
+from traffic_capture import TrafficCapture
+from request_logger import (
+    RequestLogMiddleware, is_sampled, log_payload, logger, setup_logging, shutdown_logging
+)
 
 load_dotenv()
 
 MONGO_URI = os.getenv("MONGODB_URI")
 #DB_NAME = os.getenv("DB_NAME", "mcpdatabase")
 DB_NAME = os.getenv("MONGODB_DATABASE")
+# Text block next to structuredContent: "summary" for a one-line summary, "json"
+# to repeat the full compact JSON. Clients on a protocol version without
+# structuredContent always get the JSON.
+TEXT_CONTENT_MODE = os.getenv("MCP_TEXT_CONTENT", "summary").lower()
+# Protocol versions this server speaks, newest first
+PROTOCOL_VERSIONS = ("2025-06-18", "2025-03-26", "2024-11-05")
+# First protocol version whose tool results carry structuredContent
+STRUCTURED_CONTENT_VERSION = "2025-06-18"
+# Protocol version of the current request, from its MCP-Protocol-Version header
+# (clients that send none are assumed to speak 2025-03-26)
+protocol_version: contextvars.ContextVar[str] = contextvars.ContextVar(
+    "mcp_protocol_version", default="2025-03-26"
+)
+# Maximum number of calls from one JSON-RPC batch that run at the same time
+BATCH_CONCURRENCY = max(1, int(os.getenv("MCP_BATCH_CONCURRENCY", "8")))
+# Wait for a MongoDB ping in the startup hook; otherwise the client is created
+# lazily on first use and pinged in the background
+PING_ON_STARTUP = os.getenv("MONGODB_PING_ON_STARTUP", "false").lower() in ("1", "true", "yes")
+# Pooled connections to open in the startup hook, so a fresh worker does
+# not pay connection setup on its first requests (0 to skip)
+WARM_CONNECTIONS = int(os.getenv("MONGODB_WARM_CONNECTIONS", "0"))
+
+# Timings of this process's cold start, reported by /health
+COLD_START: Dict[str, float] = {}
 
 mongo_client = MongoDBClient(connection_string=MONGO_URI, database_name=DB_NAME)
+# Clients for the other databases named in tool calls, sharing mongo_client's pool
+tenants = TenantManager.from_env(mongo_client)
+# Tool definitions, dispatch table and the serialized tools/list are built once
+tool_registry = ToolRegistry.from_client(mongo_client, tenants=tenants)
+# Per-tool concurrency limits with bounded wait queues
+admission = AdmissionController.from_env()
+# Optional JSONL trace of incoming requests for replay (MCP_CAPTURE_FILE)
+capture = TrafficCapture.from_env()
 
 app = FastAPI()
 
-# Add request logging
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    start_time = datetime.now()
-    
-    # Log the request
-    body = await request.body()
-    print(f"\n{'='*50}")
-    print(f"🔥 INCOMING REQUEST at {start_time}")
-    print(f"Method: {request.method}")
-    print(f"URL: {request.url}")
-    print(f"Headers: {dict(request.headers)}")
-    if body:
-        try:
-            json_body = json.loads(body.decode())
-            print(f"Body: {json.dumps(json_body, indent=2)}")
-        except:
-            print(f"Body (raw): {body}")
-    
-    # Create new request with the body
-    from fastapi import Request
-    from starlette.datastructures import Headers
-    
-    async def receive():
-        return {"type": "http.request", "body": body}
-    
-    request = Request(scope=request.scope, receive=receive)
-    
-    response = await call_next(request)
-    
-    duration = (datetime.now() - start_time).total_seconds()
-    print(f"✅ Response completed in {duration:.3f}s")
-    print(f"{'='*50}\n")
-    
-    return response
+# Structured, sampled request logging; records are written from a background thread
+setup_logging()
+app.add_middleware(RequestLogMiddleware)
 
 @app.on_event("startup")
 async def startup():
-    print("🚀 Starting MCP MongoDB Server...")
-    await mongo_client.connect()
-    print("✅ MCP MongoDB Server started successfully!")
+    logger.info("Starting MCP MongoDB Server")
+    # Serverless runtimes may skip this hook; tools then connect lazily on first use
+    await mongo_client.connect(ping=PING_ON_STARTUP)
+    if WARM_CONNECTIONS > 0:
+        await mongo_client.warm(WARM_CONNECTIONS)
+    logger.info("MCP MongoDB Server started", extra={"fields": {"pid": os.getpid()}})
 
 @app.on_event("shutdown")
 async def shutdown():
-    print("🛑 Shutting down MCP MongoDB Server...")
+    logger.info("Shutting down MCP MongoDB Server")
     if mongo_client.client:
         mongo_client.client.close()
-    print("✅ MCP MongoDB Server shutdown complete!")
+    tenants.close()
+    logger.info("MCP MongoDB Server shutdown complete")
+    capture.close()
+    shutdown_logging()
+
+def is_notification(message: Any) -> bool:
+    """A JSON-RPC notification is a request object without an id member"""
+    return isinstance(message, dict) and "id" not in message
+
+async def dispatch_rpc(body: Any) -> Dict[str, Any]:
+    """Handle a single JSON-RPC request object and return its response"""
+    if not isinstance(body, dict):
+        return {
+            "jsonrpc": "2.0",
+            "id": None,
+            "error": {"code": -32600, "message": "Invalid Request"}
+        }
 
-@app.post("/")
-async def handle_rpc(request: Request):
     try:
-        body = await request.json()
-        print(f"\n🧩 MCP REQUEST RECEIVED:")
-        print(f"📝 Raw body: {json.dumps(body, indent=2)}")
-        
         method = body.get("method")
         request_id = body.get("id")
-        params = body.get("params", {})
+        params = body.get("params") or {}
         
-        print(f"🎯 Method: {method}")
-        print(f"🆔 Request ID: {request_id}")
-        print(f"📋 Params: {json.dumps(params, indent=2)}")
+        if logger.isEnabledFor(logging.DEBUG) and is_sampled():
+            logger.debug("rpc request", extra={"fields": {"method": method, "id": request_id}})
         
         # Base response structure
         def make_response(result: Any):
             response = {"jsonrpc": "2.0", "id": request_id, "result": result}
-            print(f"📤 SENDING RESPONSE: {json.dumps(response, indent=2)}")
+            log_payload("rpc response", response)
             return response
         
         def make_error(message: str, code: int = -32000):
             error_response = {"jsonrpc": "2.0", "id": request_id, "error": {"code": code, "message": message}}
-            print(f"❌ SENDING ERROR: {json.dumps(error_response, indent=2)}")
+            logger.warning("rpc error", extra={"fields": {"method": method, "id": request_id, "code": code, "error": message}})
             return error_response
         
-        if method == "initialize":
-            print("🔧 Handling initialize request")
-            result = {
-                "protocolVersion": "2025-03-26",
-                "capabilities": {
-                    "tools": {}
-                },
-                "serverInfo": {
-                    "name": "mongodb-mcp-server",
-                    "version": "1.0.0"
-                }
-            }
-            return make_response(result)
-        
-        elif method == "tools/list":
-            print("🔧 Handling tools/list request")
-            # Return tools in the correct MCP format
-            tools_dict = mongo_client.get_available_tools()
-            tools = []
-            
-            for tool_name, tool_info in tools_dict.items():
-                schema = tool_info["schema"]["function"]
-                tool_def = {
-                    "name": schema["name"],
-                    "description": schema["description"],
-                    "inputSchema": {
-                        "type": "object",
-                        "properties": schema["parameters"]["properties"],
-                        "required": schema["parameters"]["required"]
-                    }
-                }
-                tools.append(tool_def)
-                print(f"📋 Added tool: {tool_name}")
-            
-            print(f"🛠️  Total tools available: {len(tools)}")
-            return make_response({"tools": tools})
-        
-        elif method == "tools/call":
-            print("🔧 Handling tools/call request")
-            # Handle tool calls
-            tool_name = params.get("name")
-            arguments = params.get("arguments", {})
-            
-            print(f"🎯 Tool to call: {tool_name}")
-            print(f"📋 Arguments: {json.dumps(arguments, indent=2)}")
-            
-            tools_dict = mongo_client.get_available_tools()
-            if tool_name not in tools_dict:
-                print(f"❌ Tool '{tool_name}' not found")
-                print(f"📋 Available tools: {list(tools_dict.keys())}")
-                return make_error(f"Tool '{tool_name}' not found", code=-32601)
-            
-            try:
-                print(f"🔄 Executing tool: {tool_name}")
-                func = tools_dict[tool_name]["callable"]
-                result = await func(**arguments)
-                print(f"✅ Tool execution result: {result}")
-                
-                # Return the result in MCP format
-                response_result = {
-                    "content": [
-                        {
-                            "type": "text",
-                            "text": result
-                        }
-                    ]
-                }
-                return make_response(response_result)
-            except Exception as e:
-                print(f"❌ Tool execution failed: {str(e)}")
-                import traceback
-                traceback.print_exc()
-                return make_error(f"Tool execution failed: {str(e)}", code=-32001)
-        
-        else:
-            print(f"❌ Unknown method: {method}")
+        handler = RPC_METHODS.get(method) if isinstance(method, str) else None
+        if handler is None:
             return make_error(f"Unknown method: {method}", code=-32601)
+        if not isinstance(params, dict):
+            return make_error("Invalid params: params must be an object", code=-32602)
+        try:
+            return make_response(await handler(params))
+        except RpcError as e:
+            return make_error(e.message, code=e.code)
     
     except Exception as e:
-        print(f"❌ Error processing request: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error processing request")
         return {
             "jsonrpc": "2.0",
-            "id": body.get("id") if 'body' in locals() else None,
+            "id": body.get("id"),
             "error": {
                 "code": -32000,
                 "message": f"Internal server error: {str(e)}"
             }
         }
 
+class RpcError(Exception):
+    """Raised by a method handler to answer with a JSON-RPC error"""
+
+    def __init__(self, message: str, code: int = -32000):
+        super().__init__(message)
+        self.message = message
+        self.code = code
+
+INITIALIZE_RESULT = {
+    "protocolVersion": PROTOCOL_VERSIONS[0],
+    "capabilities": {
+        "tools": {}
+    },
+    "serverInfo": {
+        "name": "mongodb-mcp-server",
+        "version": "1.0.0"
+    }
+}
+
+async def rpc_initialize(params: Dict[str, Any]) -> Dict[str, Any]:
+    # Agree to the client's version when it is one we speak, otherwise offer our newest
+    requested = params.get("protocolVersion")
+    if requested in PROTOCOL_VERSIONS and requested != INITIALIZE_RESULT["protocolVersion"]:
+        return {**INITIALIZE_RESULT, "protocolVersion": requested}
+    return INITIALIZE_RESULT
+
+async def rpc_tools_list(params: Dict[str, Any]) -> Dict[str, Any]:
+    # Tools in MCP format come precomputed from the registry
+    return tool_registry.tools_list_result()
+
+async def rpc_tools_call(params: Dict[str, Any]) -> Dict[str, Any]:
+    tool_name = params.get("name")
+    structured_func = tool_registry.get_structured(tool_name)
+    func = structured_func or tool_registry.get(tool_name)
+    if func is None:
+        raise RpcError(f"Tool '{tool_name}' not found", code=-32601)
+    try:
+        # Bad arguments are rejected before the call is logged, admitted or run
+        arguments = tool_registry.validate(tool_name, params.get("arguments"))
+    except InvalidArguments as e:
+        raise RpcError(str(e), code=e.rpc_code)
+    log_payload(f"tools/call {tool_name}", arguments)
+
+    try:
+        call_start = time.perf_counter()
+        async with admission.limit(tool_name):
+            result = await func(**arguments)
+        if "first_tool_call_ms" not in COLD_START:
+            record_first_tool_call(call_start)
+    except Overloaded as e:
+        raise RpcError(str(e), code=e.rpc_code)
+    except Exception as e:
+        logger.exception("Tool execution failed", extra={"fields": {"tool": tool_name}})
+        raise RpcError(f"Tool execution failed: {str(e)}", code=-32001)
+
+    if structured_func is None:
+        # Tools without a structured variant return their JSON text
+        return {"content": [{"type": "text", "text": result}]}
+    return make_tool_result(result)
+
+# JSON-RPC method -> handler(params) returning the result
+RPC_METHODS = {
+    "initialize": rpc_initialize,
+    "tools/list": rpc_tools_list,
+    "tools/call": rpc_tools_call,
+}
+
+def record_first_tool_call(call_start: float) -> None:
+    """Record and log how long this process took to serve its first tools/call"""
+    now = time.perf_counter()
+    COLD_START["first_tool_call_ms"] = round((now - call_start) * 1000, 3)
+    COLD_START["first_tool_call_since_start_ms"] = round((now - _MODULE_START) * 1000, 3)
+    logger.info("cold start", extra={"fields": {**COLD_START, **mongo_client.connect_timings}})
+
+def summarize_result(data: Dict[str, Any]) -> str:
+    """One-line text rendering of a structured tool result"""
+    parts = []
+    for key, value in data.items():
+        if isinstance(value, list):
+            parts.append(f"{key}: {len(value)} items")
+        elif isinstance(value, dict):
+            parts.append(f"{key}: {{{', '.join(map(str, value))}}}")
+        else:
+            parts.append(f"{key}: {value}")
+    return ", ".join(parts)
+
+def make_tool_result(data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Wrap a structured tool result in MCP format.
+
+    Clients on a protocol version without structuredContent get the data
+    once, as compact JSON text. Newer clients get it once as
+    structuredContent, with a short summary as text (or, with
+    MCP_TEXT_CONTENT=json, the JSON again). Tools report failures as
+    {"error": ...}, which sets isError.
+    """
+    is_error = "error" in data
+    structured = protocol_version.get() >= STRUCTURED_CONTENT_VERSION
+    if is_error:
+        text = str(data["error"])
+    elif structured and TEXT_CONTENT_MODE == "summary":
+        text = summarize_result(data)
+    else:
+        text = bson_codec.dumps(data)
+    result = {"content": [{"type": "text", "text": text}]}
+    if structured:
+        result["structuredContent"] = data
+    if is_error:
+        result["isError"] = True
+    return result
+
+def json_response(content: Any) -> Response:
+    """
+    Serialize a JSON-RPC payload once with the BSON-aware codec.
+
+    Bypasses FastAPI's jsonable_encoder pass, which cannot handle the BSON
+    values inside structured tool results. The body is MessagePack or CBOR
+    instead when the request asked for it, and compressed when it is large
+    enough and the client accepts a supported encoding.
+    """
+    if isinstance(content, Response):
+        return content
+    media_type, content_encoding = response_encoding.preferences()
+    with metrics.phase("serialize"):
+        if media_type == response_encoding.JSON:
+            encoded = encode_rpc_response(content)
+        else:
+            encoded = response_encoding.encode(content, media_type)
+    headers = {"Vary": "Accept, Accept-Encoding"}
+    if content_encoding and len(encoded) >= response_encoding.COMPRESS_MIN_BYTES:
+        with metrics.phase("compress"):
+            encoded = response_encoding.compress(encoded, content_encoding)
+        headers["Content-Encoding"] = content_encoding
+    metrics.record_response(content, len(encoded))
+    return Response(content=encoded, media_type=media_type, headers=headers)
+
+def encode_rpc_response(content: Any) -> bytes:
+    """
+    Serialize a JSON-RPC payload. A tool result shared by coalesced calls
+    is encoded once and spliced into each caller's response.
+    """
+    result = content.get("result") if isinstance(content, dict) else None
+    if not isinstance(result, dict) or "structuredContent" not in result or len(content) != 3:
+        return bson_codec.dumps_bytes(content)
+    encoded_result = single_flight.encode_shared(
+        result["structuredContent"], lambda: bson_codec.dumps_bytes(result)
+    )
+    return (
+        b'{"jsonrpc":"2.0","id":' + bson_codec.dumps_bytes(content.get("id"))
+        + b',"result":' + encoded_result + b'}'
+    )
+
+async def dispatch_notification(message: Dict[str, Any]) -> None:
+    """
+    Handle a JSON-RPC notification. Notifications get no response, so one
+    for a method without a handler (notifications/initialized, ...) is
+    simply acknowledged rather than answered with an error.
+    """
+    if message.get("method") in RPC_METHODS:
+        await dispatch_rpc(message)
+
+async def dispatch_batch(messages: List[Any]):
+    """
+    Handle a JSON-RPC 2.0 batch.
+
+    Calls run concurrently against the shared MongoDB client, at most
+    BATCH_CONCURRENCY at a time. Responses keep the order of the requests
+    they answer; notifications get no response entry.
+    """
+    if not messages:
+        return {
+            "jsonrpc": "2.0",
+            "id": None,
+            "error": {"code": -32600, "message": "Invalid Request: empty batch"}
+        }
+
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+    async def run(message: Any) -> Optional[Dict[str, Any]]:
+        async with semaphore:
+            if is_notification(message):
+                return await dispatch_notification(message)
+            return await dispatch_rpc(message)
+
+    results = await asyncio.gather(*(run(message) for message in messages))
+    responses = [
+        result for message, result in zip(messages, results)
+        if not is_notification(message)
+    ]
+    if not responses:
+        # A batch made only of notifications gets no body at all
+        return Response(status_code=202)
+    return responses
+
+@app.post("/")
+async def handle_rpc(request: Request):
+    with metrics.track_request() as tracked:
+        arrived_at = time.time()
+        start = time.perf_counter()
+        raw_body = await request.body()
+        token = response_encoding.set_preferences(
+            request.headers.get("accept"), request.headers.get("accept-encoding")
+        )
+        version_token = protocol_version.set(
+            request.headers.get("mcp-protocol-version") or protocol_version.get()
+        )
+        try:
+            response = await process_rpc(request, raw_body, tracked)
+        finally:
+            protocol_version.reset(version_token)
+            response_encoding.reset_preferences(token)
+        if capture.should_capture():
+            # Streamed responses are timed until they start, not until the stream ends
+            capture.record(raw_body, arrived_at, time.perf_counter() - start, response.status_code,
+                           tracked.method, tracked.tool, request.headers.get("accept"))
+        return response
+
+async def process_rpc(request: Request, raw_body: bytes, tracked: metrics.RequestMetrics) -> Response:
+    """Parse a JSON-RPC request body and route it, labelling the request metrics"""
+    log_payload("rpc body", raw_body)
+    parse_start = time.perf_counter()
+    try:
+        body = json.loads(raw_body)
+    except Exception as e:
+        logger.warning("Error parsing request body", extra={"fields": {"error": str(e)}})
+        return json_response({
+            "jsonrpc": "2.0",
+            "id": None,
+            "error": {"code": -32700, "message": f"Parse error: {str(e)}"}
+        })
+    tracked.label_from(body)
+    tracked.observe("parse", time.perf_counter() - parse_start)
+    if tracked.method not in ("batch", "tools/call"):
+        return await route_rpc(request, body)
+    # Tool calls are cancelled if the client goes away before they finish
+    completed, response = await admission.until_disconnect(request.receive, route_rpc(request, body))
+    if not completed:
+        logger.info("client disconnected, call cancelled", extra={"fields": {"method": tracked.method, "tool": tracked.tool}})
+        return Response(status_code=499)
+    return response
+
+async def route_rpc(request: Request, body: Any) -> Response:
+    """Send a parsed JSON-RPC body down the batch, cached, streaming or plain path"""
+    if isinstance(body, list):
+        return json_response(await dispatch_batch(body))
+    if is_notification(body):
+        await dispatch_notification(body)
+        return Response(status_code=202)
+    if isinstance(body, dict) and body.get("method") == "tools/list" and not is_notification(body):
+        return tools_list_response(request, body.get("id"))
+    if isinstance(body, dict) and body.get("method") == "tools/call" and not is_notification(body):
+        streamed = stream_response(request, body)
+        if streamed is not None:
+            return json_response(streamed)
+    return json_response(await dispatch_rpc(body))
+
+def stream_response(request: Request, body: Dict[str, Any]) -> Optional[Any]:
+    """
+    Stream a tools/call result batch by batch when the client opted in.
+
+    Returns None when the tool has no streaming variant or the client did
+    not ask for a stream, so the call goes through the normal path.
+    """
+    params = body.get("params") or {}
+    if not isinstance(params, dict):
+        return None
+    tool_name = params.get("name")
+    streamer = tool_registry.get_streamer(tool_name)
+    if streamer is None:
+        return None
+    media_type = negotiate_stream_format(request.headers.get("accept"), params)
+    if media_type is None:
+        return None
+
+    try:
+        arguments = tool_registry.validate(tool_name, params.get("arguments"))
+    except InvalidArguments as e:
+        return {
+            "jsonrpc": "2.0",
+            "id": body.get("id"),
+            "error": {"code": e.rpc_code, "message": str(e)}
+        }
+    arguments.setdefault("batch_size", (params.get("_meta") or {}).get("batch_size", STREAM_BATCH_SIZE))
+    try:
+        batches = streamer(**arguments)
+    except (TypeError, ValueError) as e:
+        return {
+            "jsonrpc": "2.0",
+            "id": body.get("id"),
+            "error": {"code": -32001, "message": f"Tool execution failed: {str(e)}"}
+        }
+    logger.info("streaming tool call", extra={"fields": {"tool": tool_name, "format": media_type}})
+    return stream_tool_call(admission.limited_stream(tool_name, batches), body.get("id"), media_type, tool_name)
+
+def tools_list_response(request: Request, request_id: Any) -> Response:
+    """Serve tools/list from the pre-serialized registry, honouring If-None-Match"""
+    headers = {"ETag": tool_registry.etag, "Cache-Control": "no-cache"}
+    if tool_registry.etag_matches(request.headers.get("if-none-match")):
+        metrics.record_response(None, 0)
+        return Response(status_code=304, headers=headers)
+    content = tool_registry.tools_list_response(request_id)
+    metrics.record_response(None, len(content))
+    return Response(content=content, media_type="application/json", headers=headers)
+
 # Add CORS middleware
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -405,9 +671,83 @@ app.add_middleware(
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "timestamp": datetime.now().isoformat()}
+    return {
+        "status": "healthy",
+        "timestamp": datetime.now().isoformat(),
+        # Identifies the worker process when running under serve.py
+        "pid": os.getpid(),
+        "cold_start": {**COLD_START, **mongo_client.connect_timings},
+    }
+
+@app.get("/stats/pool")
+async def pool_stats():
+    """Connection pool sizing and usage, for tuning MONGODB_MAX_POOL_SIZE"""
+    return mongo_client.pool_stats()
+
+@app.get("/stats/cache")
+async def cache_stats():
+    """Read tool result cache hit/miss counters"""
+    return mongo_client.cache_stats()
+
+@app.get("/stats/admission")
+async def admission_stats():
+    """Per-tool concurrency limits, queue depth and rejections"""
+    return admission.stats()
+
+@app.get("/stats/writes")
+async def write_stats():
+    """insert_document batching: batches sent, average size and round trips saved"""
+    return mongo_client.write_stats()
+
+@app.get("/stats/tenants")
+async def tenant_stats():
+    """Per-database clients currently held, with their cache and query shape counters"""
+    return tenants.stats()
+
+@app.get("/stats/capture")
+async def capture_stats():
+    """Traffic capture settings and how many requests were written or dropped"""
+    return capture.stats()
+
+@app.get("/stats/shapes")
+async def shape_stats():
+    """Query shapes seen so far with call counts, latency and sampled explain plans"""
+    return json_response(mongo_client.shape_stats())
+
+# Pool and cache stats exported next to the request metrics on /metrics
+METRIC_GAUGES = {
+    "mcp_mongodb_connections_open": ("pool", "connections_open", "Open connections in the MongoDB pool"),
+    "mcp_mongodb_connections_checked_out": ("pool", "checked_out", "Connections currently checked out"),
+    "mcp_mongodb_checkout_wait_ms_max": ("pool", "checkout_wait_ms_max", "Longest wait for a pooled connection"),
+    "mcp_result_cache_entries": ("cache", "entries", "Entries in the read result cache"),
+    "mcp_result_cache_bytes": ("cache", "bytes", "Serialized size of the read result cache"),
+    "mcp_tenants_active": ("tenants", "active", "Per-database clients currently held"),
+}
+# Stats that only ever increase, exported as counters
+METRIC_COUNTERS = {
+    "mcp_mongodb_checkout_failures_total": ("pool", "checkout_failures", "Failed connection checkouts since the client was created"),
+    "mcp_result_cache_hits_total": ("cache", "hits", "Read result cache hits"),
+    "mcp_result_cache_misses_total": ("cache", "misses", "Read result cache misses"),
+    "mcp_tenants_evicted_total": ("tenants", "evicted", "Per-database clients dropped for being idle or over the limit"),
+}
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Request, tool and pool metrics in the Prometheus text format"""
+    stats = {"pool": mongo_client.pool_stats(), "cache": mongo_client.cache_stats(), "tenants": tenants.stats()}
+    gauges = {
+        name: {"help": help_text, "value": stats[source][key]}
+        for name, (source, key, help_text) in METRIC_GAUGES.items()
+    }
+    gauges.update({
+        name: {"help": help_text, "value": stats[source][key], "type": "counter"}
+        for name, (source, key, help_text) in METRIC_COUNTERS.items()
+    })
+    return Response(content=metrics.render(gauges), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+COLD_START["import_ms"] = round((time.perf_counter() - _MODULE_START) * 1000, 3)
 
 if __name__ == "__main__":
-    import uvicorn
-    print("🚀 Starting MCP MongoDB Server on port 5000...")
-    uvicorn.run(app, host="0.0.0.0", port=5000)
\ No newline at end of file
+    # Self-hosted: run through the multi-worker launcher (python serve.py --help)
+    import serve
+    serve.main()
\ No newline at end of file
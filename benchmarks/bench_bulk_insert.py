@@ -0,0 +1,98 @@
+"""
+Insert throughput: one insert_document call per record versus insert_documents.
+
+Runs MongoDBClient directly against a real MongoDB (no HTTP layer), writing
+synthetic patient records into a scratch collection that is dropped before
+each run and afterwards.
+
+    python benchmarks/bench_bulk_insert.py --uri mongodb://localhost:27017 --docs 5000
+    python benchmarks/bench_bulk_insert.py --uri ... --chunk-size 500 --unordered
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from mongodb_client import MongoDBClient  # noqa: E402
+
+COLLECTION = "bench_bulk_insert"
+
+
+def make_records(count: int):
+    return [
+        {
+            "patient_id": f"P{i:07d}",
+            "name": f"Patient {i}",
+            "admitted": "2024-01-01T08:30:00Z",
+            "vitals": {"hr": 60 + i % 40, "bp": "120/80"},
+            "notes": "routine follow-up " * 4,
+        }
+        for i in range(count)
+    ]
+
+
+async def single_inserts(client: MongoDBClient, records, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def insert(record):
+        async with semaphore:
+            result = await client.insert_document_structured(COLLECTION, json.dumps(record))
+            if "error" in result:
+                raise RuntimeError(result["error"])
+
+    start = time.perf_counter()
+    await asyncio.gather(*(insert(record) for record in records))
+    return time.perf_counter() - start
+
+
+async def bulk_insert(client: MongoDBClient, records, chunk_size: int, ordered: bool) -> float:
+    payload = "\n".join(json.dumps(record) for record in records)
+    start = time.perf_counter()
+    result = await client.insert_documents_structured(COLLECTION, payload, ordered=ordered, chunk_size=chunk_size)
+    elapsed = time.perf_counter() - start
+    if "error" in result or result["error_count"]:
+        raise RuntimeError(result.get("error") or result["chunks"])
+    return elapsed
+
+
+async def main_async(args):
+    client = MongoDBClient(args.uri, args.database)
+    await client.connect()
+    records = make_records(args.docs)
+
+    runs = [
+        (f"insert_document x{args.docs} (concurrency {args.concurrency})",
+         lambda: single_inserts(client, records, args.concurrency)),
+        (f"insert_documents (chunk {args.chunk_size}, {'unordered' if args.unordered else 'ordered'})",
+         lambda: bulk_insert(client, records, args.chunk_size, not args.unordered)),
+    ]
+    print(f"{'method':<60} {'seconds':>9} {'docs/s':>10}")
+    try:
+        for label, run in runs:
+            await client.db.drop_collection(COLLECTION)
+            elapsed = await run()
+            print(f"{label:<60} {elapsed:>9.3f} {args.docs / elapsed:>10.0f}")
+    finally:
+        await client.db.drop_collection(COLLECTION)
+        client.client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uri", default=os.getenv("MONGODB_URI", "mongodb://localhost:27017"))
+    parser.add_argument("--database", default="benchmark")
+    parser.add_argument("--docs", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=1,
+                        help="Parallel insert_document calls (1 matches one client looping)")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--unordered", action="store_true")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Micro-benchmark for bson_codec over synthetic medical-record documents.
+
+Two document shapes are measured:
+  wide   - one flat patient record with a few hundred top-level fields
+  nested - a patient with visits -> prescriptions/labs several levels deep,
+           with ObjectIds, datetimes, Decimal128 and Binary at every level
+
+For each shape it times the pre-codec approach (top-level _id/datetime
+conversion followed by json.dumps, which only works on the wide shape),
+bson_codec.dumps on each available backend, and to_jsonable + json.dumps.
+
+    python benchmarks/bench_codec.py --docs 500 --repeat 5
+"""
+import argparse
+import copy
+import datetime
+import json
+import os
+import sys
+import time
+import uuid
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bson import Binary, Decimal128, ObjectId  # noqa: E402
+
+import bson_codec  # noqa: E402
+
+BASE_TIME = datetime.datetime(2024, 1, 1, 8, 30)
+
+
+def wide_record(i: int, fields: int = 300):
+    doc = {"_id": ObjectId(), "patient_id": f"P{i:07d}", "admitted": BASE_TIME}
+    for n in range(fields):
+        kind = n % 4
+        if kind == 0:
+            doc[f"observation_{n}"] = f"value {n} for patient {i}"
+        elif kind == 1:
+            doc[f"measurement_{n}"] = n * 1.25
+        elif kind == 2:
+            doc[f"count_{n}"] = n
+        else:
+            doc[f"recorded_{n}"] = BASE_TIME + datetime.timedelta(minutes=n)
+    return doc
+
+
+def nested_record(i: int, visits: int = 8, depth: int = 4):
+    def lab_panel(level: int):
+        panel = {
+            "lab_id": ObjectId(),
+            "collected": BASE_TIME + datetime.timedelta(hours=level),
+            "result": Decimal128(f"{level}.{i % 97:02d}"),
+            "raw": Binary(os.urandom(16)),
+        }
+        if level < depth:
+            panel["reflex"] = [lab_panel(level + 1) for _ in range(2)]
+        return panel
+
+    return {
+        "_id": ObjectId(),
+        "patient_id": f"P{i:07d}",
+        "mrn_uuid": Binary.from_uuid(uuid.uuid4()),
+        "demographics": {"born": datetime.datetime(1980, 5, 17), "sex": "F"},
+        "visits": [
+            {
+                "visit_id": ObjectId(),
+                "date": BASE_TIME + datetime.timedelta(days=v),
+                "provider": {"_id": ObjectId(), "name": "Dr. Example"},
+                "prescriptions": [
+                    {"drug_id": ObjectId(), "dose_mg": Decimal128("12.5"), "start": BASE_TIME}
+                    for _ in range(3)
+                ],
+                "labs": [lab_panel(1)],
+            }
+            for v in range(visits)
+        ],
+    }
+
+
+def legacy_dumps(documents):
+    """What find_documents did before the codec: top-level conversion only"""
+    for doc in documents:
+        if "_id" in doc:
+            doc["_id"] = str(doc["_id"])
+        for key, value in doc.items():
+            if isinstance(value, datetime.datetime):
+                doc[key] = value.isoformat()
+    return json.dumps({"documents": documents, "count": len(documents)})
+
+
+def jsonable_dumps(documents):
+    return json.dumps(bson_codec.to_jsonable({"documents": documents, "count": len(documents)}))
+
+
+def codec_dumps(documents):
+    return bson_codec.dumps_bytes({"documents": documents, "count": len(documents)})
+
+
+def measure(func, documents, repeat: int, copies: bool):
+    best = float("inf")
+    size = 0
+    for _ in range(repeat):
+        # The legacy path mutates documents, so it gets a fresh copy (not timed)
+        batch = copy.deepcopy(documents) if copies else documents
+        start = time.perf_counter()
+        try:
+            output = func(batch)
+        except TypeError:
+            return None, 0
+        best = min(best, time.perf_counter() - start)
+        size = len(output)
+    return best, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    shapes = {
+        "wide": [wide_record(i) for i in range(args.docs)],
+        "nested": [nested_record(i) for i in range(args.docs)],
+    }
+    backends = ["json"] + (["orjson"] if bson_codec.orjson is not None else [])
+
+    print(f"{'shape':<8} {'method':<22} {'best (ms)':>10} {'docs/s':>12} {'bytes':>12}")
+    for shape, documents in shapes.items():
+        candidates = [("legacy top-level", legacy_dumps, True), ("to_jsonable + json", jsonable_dumps, False)]
+        for backend in backends:
+            candidates.append((f"codec[{backend}]", (backend, codec_dumps), False))
+
+        for label, func, copies in candidates:
+            if isinstance(func, tuple):
+                backend, func = func
+                bson_codec.set_backend(backend)
+            elapsed, size = measure(func, documents, args.repeat, copies)
+            if elapsed is None:
+                print(f"{shape:<8} {label:<22} {'fails (TypeError)':>36}")
+                continue
+            print(f"{shape:<8} {label:<22} {elapsed * 1000:>10.2f} {args.docs / elapsed:>12.0f} {size:>12}")
+
+
+if __name__ == "__main__":
+    main()
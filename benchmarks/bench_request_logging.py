@@ -0,0 +1,80 @@
+"""
+Requests-per-second benchmark for the request logging path.
+
+Drives the FastAPI app in-process (no network, no MongoDB) with a mix of
+`initialize` and `tools/list` calls, which exercise the middleware and
+handle_rpc without touching the database.
+
+Compare the current server against an older revision with:
+
+    git show <rev>:api/mongodb_server.py > /tmp/old_server.py
+    python benchmarks/bench_request_logging.py --server /tmp/old_server.py
+    python benchmarks/bench_request_logging.py
+"""
+import argparse
+import asyncio
+import contextlib
+import importlib.util
+import io
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+os.environ.setdefault("MONGODB_URI", "mongodb://localhost:27017")
+os.environ.setdefault("MONGODB_DATABASE", "benchmark")
+
+
+def load_app(server_path: str):
+    spec = importlib.util.spec_from_file_location("bench_server", server_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.app
+
+
+async def run(app, requests: int, concurrency: int) -> float:
+    import httpx
+
+    payloads = [
+        {"jsonrpc": "2.0", "id": i, "method": "initialize" if i % 2 else "tools/list", "params": {}}
+        for i in range(requests)
+    ]
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def send(payload):
+            async with semaphore:
+                response = await client.post("/", json=payload)
+                response.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(send(payload) for payload in payloads))
+        return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--server", default=os.path.join(ROOT, "api", "mongodb_server.py"),
+                        help="path to the mongodb_server.py to benchmark")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    # Server output goes to an in-memory sink so terminal speed does not skew the numbers
+    sink = io.StringIO()
+    with contextlib.redirect_stdout(sink):
+        app = load_app(args.server)
+        asyncio.run(run(app, 50, args.concurrency))  # warm-up
+        elapsed = asyncio.run(run(app, args.requests, args.concurrency))
+
+    print(f"server:      {args.server}")
+    print(f"requests:    {args.requests} (concurrency {args.concurrency})")
+    print(f"elapsed:     {elapsed:.3f}s")
+    print(f"throughput:  {args.requests / elapsed:.1f} req/s")
+    print(f"log output:  {len(sink.getvalue())} bytes")
+
+
+if __name__ == "__main__":
+    main()
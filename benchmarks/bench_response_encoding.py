@@ -0,0 +1,84 @@
+"""
+Wire size and encode/decode time of find_documents-style responses in
+each response format and compression available here.
+
+Uses the document shapes from bench_codec.py. For every format (JSON,
+plus MessagePack and CBOR when installed) and compression (none, gzip,
+plus br and zstd when installed) it reports the bytes sent, the server's
+encode + compress time, and the client's decompress + parse time.
+
+    python benchmarks/bench_response_encoding.py --docs 500 --repeat 5
+"""
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import response_encoding  # noqa: E402
+from bench_codec import nested_record, wide_record  # noqa: E402
+
+
+def decoders():
+    available = {response_encoding.JSON: json.loads}
+    if response_encoding.msgpack is not None:
+        available[response_encoding.MSGPACK] = response_encoding.msgpack.unpackb
+    if response_encoding.cbor2 is not None:
+        available[response_encoding.CBOR] = response_encoding.cbor2.loads
+    return available
+
+
+def decompressors():
+    available = {None: lambda data: data, "gzip": gzip.decompress}
+    if "br" in response_encoding.COMPRESSORS:
+        available["br"] = response_encoding.brotli.decompress
+    if "zstd" in response_encoding.COMPRESSORS:
+        import zstandard
+        available["zstd"] = zstandard.ZstdDecompressor().decompress
+    return available
+
+
+def best_of(repeat: int, func):
+    best = float("inf")
+    output = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = func()
+        best = min(best, time.perf_counter() - start)
+    return best, output
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    shapes = {
+        "wide": [wide_record(i) for i in range(args.docs)],
+        "nested": [nested_record(i) for i in range(args.docs)],
+    }
+    print(f"{'shape':<8} {'format':<20} {'encoding':<9} {'bytes':>12} {'encode (ms)':>12} {'decode (ms)':>12}")
+    for shape, documents in shapes.items():
+        content = {"jsonrpc": "2.0", "id": 1, "result": {"documents": documents, "count": len(documents)}}
+        for media_type, decode in decoders().items():
+            encode_time, body = best_of(args.repeat, lambda: response_encoding.encode(content, media_type))
+            for encoding, decompress in decompressors().items():
+                if encoding is None:
+                    compress_time, wire = 0.0, body
+                else:
+                    compress_time, wire = best_of(
+                        args.repeat, lambda: response_encoding.compress(body, encoding)
+                    )
+                decode_time, _ = best_of(args.repeat, lambda: decode(decompress(wire)))
+                print(f"{shape:<8} {media_type:<20} {encoding or 'identity':<9} {len(wire):>12} "
+                      f"{(encode_time + compress_time) * 1000:>12.2f} {decode_time * 1000:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+"""
+Per-tool latency and throughput benchmark.
+
+Drives the FastAPI app in-process with tools/call requests for every tool,
+with MongoDBClient attached to the in-memory backend in fake_mongo.py, so
+it runs anywhere without a database. Each tool is measured at several
+result sizes (documents returned or written per call) and concurrency
+levels; the report gives throughput and p50/p95/p99 latency per scenario
+and is written as JSON for comparison across commits:
+
+    python benchmarks/bench_tools.py --output before.json
+    git checkout <branch>
+    python benchmarks/bench_tools.py --output after.json --compare before.json
+
+Tools the server under test does not list are skipped, so older revisions
+can be measured with --server as in bench_request_logging.py. Use
+--latency-ms to add a simulated database round trip to every call, and
+--pool-size to limit how many round trips run at once.
+"""
+import argparse
+import asyncio
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault("MONGODB_URI", "mongodb://localhost:27017")
+os.environ.setdefault("MONGODB_DATABASE", "benchmark")
+# Measure the full query path rather than cache hits
+os.environ.setdefault("MCP_COUNT_CACHE_TTL_SECONDS", "0")
+os.environ.setdefault("MCP_RESULT_CACHE", "false")
+
+import fake_mongo  # noqa: E402
+
+PAD = "x" * 200
+
+
+def load_server(server_path: str):
+    spec = importlib.util.spec_from_file_location("bench_server", server_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def seed_document(i: int) -> dict:
+    return {"value": i, "group": i % 10, "name": f"item-{i}", "tags": ["a", "b"], "pad": PAD}
+
+
+def items(size: int) -> str:
+    return f"items_{size}"
+
+
+# tool name -> (uses the result size, arguments for a call at that size)
+SCENARIOS = {
+    "list_collections": (False, lambda size: {}),
+    "find_documents": (True, lambda size: {
+        "collection_name": items(size), "query": '{"value": {"$gte": 0}}', "limit": size,
+    }),
+    "count_documents": (True, lambda size: {
+        "collection_name": items(size), "query": '{"group": {"$lt": 5}}',
+    }),
+    "aggregate": (True, lambda size: {
+        "collection_name": items(size),
+        "pipeline": json.dumps([{"$match": {"value": {"$gte": 0}}}, {"$sort": {"value": -1}}]),
+        "max_results": size,
+    }),
+    "insert_document": (False, lambda size: {
+        "collection_name": "writes", "document": json.dumps(seed_document(0)),
+    }),
+    "insert_documents": (True, lambda size: {
+        "collection_name": "writes", "documents": json.dumps([seed_document(i) for i in range(size)]),
+    }),
+    "bulk_write": (True, lambda size: {
+        "collection_name": "writes",
+        "operations": json.dumps([{"insertOne": {"document": seed_document(i)}} for i in range(size)]),
+    }),
+    "update_documents": (True, lambda size: {
+        "collection_name": items(size), "query": '{"group": 3}', "update": '{"$inc": {"hits": 1}}',
+    }),
+    # Matches nothing, so the seeded collections stay the same size
+    "delete_documents": (True, lambda size: {
+        "collection_name": items(size), "query": '{"value": -1}',
+    }),
+    "suggest_indexes": (False, lambda size: {}),
+}
+
+
+def percentile(sorted_values, fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies, elapsed: float, errors: int) -> dict:
+    ordered = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "elapsed_s": round(elapsed, 4),
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "mean_ms": round(sum(ordered) / len(ordered), 3) if ordered else 0.0,
+        "p50_ms": round(percentile(ordered, 0.50), 3),
+        "p95_ms": round(percentile(ordered, 0.95), 3),
+        "p99_ms": round(percentile(ordered, 0.99), 3),
+    }
+
+
+def is_failure(response) -> bool:
+    if response.status_code != 200:
+        return True
+    body = response.json()
+    return "error" in body or bool(body.get("result", {}).get("isError"))
+
+
+async def run_scenario(client, tool: str, arguments: dict, requests: int, concurrency: int) -> dict:
+    payload = {"jsonrpc": "2.0", "id": 1, "method": "tools/call",
+               "params": {"name": tool, "arguments": arguments}}
+    latencies = []
+    errors = 0
+    remaining = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            start = time.perf_counter()
+            response = await client.post("/", json=payload)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if is_failure(response):
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, time.perf_counter() - start, errors)
+
+
+async def run(app, fake, args) -> list:
+    import httpx
+
+    database = fake[os.environ["MONGODB_DATABASE"]]
+    for size in args.sizes:
+        database[items(size)].documents = [seed_document(i) for i in range(size)]
+
+    results = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        listed = (await client.post("/", json={"jsonrpc": "2.0", "id": 0, "method": "tools/list"})).json()
+        available = {tool["name"] for tool in listed["result"]["tools"]}
+        for tool, (sized, make_arguments) in SCENARIOS.items():
+            if tool not in available or (args.tools and tool not in args.tools):
+                continue
+            for size in args.sizes if sized else [0]:
+                arguments = make_arguments(size or args.sizes[0])
+                for concurrency in args.concurrency:
+                    await run_scenario(client, tool, arguments, args.warmup, concurrency)
+                    summary = await run_scenario(client, tool, arguments, args.requests, concurrency)
+                    database["writes"].documents = []
+                    results.append({"tool": tool, "size": size, "concurrency": concurrency, **summary})
+                    print(format_row(results[-1]), file=sys.stderr)
+    return results
+
+
+def format_row(row: dict, baseline: dict = None) -> str:
+    line = (f"{row['tool']:<18} size={row['size']:<5} c={row['concurrency']:<3} "
+            f"{row['throughput_rps']:>9.1f} req/s  p50={row['p50_ms']:>8.3f}  "
+            f"p95={row['p95_ms']:>8.3f}  p99={row['p99_ms']:>8.3f} ms  errors={row['errors']}")
+    if baseline:
+        def change(key):
+            return (row[key] - baseline[key]) / baseline[key] * 100 if baseline[key] else 0.0
+        line += f"  [rps {change('throughput_rps'):+.1f}%  p50 {change('p50_ms'):+.1f}%  p99 {change('p99_ms'):+.1f}%]"
+    return line
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def int_list(raw: str) -> list:
+    return [int(item) for item in raw.split(",") if item]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--server", default=os.path.join(ROOT, "api", "mongodb_server.py"),
+                        help="path to the mongodb_server.py to benchmark")
+    parser.add_argument("--requests", type=int, default=300, help="requests per scenario")
+    parser.add_argument("--warmup", type=int, default=20, help="unmeasured requests before each scenario")
+    parser.add_argument("--sizes", type=int_list, default=[10, 100, 1000],
+                        help="comma-separated result sizes (default: 10,100,1000)")
+    parser.add_argument("--concurrency", type=int_list, default=[1, 8, 32],
+                        help="comma-separated concurrency levels (default: 1,8,32)")
+    parser.add_argument("--tools", type=lambda raw: raw.split(","), default=None,
+                        help="comma-separated tools to run (default: all)")
+    parser.add_argument("--latency-ms", type=float, default=0.0,
+                        help="simulated database round trip per call")
+    parser.add_argument("--pool-size", type=int, default=0,
+                        help="simulated connection pool size (default: unlimited)")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--compare", help="JSON results of an earlier run to compare against")
+    args = parser.parse_args()
+
+    # Server output goes to an in-memory sink so terminal speed does not skew the numbers
+    with contextlib.redirect_stdout(io.StringIO()):
+        server = load_server(args.server)
+        fake = fake_mongo.FakeMongoClient(latency_ms=args.latency_ms, pool_size=args.pool_size)
+        fake_mongo.attach(server.mongo_client, fake)
+        results = asyncio.run(run(server.app, fake, args))
+
+    report = {
+        "meta": {
+            "revision": git_revision(),
+            "server": os.path.relpath(args.server, ROOT),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "requests": args.requests,
+            "latency_ms": args.latency_ms,
+            "pool_size": args.pool_size,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = {(r["tool"], r["size"], r["concurrency"]): r for r in json.load(f)["results"]}
+    print(f"revision {report['meta']['revision']}, python {report['meta']['python']}")
+    for row in results:
+        print(format_row(row, baseline.get((row["tool"], row["size"], row["concurrency"]))))
+
+
+if __name__ == "__main__":
+    main()
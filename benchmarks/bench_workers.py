@@ -0,0 +1,193 @@
+"""
+Throughput scaling of serve.py across worker counts.
+
+For each worker count this starts `serve.py --workers N` as a real
+multi-process HTTP server, with every worker's MongoDBClient attached to
+its own copy of the in-memory backend from fake_mongo.py (seeded the same
+way, with --latency-ms of simulated round trip per call), then drives it
+over HTTP with tools/call requests from several load-generator processes
+for a fixed time:
+
+    python benchmarks/bench_workers.py --workers 1,2,4 --duration 10
+
+The load generators run on the same machine as the server, so leave them
+cores of their own (--clients) or the numbers flatten early; on a machine
+with fewer cores than workers + clients the scaling is capped by the CPU
+count, not by the server.
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import platform
+import signal
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+
+from bench_tools import (  # noqa: E402
+    ROOT, SCENARIOS, git_revision, int_list, is_failure, items, load_server, seed_document, summarize,
+)
+
+
+def create_app():
+    """App factory run inside each worker (serve.py --factory)"""
+    import fake_mongo
+
+    server = load_server(os.path.join(ROOT, "api", "mongodb_server.py"))
+    fake = fake_mongo.FakeMongoClient(latency_ms=float(os.getenv("BENCH_WORKERS_LATENCY_MS", "0")))
+    fake_mongo.attach(server.mongo_client, fake)
+    size = int(os.getenv("BENCH_WORKERS_SIZE", "100"))
+    fake[os.environ["MONGODB_DATABASE"]][items(size)].documents = [seed_document(i) for i in range(size)]
+    return server.app
+
+
+async def drive(url: str, payload: dict, connections: int, duration: float):
+    import httpx
+
+    latencies = []
+    errors = 0
+    pids = set()
+    deadline = time.perf_counter() + duration
+
+    async def worker(client):
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                response = await client.post("/", json=payload)
+                failed = is_failure(response)
+            except httpx.HTTPError:
+                failed = True
+            latencies.append((time.perf_counter() - start) * 1000)
+            errors += failed
+
+    limits = httpx.Limits(max_connections=connections, max_keepalive_connections=connections)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30) as client:
+        await asyncio.gather(*(worker(client) for _ in range(connections)))
+        # Fresh connections land on different workers; record which ones answered
+        for _ in range(connections):
+            async with httpx.AsyncClient(base_url=url) as probe:
+                pids.add((await probe.get("/health")).json().get("pid"))
+    return latencies, errors, pids
+
+
+def run_client(job):
+    return asyncio.run(drive(*job))
+
+
+def wait_ready(url: str, process: subprocess.Popen, timeout: float) -> None:
+    import httpx
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"serve.py exited with status {process.returncode}")
+        try:
+            if httpx.get(url + "/health", timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"server did not become ready within {timeout}s")
+
+
+def run(workers: int, args) -> dict:
+    url = f"http://127.0.0.1:{args.port}"
+    env = {
+        **os.environ,
+        "BENCH_WORKERS_LATENCY_MS": str(args.latency_ms),
+        "BENCH_WORKERS_SIZE": str(args.size),
+        # Measure every request's own work rather than coalesced reads
+        "MCP_SINGLE_FLIGHT": "false",
+        "MCP_LOG_SAMPLE_RATE": os.getenv("MCP_LOG_SAMPLE_RATE", "0"),
+    }
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "serve.py"), "--workers", str(workers), "--port", str(args.port),
+         "--app", "bench_workers:create_app", "--app-dir", BENCH_DIR, "--factory"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_ready(url, process, args.startup_timeout)
+        _, make_arguments = SCENARIOS[args.tool]
+        payload = {"jsonrpc": "2.0", "id": 1, "method": "tools/call",
+                   "params": {"name": args.tool, "arguments": make_arguments(args.size)}}
+        per_client = max(1, args.connections // args.clients)
+        with multiprocessing.Pool(args.clients) as pool:
+            pool.map(run_client, [(url, payload, per_client, args.warmup)] * args.clients)
+            outcomes = pool.map(run_client, [(url, payload, per_client, args.duration)] * args.clients)
+    finally:
+        process.send_signal(signal.SIGTERM)
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+    latencies = [latency for outcome in outcomes for latency in outcome[0]]
+    errors = sum(outcome[1] for outcome in outcomes)
+    pids = set().union(*(outcome[2] for outcome in outcomes))
+    return {"workers": workers, "workers_seen": len(pids), **summarize(latencies, args.duration, errors)}
+
+
+def format_row(row: dict, single: dict = None) -> str:
+    line = (f"workers={row['workers']:<3} seen={row['workers_seen']:<3} {row['throughput_rps']:>9.1f} req/s  "
+            f"p50={row['p50_ms']:>8.3f}  p95={row['p95_ms']:>8.3f}  p99={row['p99_ms']:>8.3f} ms  "
+            f"errors={row['errors']}")
+    if single and single["throughput_rps"]:
+        line += f"  [x{row['throughput_rps'] / single['throughput_rps']:.2f} vs 1 worker]"
+    return line
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int_list, default=[1, 2, 4],
+                        help="comma-separated worker counts (default: 1,2,4)")
+    parser.add_argument("--tool", default="find_documents", choices=sorted(SCENARIOS))
+    parser.add_argument("--size", type=int, default=100, help="result size of each call")
+    parser.add_argument("--connections", type=int, default=32, help="concurrent requests in total")
+    parser.add_argument("--clients", type=int, default=2, help="load-generator processes")
+    parser.add_argument("--duration", type=float, default=10.0, help="measured seconds per worker count")
+    parser.add_argument("--warmup", type=float, default=2.0, help="unmeasured seconds before each run")
+    parser.add_argument("--latency-ms", type=float, default=1.0, help="simulated database round trip per call")
+    parser.add_argument("--port", type=int, default=5100)
+    parser.add_argument("--startup-timeout", type=float, default=60.0)
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    args = parser.parse_args()
+
+    results = []
+    for workers in args.workers:
+        results.append(run(workers, args))
+        print(format_row(results[-1]), file=sys.stderr)
+
+    report = {
+        "meta": {
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "tool": args.tool,
+            "size": args.size,
+            "connections": args.connections,
+            "clients": args.clients,
+            "latency_ms": args.latency_ms,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    single = next((row for row in results if row["workers"] == 1), None)
+    print(f"revision {report['meta']['revision']}, python {report['meta']['python']}, {report['meta']['cpus']} cpus")
+    for row in results:
+        print(format_row(row, single))
+
+
+if __name__ == "__main__":
+    main()
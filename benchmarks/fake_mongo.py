@@ -0,0 +1,395 @@
+"""
+In-process stand-in for the parts of Motor that MongoDBClient uses.
+
+Documents live in Python lists; filters support equality, $eq/$ne/$gt/
+$gte/$lt/$lte/$in/$nin/$exists, $and/$or/$nor and dotted paths, and
+aggregate supports $match, $sort, $skip, $limit, $project (inclusion),
+$count and $group with $sum/$avg/$min/$max. It is meant for benchmarking
+the server's own overhead, not for checking query semantics.
+
+`latency_ms` adds a simulated round trip to every database call so the
+effect of concurrency limits and batching shows up as it would against
+a remote server; `pool_size` caps how many of those round trips can be
+in progress at once, like the driver's maxPoolSize.
+"""
+import asyncio
+import copy
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+from bson import ObjectId
+
+_MISSING = object()
+
+
+def _get(doc: Any, path: str) -> Any:
+    for part in path.split("."):
+        if not isinstance(doc, dict) or part not in doc:
+            return _MISSING
+        doc = doc[part]
+    return doc
+
+
+def _compare(value: Any, operator: str, operand: Any) -> bool:
+    if operator == "$eq":
+        return value == operand
+    if operator == "$ne":
+        return value != operand
+    if operator == "$in":
+        return value in operand
+    if operator == "$nin":
+        return value not in operand
+    if operator == "$exists":
+        return (value is not _MISSING) == bool(operand)
+    if value is _MISSING or value is None:
+        return False
+    try:
+        if operator == "$gt":
+            return value > operand
+        if operator == "$gte":
+            return value >= operand
+        if operator == "$lt":
+            return value < operand
+        if operator == "$lte":
+            return value <= operand
+    except TypeError:
+        return False
+    raise NotImplementedError(f"fake_mongo does not support {operator}")
+
+
+def matches(doc: Dict[str, Any], query: Dict[str, Any]) -> bool:
+    for key, condition in query.items():
+        if key == "$and":
+            if not all(matches(doc, clause) for clause in condition):
+                return False
+        elif key == "$or":
+            if not any(matches(doc, clause) for clause in condition):
+                return False
+        elif key == "$nor":
+            if any(matches(doc, clause) for clause in condition):
+                return False
+        else:
+            value = _get(doc, key)
+            if isinstance(condition, dict) and condition and all(k.startswith("$") for k in condition):
+                if not all(_compare(value, op, operand) for op, operand in condition.items()):
+                    return False
+            elif value != condition:
+                return False
+    return True
+
+
+def _sort_key(doc: Dict[str, Any], field: str):
+    value = _get(doc, field)
+    # None and missing values sort first, as in MongoDB
+    return (0, "") if value is _MISSING or value is None else (1, value)
+
+
+def _sorted(documents: List[Dict[str, Any]], spec) -> List[Dict[str, Any]]:
+    for field, direction in reversed(list(spec.items() if isinstance(spec, dict) else spec)):
+        documents = sorted(documents, key=lambda d: _sort_key(d, field), reverse=direction == -1)
+    return documents
+
+
+def _project(doc: Dict[str, Any], projection: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    if not projection:
+        return doc
+    include = {k for k, v in projection.items() if v not in (0, False) and k != "_id"}
+    if include:
+        out = {k: doc[k] for k in include if k in doc}
+        if projection.get("_id", 1) not in (0, False) and "_id" in doc:
+            out = {"_id": doc["_id"], **out}
+        return out
+    return {k: v for k, v in doc.items() if projection.get(k, 1) not in (0, False)}
+
+
+def _accumulate(operator: str, values: List[Any]) -> Any:
+    numbers = [v for v in values if isinstance(v, (int, float))]
+    if operator == "$sum":
+        return sum(numbers)
+    if operator == "$avg":
+        return sum(numbers) / len(numbers) if numbers else None
+    if operator == "$min":
+        return min(numbers) if numbers else None
+    if operator == "$max":
+        return max(numbers) if numbers else None
+    raise NotImplementedError(f"fake_mongo does not support {operator}")
+
+
+def _expression(doc: Dict[str, Any], expression: Any) -> Any:
+    if isinstance(expression, str) and expression.startswith("$"):
+        value = _get(doc, expression[1:])
+        return None if value is _MISSING else value
+    return expression
+
+
+def run_pipeline(documents: List[Dict[str, Any]], pipeline: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    for stage in pipeline:
+        (name, spec), = stage.items()
+        if name == "$match":
+            documents = [d for d in documents if matches(d, spec)]
+        elif name == "$sort":
+            documents = _sorted(documents, spec)
+        elif name == "$skip":
+            documents = documents[spec:]
+        elif name == "$limit":
+            documents = documents[:spec]
+        elif name == "$project":
+            documents = [_project(d, spec) for d in documents]
+        elif name == "$count":
+            documents = [{spec: len(documents)}]
+        elif name == "$group":
+            groups: Dict[Any, List[Dict[str, Any]]] = {}
+            for doc in documents:
+                key = _expression(doc, spec["_id"])
+                groups.setdefault(repr(key), []).append(doc)
+            output = []
+            for members in groups.values():
+                row = {"_id": _expression(members[0], spec["_id"])}
+                for field, accumulator in spec.items():
+                    if field != "_id":
+                        (operator, operand), = accumulator.items()
+                        row[field] = _accumulate(operator, [_expression(d, operand) for d in members])
+                output.append(row)
+            documents = output
+        else:
+            raise NotImplementedError(f"fake_mongo does not support {name}")
+    return documents
+
+
+class FakeCursor:
+    def __init__(self, collection: "FakeCollection", produce):
+        self._collection = collection
+        self._produce = produce
+        self._sort = None
+        self._limit = 0
+        self._buffer: Optional[List[Dict[str, Any]]] = None
+
+    def sort(self, spec):
+        self._sort = spec
+        return self
+
+    def limit(self, count: int):
+        self._limit = count
+        return self
+
+    def batch_size(self, size: int):
+        return self
+
+    def max_time_ms(self, ms: int):
+        return self
+
+    async def _fill(self):
+        if self._buffer is None:
+            await self._collection.round_trip()
+            documents = self._produce()
+            if self._sort:
+                documents = _sorted(documents, self._sort)
+            if self._limit:
+                documents = documents[:abs(self._limit)]
+            # Like the driver, hand out fresh decoded documents
+            self._buffer = copy.deepcopy(documents)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        await self._fill()
+        if not self._buffer:
+            raise StopAsyncIteration
+        return self._buffer.pop(0)
+
+    async def to_list(self, length: Optional[int] = None):
+        await self._fill()
+        length = len(self._buffer) if length is None else length
+        batch, self._buffer = self._buffer[:length], self._buffer[length:]
+        return batch
+
+    async def close(self):
+        self._buffer = []
+
+
+class FakeCollection:
+    def __init__(self, database: "FakeDatabase", name: str):
+        self.database = database
+        self.name = name
+        self.documents: List[Dict[str, Any]] = []
+        self.indexes: Dict[str, Dict[str, Any]] = {"_id_": {"key": [("_id", 1)]}}
+
+    async def round_trip(self):
+        await self.database.client.round_trip()
+
+    def _insert(self, document: Dict[str, Any]) -> Any:
+        document.setdefault("_id", ObjectId())
+        self.documents.append(copy.deepcopy(document))
+        return document["_id"]
+
+    def find(self, query=None, projection=None, **kwargs):
+        query = query or {}
+        return FakeCursor(self, lambda: [_project(d, projection) for d in self.documents if matches(d, query)])
+
+    def aggregate(self, pipeline, **kwargs):
+        return FakeCursor(self, lambda: run_pipeline(self.documents, pipeline))
+
+    async def insert_one(self, document):
+        await self.round_trip()
+        return SimpleNamespace(inserted_id=self._insert(document))
+
+    async def insert_many(self, documents, ordered=True):
+        await self.round_trip()
+        return SimpleNamespace(inserted_ids=[self._insert(d) for d in documents])
+
+    def _update(self, query, update, many: bool, upsert: bool = False):
+        matched = modified = 0
+        for doc in self.documents:
+            if not matches(doc, query):
+                continue
+            matched += 1
+            for operator, fields in update.items():
+                if operator == "$set":
+                    doc.update(fields)
+                elif operator == "$unset":
+                    for field in fields:
+                        doc.pop(field, None)
+                elif operator == "$inc":
+                    for field, amount in fields.items():
+                        doc[field] = doc.get(field, 0) + amount
+                else:
+                    raise NotImplementedError(f"fake_mongo does not support {operator}")
+            modified += 1
+            if not many:
+                break
+        upserted = 0
+        if not matched and upsert:
+            self._insert({k: v for k, v in query.items() if not k.startswith("$")} | update.get("$set", {}))
+            upserted = 1
+        return matched, modified, upserted
+
+    def _delete(self, query, many: bool) -> int:
+        kept, deleted = [], 0
+        for doc in self.documents:
+            if (many or not deleted) and matches(doc, query):
+                deleted += 1
+            else:
+                kept.append(doc)
+        self.documents = kept
+        return deleted
+
+    async def update_many(self, query, update, **kwargs):
+        await self.round_trip()
+        matched, modified, _ = self._update(query, update, many=True)
+        return SimpleNamespace(matched_count=matched, modified_count=modified)
+
+    async def delete_many(self, query, **kwargs):
+        await self.round_trip()
+        return SimpleNamespace(deleted_count=self._delete(query, many=True))
+
+    async def bulk_write(self, operations, ordered=True, **kwargs):
+        await self.round_trip()
+        counts = {"nInserted": 0, "nMatched": 0, "nModified": 0, "nRemoved": 0, "nUpserted": 0}
+        for operation in operations:
+            kind = type(operation).__name__
+            if kind == "InsertOne":
+                self._insert(operation._doc)
+                counts["nInserted"] += 1
+            elif kind in ("UpdateOne", "UpdateMany"):
+                matched, modified, upserted = self._update(
+                    operation._filter, operation._doc, many=kind == "UpdateMany", upsert=operation._upsert)
+                counts["nMatched"] += matched
+                counts["nModified"] += modified
+                counts["nUpserted"] += upserted
+            elif kind == "ReplaceOne":
+                for index, doc in enumerate(self.documents):
+                    if matches(doc, operation._filter):
+                        self.documents[index] = {"_id": doc["_id"], **operation._doc}
+                        counts["nMatched"] += 1
+                        counts["nModified"] += 1
+                        break
+            else:
+                counts["nRemoved"] += self._delete(operation._filter, many=kind == "DeleteMany")
+        return SimpleNamespace(bulk_api_result=counts)
+
+    async def count_documents(self, query, **kwargs):
+        await self.round_trip()
+        return sum(1 for d in self.documents if matches(d, query))
+
+    async def estimated_document_count(self, **kwargs):
+        await self.round_trip()
+        return len(self.documents)
+
+    async def index_information(self):
+        await self.round_trip()
+        return copy.deepcopy(self.indexes)
+
+    async def create_index(self, keys, **kwargs):
+        await self.round_trip()
+        name = "_".join(f"{field}_{direction}" for field, direction in keys)
+        self.indexes[name] = {"key": list(keys)}
+        return name
+
+
+class FakeDatabase:
+    def __init__(self, client: "FakeMongoClient", name: str):
+        self.client = client
+        self.name = name
+        self._collections: Dict[str, FakeCollection] = {}
+
+    def __getitem__(self, name: str) -> FakeCollection:
+        if name not in self._collections:
+            self._collections[name] = FakeCollection(self, name)
+        return self._collections[name]
+
+    async def list_collection_names(self):
+        await self.client.round_trip()
+        return [name for name, collection in self._collections.items() if collection.documents]
+
+    async def drop_collection(self, name: str):
+        self._collections.pop(name, None)
+
+    async def command(self, command, **kwargs):
+        if "explain" in command:
+            return {"queryPlanner": {"winningPlan": {"stage": "COLLSCAN"}}}
+        return {"ok": 1.0}
+
+
+class FakeMongoClient:
+    """Dict-backed replacement for AsyncIOMotorClient"""
+
+    def __init__(self, latency_ms: float = 0.0, pool_size: int = 0):
+        self.latency_ms = latency_ms
+        self.pool_size = pool_size
+        self._pool: Optional[asyncio.Semaphore] = None
+        self._databases: Dict[str, FakeDatabase] = {}
+        self.admin = self["admin"]
+
+    async def round_trip(self):
+        if not self.latency_ms:
+            return
+        if not self.pool_size:
+            await asyncio.sleep(self.latency_ms / 1000)
+            return
+        if self._pool is None:
+            self._pool = asyncio.Semaphore(self.pool_size)
+        async with self._pool:
+            await asyncio.sleep(self.latency_ms / 1000)
+
+    def __getitem__(self, name: str) -> FakeDatabase:
+        if name not in self._databases:
+            self._databases[name] = FakeDatabase(self, name)
+        return self._databases[name]
+
+    def get_database(self, name: str, **kwargs) -> FakeDatabase:
+        return self[name]
+
+    def close(self):
+        pass
+
+
+def attach(mongo_client, fake: FakeMongoClient) -> None:
+    """Point a MongoDBClient at a fake client, bypassing connection setup"""
+    mongo_client.client = fake
+    mongo_client.db = fake[mongo_client.database_name or "benchmark"]
+
+    async def connect(*args, **kwargs):
+        pass
+
+    mongo_client.connect = connect
@@ -0,0 +1,193 @@
+"""
+Replay a traffic trace captured with MCP_CAPTURE_FILE.
+
+Requests are re-issued at their original pacing (--speed 1), N times
+faster (--speed N) or back to back (--speed 0), with at most --concurrency
+in flight. The report gives latency percentiles overall and per method or
+tool, next to the latencies recorded in the trace, plus how far behind
+schedule requests were sent (high lag means the target, or --concurrency,
+could not keep up with the recorded load):
+
+    MCP_CAPTURE_FILE=/tmp/trace.jsonl uvicorn api.mongodb_server:app
+    python benchmarks/replay_traffic.py /tmp/trace.jsonl --target http://localhost:8000 --speed 4
+
+Without --target the trace is replayed in-process against the in-memory
+backend from fake_mongo.py, which reproduces the server-side load shape
+without a database (queries then see empty collections unless seeded).
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import time
+from collections import defaultdict
+
+from bench_tools import ROOT, git_revision, load_server, percentile, summarize
+
+import fake_mongo
+
+OK_STATUSES = (200, 202, 304)
+
+
+def load_trace(path: str, limit: int = 0) -> list:
+    entries = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                entries.append(json.loads(line))
+                if limit and len(entries) >= limit:
+                    break
+    entries.sort(key=lambda entry: entry["t"])
+    return entries
+
+
+def label(entry: dict) -> str:
+    return entry.get("tool") or entry.get("method") or "unparsed"
+
+
+def is_failure(response) -> bool:
+    if response.status_code not in OK_STATUSES:
+        return True
+    if response.headers.get("content-type", "").startswith("application/json") and response.content:
+        body = response.json()
+        return isinstance(body, dict) and "error" in body
+    return False
+
+
+async def replay(client, entries: list, speed: float, concurrency: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    samples = defaultdict(list)
+    errors = defaultdict(int)
+    statuses = defaultdict(int)
+    lags = []
+    tasks = []
+
+    async def send(entry: dict):
+        headers = {"content-type": "application/json"}
+        if entry.get("accept"):
+            headers["accept"] = entry["accept"]
+        try:
+            start = time.perf_counter()
+            response = await client.post("/", content=entry["body"].encode("utf-8"), headers=headers)
+            elapsed = (time.perf_counter() - start) * 1000
+            statuses[str(response.status_code)] += 1
+            failed = is_failure(response)
+        except Exception:
+            elapsed = (time.perf_counter() - start) * 1000
+            statuses["exception"] += 1
+            failed = True
+        finally:
+            semaphore.release()
+        samples[label(entry)].append(elapsed)
+        if failed:
+            errors[label(entry)] += 1
+
+    first = entries[0]["t"] if entries else 0.0
+    started = time.perf_counter()
+    for entry in entries:
+        scheduled = (entry["t"] - first) / speed if speed > 0 else 0.0
+        delay = scheduled - (time.perf_counter() - started)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        await semaphore.acquire()
+        lags.append(max(0.0, (time.perf_counter() - started) - scheduled) * 1000)
+        tasks.append(asyncio.ensure_future(send(entry)))
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+
+    by_label = {}
+    for name in sorted(samples):
+        recorded = sorted(e["latency_ms"] for e in entries if label(e) == name and "latency_ms" in e)
+        by_label[name] = {
+            **summarize(samples[name], elapsed, errors[name]),
+            "recorded_p50_ms": round(percentile(recorded, 0.50), 3),
+            "recorded_p99_ms": round(percentile(recorded, 0.99), 3),
+        }
+    all_samples = [value for values in samples.values() for value in values]
+    ordered_lags = sorted(lags)
+    return {
+        "overall": summarize(all_samples, elapsed, sum(errors.values())),
+        "statuses": dict(statuses),
+        "lag_ms": {
+            "p50": round(percentile(ordered_lags, 0.50), 3),
+            "p99": round(percentile(ordered_lags, 0.99), 3),
+            "max": round(ordered_lags[-1], 3) if ordered_lags else 0.0,
+        },
+        "trace_duration_s": round(entries[-1]["t"] - first, 3) if entries else 0.0,
+        "by_label": by_label,
+    }
+
+
+async def run(entries: list, args, app=None) -> dict:
+    import httpx
+
+    if app is not None:
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://replay")
+    else:
+        limits = httpx.Limits(max_connections=args.concurrency)
+        client = httpx.AsyncClient(base_url=args.target, limits=limits, timeout=args.timeout)
+    async with client:
+        return await replay(client, entries, args.speed, args.concurrency)
+
+
+def print_report(report: dict) -> None:
+    overall = report["overall"]
+    print(f"requests:    {overall['requests']} in {overall['elapsed_s']:.3f}s "
+          f"(trace spans {report['trace_duration_s']:.3f}s)")
+    print(f"throughput:  {overall['throughput_rps']:.1f} req/s, errors {overall['errors']}")
+    print(f"latency:     p50={overall['p50_ms']:.3f}  p95={overall['p95_ms']:.3f}  p99={overall['p99_ms']:.3f} ms")
+    print(f"send lag:    p50={report['lag_ms']['p50']:.3f}  p99={report['lag_ms']['p99']:.3f}  "
+          f"max={report['lag_ms']['max']:.3f} ms")
+    print(f"statuses:    {report['statuses']}")
+    for name, row in report["by_label"].items():
+        print(f"  {name:<18} n={row['requests']:<6} p50={row['p50_ms']:>8.3f}  p95={row['p95_ms']:>8.3f}  "
+              f"p99={row['p99_ms']:>8.3f} ms  (recorded p50={row['recorded_p50_ms']:.3f}  "
+              f"p99={row['recorded_p99_ms']:.3f})  errors={row['errors']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("trace", help="JSONL trace written by MCP_CAPTURE_FILE")
+    parser.add_argument("--target", help="base URL of the server to replay against (default: in-process)")
+    parser.add_argument("--server", default=os.path.join(ROOT, "api", "mongodb_server.py"),
+                        help="mongodb_server.py to run in-process when --target is not given")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="replay speed relative to the recording; 0 sends as fast as possible")
+    parser.add_argument("--concurrency", type=int, default=32, help="maximum requests in flight")
+    parser.add_argument("--limit", type=int, default=0, help="replay only the first N requests")
+    parser.add_argument("--timeout", type=float, default=30.0, help="per-request timeout in seconds")
+    parser.add_argument("--latency-ms", type=float, default=0.0,
+                        help="simulated database round trip for in-process replay")
+    parser.add_argument("--output", help="write the report as JSON to this file")
+    args = parser.parse_args()
+
+    entries = load_trace(args.trace, args.limit)
+    if not entries:
+        parser.error(f"no requests in {args.trace}")
+
+    if args.target:
+        report = asyncio.run(run(entries, args))
+    else:
+        # Server output goes to an in-memory sink so terminal speed does not skew the numbers
+        with contextlib.redirect_stdout(io.StringIO()):
+            server = load_server(args.server)
+            fake_mongo.attach(server.mongo_client, fake_mongo.FakeMongoClient(latency_ms=args.latency_ms))
+            report = asyncio.run(run(entries, args, app=server.app))
+
+    report["meta"] = {
+        "revision": git_revision(),
+        "trace": args.trace,
+        "target": args.target or "in-process",
+        "speed": args.speed,
+        "concurrency": args.concurrency,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    print_report(report)
+
+
+if __name__ == "__main__":
+    main()
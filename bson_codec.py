@@ -0,0 +1,144 @@
+"""
+BSON-aware JSON codec shared by the read tools.
+
+Documents straight from a Motor cursor can hold ObjectId, datetime,
+Decimal128, Binary and other BSON values at any depth. Rather than walking
+each document up front, the codec hands an encoder hook to the JSON
+backend, which calls it only for values it cannot serialize itself, so a
+whole result is converted and serialized in a single pass.
+
+orjson is used when it is installed (override with MCP_JSON_BACKEND=json),
+falling back to the standard library json module. Extra types can be
+supported with register_encoder().
+"""
+import base64
+import datetime
+import decimal
+import json
+import os
+import re
+import uuid
+from typing import Any, Callable, Dict
+
+import bson
+from bson.binary import Binary
+from bson.code import Code
+from bson.dbref import DBRef
+from bson.decimal128 import Decimal128
+from bson.max_key import MaxKey
+from bson.min_key import MinKey
+from bson.regex import Regex
+from bson.timestamp import Timestamp
+
+try:
+    import orjson
+except ImportError:  # orjson is optional
+    orjson = None
+
+_ENCODERS: Dict[type, Callable[[Any], Any]] = {}
+
+
+def register_encoder(value_type: type, encoder: Callable[[Any], Any]) -> None:
+    """
+    Register how values of `value_type` are converted to JSON-native data.
+
+    The encoder may return any JSON-serializable structure; nested values
+    that are themselves BSON types are encoded in turn.
+    """
+    _ENCODERS[value_type] = encoder
+
+
+def _encode_binary(value: Binary) -> Any:
+    # Standard UUIDs read back as text; any other binary data as base64
+    if value.subtype == bson.binary.UUID_SUBTYPE:
+        return str(value.as_uuid())
+    return base64.b64encode(value).decode()
+
+
+register_encoder(bson.ObjectId, str)
+register_encoder(datetime.datetime, lambda value: value.isoformat())
+register_encoder(datetime.date, lambda value: value.isoformat())
+register_encoder(Decimal128, str)
+register_encoder(decimal.Decimal, str)
+register_encoder(uuid.UUID, str)
+register_encoder(Binary, _encode_binary)
+register_encoder(bytes, lambda value: base64.b64encode(value).decode())
+register_encoder(Regex, lambda value: value.pattern)
+register_encoder(re.Pattern, lambda value: value.pattern)
+register_encoder(Timestamp, lambda value: {"t": value.time, "i": value.inc})
+register_encoder(Code, str)
+register_encoder(DBRef, lambda value: {"$ref": value.collection, "$id": value.id})
+register_encoder(MinKey, lambda value: {"$minKey": 1})
+register_encoder(MaxKey, lambda value: {"$maxKey": 1})
+
+
+def encode_value(value: Any) -> Any:
+    """Encoder hook for the JSON backends: convert one non-native value"""
+    encoder = _ENCODERS.get(type(value))
+    if encoder is None:
+        # Subclasses of registered types (e.g. a custom ObjectId)
+        for value_type, candidate in _ENCODERS.items():
+            if isinstance(value, value_type):
+                encoder = candidate
+                break
+        else:
+            raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+    return encoder(value)
+
+
+_NATIVE = (str, int, float, bool, type(None))
+
+
+def to_jsonable(value: Any) -> Any:
+    """
+    Recursively convert a document into plain JSON-native Python data.
+
+    Only needed when a caller wants the converted structure itself; for
+    serialization use dumps(), which avoids building the intermediate copy.
+    """
+    if isinstance(value, _NATIVE):
+        return value
+    if isinstance(value, dict):
+        return {key: to_jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_jsonable(item) for item in value]
+    return to_jsonable(encode_value(value))
+
+
+def _dumps_json(obj: Any) -> bytes:
+    return json.dumps(obj, default=encode_value, separators=(",", ":")).encode()
+
+
+def _dumps_orjson(obj: Any) -> bytes:
+    return orjson.dumps(obj, default=encode_value, option=orjson.OPT_NON_STR_KEYS)
+
+
+BACKEND = os.getenv("MCP_JSON_BACKEND", "orjson" if orjson is not None else "json")
+if BACKEND == "orjson" and orjson is None:
+    BACKEND = "json"
+
+_dump: Callable[[Any], bytes] = _dumps_orjson if BACKEND == "orjson" else _dumps_json
+
+
+def set_backend(name: str) -> None:
+    """Switch the JSON backend at runtime ("orjson" or "json")"""
+    global BACKEND, _dump
+    if name == "orjson":
+        if orjson is None:
+            raise RuntimeError("orjson is not installed")
+        _dump = _dumps_orjson
+    elif name == "json":
+        _dump = _dumps_json
+    else:
+        raise ValueError(f"Unknown JSON backend: {name}")
+    BACKEND = name
+
+
+def dumps_bytes(obj: Any) -> bytes:
+    """Serialize a structure that may contain BSON values to compact JSON bytes"""
+    return _dump(obj)
+
+
+def dumps(obj: Any) -> str:
+    """Serialize a structure that may contain BSON values to a compact JSON string"""
+    return _dump(obj).decode()
@@ -0,0 +1,187 @@
+"""
+Chunked bulk writes for the insert_documents and bulk_write tools.
+
+Input is a JSON array or NDJSON (one record per line). Operations are
+split into chunks that stay well below the server's 48 MB message limit
+and then run with collection.bulk_write(). With ordered=False chunks run
+concurrently and failures in one chunk do not stop the others; with
+ordered=True chunks run in sequence and stop at the first failing chunk.
+"""
+import asyncio
+import json
+import os
+from typing import Any, Dict, List, Tuple
+
+import bson
+
+from query_parser import loads_extended
+
+# Operations per chunk when the caller does not choose
+DEFAULT_CHUNK_SIZE = int(os.getenv("MCP_BULK_CHUNK_SIZE", "1000"))
+# Encoded bytes per chunk; the server accepts up to 48 MB per message
+MAX_CHUNK_BYTES = int(os.getenv("MCP_BULK_MAX_CHUNK_BYTES", str(8 * 1024 * 1024)))
+# Unordered chunks in flight at once
+BULK_CONCURRENCY = max(1, int(os.getenv("MCP_BULK_CONCURRENCY", "4")))
+# Largest document the server accepts
+MAX_DOCUMENT_BYTES = 16 * 1024 * 1024
+
+OPERATION_TYPES = ("insertOne", "updateOne", "updateMany", "replaceOne", "deleteOne", "deleteMany")
+
+
+def parse_records(text: str) -> List[Any]:
+    """Parse an Extended JSON array, or NDJSON with one Extended JSON value per non-empty line"""
+    stripped = text.strip()
+    if stripped.startswith("["):
+        try:
+            return loads_extended(stripped)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON array: {e}")
+    records = []
+    for line_number, line in enumerate(stripped.splitlines(), start=1):
+        if line.strip():
+            try:
+                records.append(loads_extended(line))
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Invalid JSON on line {line_number}: {e}")
+    return records
+
+
+def build_operation(spec: Any):
+    """
+    Turn a shell-style operation such as
+    {"updateOne": {"filter": {...}, "update": {...}, "upsert": true}}
+    into a pymongo write model.
+    """
+    from pymongo import DeleteMany, DeleteOne, InsertOne, ReplaceOne, UpdateMany, UpdateOne
+
+    if not isinstance(spec, dict) or len(spec) != 1:
+        raise ValueError(f"Each operation must be an object with one of: {', '.join(OPERATION_TYPES)}")
+    (name, args), = spec.items()
+    if name not in OPERATION_TYPES or not isinstance(args, dict):
+        raise ValueError(f"Unknown operation '{name}' (expected one of: {', '.join(OPERATION_TYPES)})")
+    try:
+        if name == "insertOne":
+            return InsertOne(args["document"])
+        if name == "updateOne":
+            return UpdateOne(args["filter"], args["update"], upsert=args.get("upsert", False))
+        if name == "updateMany":
+            return UpdateMany(args["filter"], args["update"], upsert=args.get("upsert", False))
+        if name == "replaceOne":
+            return ReplaceOne(args["filter"], args["replacement"], upsert=args.get("upsert", False))
+        if name == "deleteOne":
+            return DeleteOne(args["filter"])
+        return DeleteMany(args["filter"])
+    except KeyError as e:
+        raise ValueError(f"Operation '{name}' is missing {e}")
+
+
+def encoded_size(part: Any) -> int:
+    """Encoded size of a document, or of an update pipeline's stages"""
+    if isinstance(part, dict):
+        return len(bson.encode(part))
+    if isinstance(part, list):
+        return sum(len(bson.encode(stage)) for stage in part if isinstance(stage, dict))
+    return 0
+
+
+def operation_size(spec: Dict[str, Any]) -> int:
+    """
+    Approximate encoded size of a shell-style operation accepted by
+    build_operation (its filter plus document, update or replacement)
+    """
+    (_, args), = spec.items()
+    return sum(encoded_size(args.get(key)) for key in ("filter", "document", "update", "replacement"))
+
+
+def chunk_operations(operations: List[Any], sizes: List[int], chunk_size: int,
+                     max_bytes: int = MAX_CHUNK_BYTES) -> List[Tuple[int, List[Any]]]:
+    """
+    Split operations into (start_index, chunk) pairs bounded by count and
+    encoded bytes; sizes[i] is the encoded size of operations[i]
+    """
+    chunks = []
+    current: List[Any] = []
+    current_bytes = 0
+    start = 0
+    for index, (operation, size) in enumerate(zip(operations, sizes)):
+        if size > MAX_DOCUMENT_BYTES:
+            raise ValueError(f"Operation {index} is larger than the 16 MB document limit")
+        if current and (len(current) >= chunk_size or current_bytes + size > max_bytes):
+            chunks.append((start, current))
+            current, current_bytes, start = [], 0, index
+        current.append(operation)
+        current_bytes += size
+    if current:
+        chunks.append((start, current))
+    return chunks
+
+
+async def _run_chunk(collection, number: int, start: int, chunk: List[Any], ordered: bool) -> Dict[str, Any]:
+    from pymongo.errors import BulkWriteError, PyMongoError
+
+    report: Dict[str, Any] = {"chunk": number, "start_index": start, "operations": len(chunk)}
+    try:
+        result = await collection.bulk_write(chunk, ordered=ordered)
+        counts = result.bulk_api_result
+        errors: List[Dict[str, Any]] = []
+    except BulkWriteError as e:
+        counts = e.details
+        errors = [
+            {"index": start + error["index"], "code": error.get("code"), "message": error.get("errmsg")}
+            for error in e.details.get("writeErrors", [])
+        ]
+    except PyMongoError as e:
+        counts = {}
+        errors = [{"index": None, "code": getattr(e, "code", None), "message": str(e)}]
+    report.update({
+        "inserted": counts.get("nInserted", 0),
+        "matched": counts.get("nMatched", 0),
+        "modified": counts.get("nModified", 0),
+        "deleted": counts.get("nRemoved", 0),
+        "upserted": counts.get("nUpserted", 0),
+        "errors": errors,
+    })
+    return report
+
+
+async def execute_chunks(collection, operations: List[Any], sizes: List[int], ordered: bool = True,
+                         chunk_size: int = DEFAULT_CHUNK_SIZE) -> Dict[str, Any]:
+    """
+    Run operations chunk by chunk and summarize per-chunk results and
+    errors. sizes holds each operation's encoded size, computed from the
+    parsed input (encoded_size, operation_size) before the write models
+    were built.
+    """
+    chunks = chunk_operations(operations, sizes, max(1, chunk_size))
+    reports: List[Dict[str, Any]] = []
+    stopped_early = False
+
+    if ordered:
+        for number, (start, chunk) in enumerate(chunks):
+            report = await _run_chunk(collection, number, start, chunk, ordered=True)
+            reports.append(report)
+            if report["errors"]:
+                stopped_early = number < len(chunks) - 1
+                break
+    else:
+        semaphore = asyncio.Semaphore(BULK_CONCURRENCY)
+
+        async def run(number: int, start: int, chunk: List[Any]):
+            async with semaphore:
+                return await _run_chunk(collection, number, start, chunk, ordered=False)
+
+        reports = list(await asyncio.gather(*(run(n, s, c) for n, (s, c) in enumerate(chunks))))
+
+    totals = {key: sum(report[key] for report in reports)
+              for key in ("inserted", "matched", "modified", "deleted", "upserted")}
+    error_count = sum(len(report["errors"]) for report in reports)
+    return {
+        "success": error_count == 0,
+        "ordered": ordered,
+        "operations": len(operations),
+        "chunk_count": len(chunks),
+        **totals,
+        "error_count": error_count,
+        "stopped_early": stopped_early,
+        "chunks": reports,
+    }
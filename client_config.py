@@ -0,0 +1,201 @@
+import os
+import threading
+from dataclasses import dataclass, field, fields, replace
+from typing import Any, Dict, Optional, Tuple
+
+READ_PREFERENCES = ("primary", "primaryPreferred", "secondary", "secondaryPreferred", "nearest")
+
+
+def _env_int(name: str) -> Optional[int]:
+    value = os.getenv(name)
+    return int(value) if value not in (None, "") else None
+
+
+@dataclass(frozen=True)
+class MongoClientConfig:
+    """
+    Connection settings for MongoDBClient.
+
+    Every field can be set from the environment (see from_env) or passed
+    directly. Fields left as None are not passed to the driver, so options
+    in the connection string and the driver defaults still apply.
+    read_preference only applies to the read-only tools; writes always go to
+    the primary. max_time_ms is the default server-side time limit for
+    find, count and aggregate; tools accept a per-call max_time_ms too.
+    """
+
+    max_pool_size: Optional[int] = None
+    min_pool_size: Optional[int] = None
+    max_idle_time_ms: Optional[int] = None
+    wait_queue_timeout_ms: Optional[int] = None
+    # Wire compression, in order of preference: "zstd", "snappy", "zlib"
+    compressors: Tuple[str, ...] = ()
+    zlib_compression_level: Optional[int] = None
+    server_selection_timeout_ms: Optional[int] = None
+    connect_timeout_ms: Optional[int] = None
+    socket_timeout_ms: Optional[int] = None
+    read_preference: str = "primary"
+    max_staleness_seconds: Optional[int] = None
+    app_name: Optional[str] = None
+    max_time_ms: Optional[int] = 60000
+
+    # Environment variable for each field
+    ENV = {
+        "max_pool_size": "MONGODB_MAX_POOL_SIZE",
+        "min_pool_size": "MONGODB_MIN_POOL_SIZE",
+        "max_idle_time_ms": "MONGODB_MAX_IDLE_TIME_MS",
+        "wait_queue_timeout_ms": "MONGODB_WAIT_QUEUE_TIMEOUT_MS",
+        "compressors": "MONGODB_COMPRESSORS",
+        "zlib_compression_level": "MONGODB_ZLIB_COMPRESSION_LEVEL",
+        "server_selection_timeout_ms": "MONGODB_SERVER_SELECTION_TIMEOUT_MS",
+        "connect_timeout_ms": "MONGODB_CONNECT_TIMEOUT_MS",
+        "socket_timeout_ms": "MONGODB_SOCKET_TIMEOUT_MS",
+        "read_preference": "MONGODB_READ_PREFERENCE",
+        "max_staleness_seconds": "MONGODB_MAX_STALENESS_SECONDS",
+        "app_name": "MONGODB_APP_NAME",
+        "max_time_ms": "MONGODB_MAX_TIME_MS",
+    }
+
+    def __post_init__(self):
+        if self.read_preference not in READ_PREFERENCES:
+            raise ValueError(f"Invalid read preference: {self.read_preference!r} "
+                             f"(expected one of {', '.join(READ_PREFERENCES)})")
+        if (self.min_pool_size or 0) < 0 or (self.max_pool_size or 0) < 0:
+            raise ValueError("Pool sizes must not be negative")
+        if self.max_pool_size and (self.min_pool_size or 0) > self.max_pool_size:
+            raise ValueError("min_pool_size cannot exceed max_pool_size")
+
+    @classmethod
+    def from_env(cls, **overrides: Any) -> "MongoClientConfig":
+        """Build a config from MONGODB_* environment variables, then apply overrides"""
+        values: Dict[str, Any] = {}
+        for config_field in fields(cls):
+            env_name = cls.ENV.get(config_field.name)
+            raw = os.getenv(env_name) if env_name else None
+            if raw in (None, ""):
+                continue
+            if config_field.name == "compressors":
+                values["compressors"] = tuple(c.strip() for c in raw.split(",") if c.strip())
+            elif config_field.name in ("read_preference", "app_name"):
+                values[config_field.name] = raw
+            else:
+                values[config_field.name] = _env_int(env_name)
+        values.update(overrides)
+        return cls(**values)
+
+    def with_overrides(self, **overrides: Any) -> "MongoClientConfig":
+        """Copy of this config with some fields replaced"""
+        return replace(self, **overrides)
+
+    def client_kwargs(self) -> Dict[str, Any]:
+        """Keyword arguments for AsyncIOMotorClient; unset options are left to the driver"""
+        options = {
+            "maxPoolSize": self.max_pool_size,
+            "minPoolSize": self.min_pool_size,
+            "serverSelectionTimeoutMS": self.server_selection_timeout_ms,
+            "maxIdleTimeMS": self.max_idle_time_ms,
+            "waitQueueTimeoutMS": self.wait_queue_timeout_ms,
+            "zlibCompressionLevel": self.zlib_compression_level,
+            "connectTimeoutMS": self.connect_timeout_ms,
+            "socketTimeoutMS": self.socket_timeout_ms,
+            "appname": self.app_name,
+        }
+        kwargs = {key: value for key, value in options.items() if value is not None}
+        if self.compressors:
+            kwargs["compressors"] = ",".join(self.compressors)
+        return kwargs
+
+    def make_read_preference(self):
+        """pymongo read preference object for the read-only tools"""
+        from pymongo import read_preferences
+
+        if self.read_preference == "primary":
+            return read_preferences.Primary()
+        mode = {
+            "primaryPreferred": read_preferences.PrimaryPreferred,
+            "secondary": read_preferences.Secondary,
+            "secondaryPreferred": read_preferences.SecondaryPreferred,
+            "nearest": read_preferences.Nearest,
+        }[self.read_preference]
+        max_staleness = self.max_staleness_seconds if self.max_staleness_seconds is not None else -1
+        return mode(max_staleness=max_staleness)
+
+
+@dataclass
+class PoolStats:
+    """
+    Connection pool counters collected from driver CMAP events.
+
+    Updated from driver threads, so all access goes through the lock.
+    """
+
+    created: int = 0
+    closed: int = 0
+    checked_out: int = 0
+    max_checked_out: int = 0
+    checkouts: int = 0
+    checkout_failures: int = 0
+    pool_clears: int = 0
+    checkout_wait_ms_total: float = 0.0
+    checkout_wait_ms_max: float = 0.0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "connections_open": self.created - self.closed,
+                "connections_created": self.created,
+                "connections_closed": self.closed,
+                "checked_out": self.checked_out,
+                "max_checked_out": self.max_checked_out,
+                "checkouts": self.checkouts,
+                "checkout_failures": self.checkout_failures,
+                "pool_clears": self.pool_clears,
+                "checkout_wait_ms_avg": round(self.checkout_wait_ms_total / self.checkouts, 3)
+                if self.checkouts else 0.0,
+                "checkout_wait_ms_max": round(self.checkout_wait_ms_max, 3),
+            }
+
+    def make_listener(self):
+        """Build a pymongo ConnectionPoolListener feeding these counters"""
+        from pymongo import monitoring
+
+        stats = self
+
+        class _PoolStatsListener(monitoring.ConnectionPoolListener):
+            def pool_created(self, event): pass
+            def pool_ready(self, event): pass
+            def pool_closed(self, event): pass
+            def connection_ready(self, event): pass
+            def connection_check_out_started(self, event): pass
+
+            def pool_cleared(self, event):
+                with stats._lock:
+                    stats.pool_clears += 1
+
+            def connection_created(self, event):
+                with stats._lock:
+                    stats.created += 1
+
+            def connection_closed(self, event):
+                with stats._lock:
+                    stats.closed += 1
+
+            def connection_check_out_failed(self, event):
+                with stats._lock:
+                    stats.checkout_failures += 1
+
+            def connection_checked_out(self, event):
+                wait_ms = (getattr(event, "duration", None) or 0.0) * 1000
+                with stats._lock:
+                    stats.checkouts += 1
+                    stats.checked_out += 1
+                    stats.max_checked_out = max(stats.max_checked_out, stats.checked_out)
+                    stats.checkout_wait_ms_total += wait_ms
+                    stats.checkout_wait_ms_max = max(stats.checkout_wait_ms_max, wait_ms)
+
+            def connection_checked_in(self, event):
+                with stats._lock:
+                    stats.checked_out -= 1
+
+        return _PoolStatsListener()
@@ -0,0 +1,329 @@
+"""
+In-process metrics in the Prometheus text exposition format.
+
+Everything is recorded on the event loop thread, so the collectors are
+plain dicts and lists without locks; an observation is a bisect plus two
+additions. Timings are split into three phases per request:
+
+  parse      - decoding the JSON-RPC request body
+  db         - the tool method itself (argument decoding and driver round trips);
+               for a streamed call, the time spent fetching its batches
+  serialize  - encoding the JSON-RPC response
+
+Set MCP_METRICS=false to turn recording off.
+"""
+import contextvars
+import functools
+import os
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+METRICS_ENABLED = os.getenv("MCP_METRICS", "true").lower() in ("1", "true", "yes")
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DOCUMENT_BUCKETS = (0, 1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000, 10000)
+BYTE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class Counter:
+    """Monotonic counter per label set"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def value(self, *label_values: str) -> float:
+        return self._values.get(label_values, 0)
+
+    def samples(self) -> Iterator[str]:
+        for values, total in sorted(self._values.items()):
+            yield f"{self.name}{_format_labels(self.labels, values)} {_format_value(total)}"
+
+
+class Gauge(Counter):
+    """Value that can go up and down"""
+
+    kind = "gauge"
+
+    def dec(self, *label_values: str, amount: float = 1) -> None:
+        self.inc(*label_values, amount=-amount)
+
+    def set(self, value: float, *label_values: str) -> None:
+        self._values[label_values] = value
+
+
+class Histogram:
+    """Cumulative-bucket histogram per label set"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        # label values -> [per-bucket counts (last one is +Inf), sum, count]
+        self._series: Dict[LabelValues, List[Any]] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        series = self._series.get(label_values)
+        if series is None:
+            series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def count(self, *label_values: str) -> int:
+        series = self._series.get(label_values)
+        return series[2] if series else 0
+
+    def samples(self) -> Iterator[str]:
+        for values, (counts, total, count) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{_format_labels(self.labels, values, le)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labels, values)} {_format_value(total)}"
+            yield f"{self.name}_count{_format_labels(self.labels, values)} {count}"
+
+
+REQUEST_SECONDS = Histogram(
+    "mcp_request_duration_seconds", "Time spent handling a JSON-RPC POST, by method and tool", ("method", "tool"))
+PHASE_SECONDS = Histogram(
+    "mcp_phase_duration_seconds", "Time spent in each request phase (parse, db, serialize)", ("method", "tool", "phase"))
+DOCUMENTS_RETURNED = Histogram(
+    "mcp_tool_documents_returned", "Documents returned per tool call", ("tool",), DOCUMENT_BUCKETS)
+RESPONSE_BYTES = Histogram(
+    "mcp_response_bytes", "Size of encoded JSON-RPC responses", ("method", "tool"), BYTE_BUCKETS)
+TOOL_CALLS = Counter(
+    "mcp_tool_calls_total", "Tool calls by outcome (ok, error for {\"error\": ...} results, exception)", ("tool", "status"))
+RPC_ERRORS = Counter(
+    "mcp_rpc_errors_total", "JSON-RPC error responses by error code", ("code",))
+IN_FLIGHT = Gauge(
+    "mcp_requests_in_flight", "JSON-RPC POST requests currently being handled")
+IN_FLIGHT.set(0)
+
+COLLECTORS = (REQUEST_SECONDS, PHASE_SECONDS, DOCUMENTS_RETURNED, RESPONSE_BYTES, TOOL_CALLS, RPC_ERRORS, IN_FLIGHT)
+
+# Label values come from client input; anything else is reported as "other"
+# so unknown methods and tool names cannot grow the series without bound
+KNOWN_METHODS = {"initialize", "tools/list", "tools/call", "notifications/initialized"}
+_known_tools = set()
+
+
+class RequestMetrics:
+    """Labels of the request being handled, filled in once the body is parsed"""
+
+    __slots__ = ("method", "tool")
+
+    def __init__(self):
+        # Requests whose body never parses keep the "unparsed" label
+        self.method = "unparsed"
+        self.tool = ""
+
+    def observe(self, phase_name: str, seconds: float) -> None:
+        """Record a phase timed before the labels were known"""
+        PHASE_SECONDS.observe(seconds, self.method, self.tool, phase_name)
+
+    def label_from(self, body: Any) -> None:
+        """Take the method and tool name from a parsed JSON-RPC body"""
+        if isinstance(body, list):
+            self.method = "batch"
+        elif isinstance(body, dict):
+            method = body.get("method")
+            self.method = method if isinstance(method, str) and method in KNOWN_METHODS else "other"
+            if self.method == "tools/call":
+                params = body.get("params")
+                tool = params.get("name") if isinstance(params, dict) else None
+                self.tool = tool if isinstance(tool, str) and tool in _known_tools else "other"
+
+
+_current: contextvars.ContextVar[Optional[RequestMetrics]] = contextvars.ContextVar("mcp_request_metrics", default=None)
+
+
+@contextmanager
+def track_request() -> Iterator[RequestMetrics]:
+    """Count a request as in flight and record its total duration"""
+    if not METRICS_ENABLED:
+        yield RequestMetrics()
+        return
+    tracked = RequestMetrics()
+    token = _current.set(tracked)
+    IN_FLIGHT.inc()
+    start = time.perf_counter()
+    try:
+        yield tracked
+    finally:
+        REQUEST_SECONDS.observe(time.perf_counter() - start, tracked.method, tracked.tool)
+        IN_FLIGHT.dec()
+        _current.reset(token)
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Time a phase of the current request; a no-op outside track_request()"""
+    tracked = _current.get()
+    if tracked is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        tracked.observe(name, time.perf_counter() - start)
+
+
+def record_response(content: Any, size: int) -> None:
+    """Record the encoded size of a response and any JSON-RPC errors it carries"""
+    tracked = _current.get()
+    if tracked is None:
+        return
+    RESPONSE_BYTES.observe(size, tracked.method, tracked.tool)
+    for message in content if isinstance(content, list) else (content,):
+        if isinstance(message, dict) and isinstance(message.get("error"), dict):
+            record_rpc_error(message["error"].get("code"))
+
+
+def record_streamed_response(tool_name: str, size: int) -> None:
+    """Record the encoded size of a streamed tools/call response once it has been sent"""
+    if METRICS_ENABLED:
+        RESPONSE_BYTES.observe(size, "tools/call", tool_name)
+
+
+def record_rpc_error(code: Any) -> None:
+    """Count a JSON-RPC error response, including one that ends a stream"""
+    RPC_ERRORS.inc(str(code))
+
+
+def _documents_in(result: Any) -> Optional[int]:
+    if isinstance(result, dict):
+        for key in ("documents", "results"):
+            if isinstance(result.get(key), list):
+                return len(result[key])
+    return None
+
+
+def instrument_tool(tool_name: str, func: Callable[..., Any]) -> Callable[..., Any]:
+    """Wrap an async tool method to record its db phase, outcome and documents returned"""
+    if not METRICS_ENABLED:
+        return func
+    _known_tools.add(tool_name)
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        tracked = _current.get()
+        method = tracked.method if tracked else "tools/call"
+        start = time.perf_counter()
+        try:
+            result = await func(*args, **kwargs)
+        except Exception:
+            TOOL_CALLS.inc(tool_name, "exception")
+            raise
+        finally:
+            PHASE_SECONDS.observe(time.perf_counter() - start, method, tool_name, "db")
+        TOOL_CALLS.inc(tool_name, "error" if isinstance(result, dict) and "error" in result else "ok")
+        documents = _documents_in(result)
+        if documents is not None:
+            DOCUMENTS_RETURNED.observe(documents, tool_name)
+        return result
+
+    return wrapper
+
+
+def instrument_stream(tool_name: str, func: Callable[..., AsyncIterator[Any]]) -> Callable[..., AsyncIterator[Any]]:
+    """
+    Wrap a batch-streaming tool method like instrument_tool. Its db phase is
+    the time spent waiting for batches, not for the client to read them, and
+    the documents returned are counted across all batches.
+    """
+    if not METRICS_ENABLED:
+        return func
+    _known_tools.add(tool_name)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        # The stream is read after the request handler returns, so take its labels now
+        tracked = _current.get()
+        method = tracked.method if tracked else "tools/call"
+        try:
+            batches = func(*args, **kwargs)
+        except Exception:
+            TOOL_CALLS.inc(tool_name, "exception")
+            raise
+        return _instrumented_batches(tool_name, method, batches)
+
+    return wrapper
+
+
+async def _instrumented_batches(tool_name: str, method: str, batches: AsyncIterator[Any]) -> AsyncIterator[Any]:
+    iterator = batches.__aiter__()
+    documents = 0
+    fetching = 0.0
+    try:
+        while True:
+            start = time.perf_counter()
+            try:
+                batch = await iterator.__anext__()
+            except StopAsyncIteration:
+                break
+            except Exception:
+                TOOL_CALLS.inc(tool_name, "exception")
+                raise
+            finally:
+                fetching += time.perf_counter() - start
+            documents += len(batch)
+            yield batch
+    finally:
+        PHASE_SECONDS.observe(fetching, method, tool_name, "db")
+        aclose = getattr(iterator, "aclose", None)
+        if aclose is not None:
+            await aclose()
+    TOOL_CALLS.inc(tool_name, "ok")
+    DOCUMENTS_RETURNED.observe(documents, tool_name)
+
+
+def render(gauges: Optional[Dict[str, Dict[str, Any]]] = None) -> str:
+    """
+    Render every collector in the text exposition format. `gauges` adds
+    values read from pool and cache stats: {metric_name: {help, value}},
+    with "type": "counter" for totals that only ever increase.
+    """
+    lines = []
+    for collector in COLLECTORS:
+        lines.append(f"# HELP {collector.name} {collector.help_text}")
+        lines.append(f"# TYPE {collector.name} {collector.kind}")
+        lines.extend(collector.samples())
+    for name, gauge in (gauges or {}).items():
+        lines.append(f"# HELP {name} {gauge['help']}")
+        lines.append(f"# TYPE {name} {gauge.get('type', 'gauge')}")
+        lines.append(f"{name} {_format_value(gauge['value'])}")
+    return "\n".join(lines) + "\n"
@@ -1,22 +1,251 @@
+import asyncio
+import functools
+import inspect
 import json
-from typing import Any, Dict
-from motor.motor_asyncio import AsyncIOMotorClient
-from pymongo.errors import PyMongoError
-import bson
+import logging
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional
 from datetime import datetime
+import bson_codec
+from client_config import MongoClientConfig, PoolStats
+from result_cache import ResultCache
+from query_shapes import QueryShapeTracker, covers
+from query_parser import FilterParser, coerce_ids, loads_extended
+from single_flight import SingleFlight
+from write_combiner import WriteCombiner
+import pagination
+import bulk_writes
+import pipeline_analysis
+
+logger = logging.getLogger("mcp.mongodb")
+
+# motor/pymongo take over 100 ms to import, so they are loaded on first
+# database use: serverless cold starts that only answer initialize or
+# tools/list never pay for them. _load_driver() swaps these names for the
+# real driver classes before any database operation can raise.
+AsyncIOMotorClient = None
+
+class PyMongoError(Exception):
+    """Placeholder for pymongo.errors.PyMongoError until the driver is loaded"""
+
+def _load_driver() -> float:
+    """Import motor/pymongo into this module; returns the time taken in ms"""
+    global AsyncIOMotorClient, PyMongoError
+    if AsyncIOMotorClient is not None:
+        return 0.0
+    start = time.perf_counter()
+    from motor.motor_asyncio import AsyncIOMotorClient as motor_client
+    from pymongo.errors import PyMongoError as pymongo_error
+    AsyncIOMotorClient, PyMongoError = motor_client, pymongo_error
+    return (time.perf_counter() - start) * 1000
+
+def _json_string_tool(structured):
+    """Build the original JSON-string-returning tool from its *_structured method"""
+    @functools.wraps(structured)
+    async def tool(self, *args, **kwargs) -> str:
+        return bson_codec.dumps(await structured(self, *args, **kwargs))
+    tool.__name__ = structured.__name__[:-len("_structured")]
+    tool.__qualname__ = structured.__qualname__[:-len("_structured")]
+    tool.__signature__ = inspect.signature(structured).replace(return_annotation=str)
+    return tool
 
 class MongoDBClient:
     """
     A client class for interacting with MongoDB database.
     This class manages the connection and provides database operation tools.
+
+    Each tool is implemented as a *_structured method returning a dict whose
+    documents keep their BSON values; the plain-named methods return the same
+    result serialized to a JSON string.
     """
 
-    def __init__(self, connection_string: str, database_name: str):
-        """Initialize the MongoDB client with connection parameters"""
+    def __init__(self, connection_string: str, database_name: str,
+                 config: Optional[MongoClientConfig] = None,
+                 result_cache: Optional[ResultCache] = None,
+                 count_cache: Optional[ResultCache] = None,
+                 shape_tracker: Optional[QueryShapeTracker] = None,
+                 filter_parser: Optional[FilterParser] = None,
+                 pool_owner: Optional["MongoDBClient"] = None,
+                 single_flight: Optional[SingleFlight] = None,
+                 write_combiner: Optional[WriteCombiner] = None):
+        """
+        Initialize the MongoDB client with connection parameters.
+        
+        Args:
+            connection_string: MongoDB connection URI
+            database_name: Name of the database the tools operate on
+            config: Pool, compression, timeout and read preference settings
+                    (default: MongoClientConfig.from_env())
+            result_cache: Cache for find/count/aggregate results
+                          (default: ResultCache.from_env(), disabled unless configured)
+            count_cache: Short-TTL cache for count_documents results
+                         (default: ResultCache.counts_from_env())
+            shape_tracker: Query shape statistics behind suggest_indexes
+                           (default: QueryShapeTracker.from_env())
+            filter_parser: Extended JSON parser and cache for queries and pipelines
+                           (default: FilterParser.from_env())
+            pool_owner: Client whose Motor client (and connection pool) this one
+                        uses for its own database, instead of creating one
+            single_flight: Coalescing of identical concurrent reads
+                           (default: SingleFlight.from_env())
+            write_combiner: Batching of concurrent insert_document calls
+                            (default: WriteCombiner.from_env(), disabled unless configured)
+        """
         self.connection_string = connection_string
         self.database_name = database_name
+        self.config = config or MongoClientConfig.from_env()
+        self.result_cache = result_cache or ResultCache.from_env()
+        self.count_cache = count_cache or ResultCache.counts_from_env()
+        self.shape_tracker = shape_tracker or QueryShapeTracker.from_env()
+        self.filters = filter_parser or FilterParser.from_env()
+        self.pool_owner = pool_owner
+        self.flights = single_flight or SingleFlight.from_env()
+        self.write_combiner = write_combiner or WriteCombiner.from_env()
         self.client = None
-        self.db = None
+        self._db = None
+        self._read_db = None
+        self._loop = None
+        self._pool_stats = PoolStats()
+        # Cold-start cost of the most recent client creation, in milliseconds
+        self.connect_timings: Dict[str, float] = {}
+
+    @property
+    def db(self):
+        """
+        Database handle, creating the Motor client on first use.
+
+        The client is reused for as long as the event loop it was created on
+        is running (warm serverless invocations); if the loop has changed it
+        is rebuilt, since Motor clients are bound to their loop.
+        """
+        if self.pool_owner is not None:
+            # Follow the owner's client, which is rebuilt when the event loop changes
+            client = self.pool_owner.db.client
+            if self._db is None or self._db.client is not client:
+                self._db = client[self.database_name]
+                self._read_db = None
+            return self._db
+        if self._db is None or self._loop_changed():
+            self._create_client()
+        return self._db
+
+    @db.setter
+    def db(self, value):
+        self._db = value
+        self._read_db = None
+
+    @property
+    def read_db(self):
+        """Database handle for the read-only tools, using the configured read preference"""
+        db = self.db
+        if self._read_db is None:
+            if self.config.read_preference == "primary":
+                self._read_db = db
+            else:
+                self._read_db = db.client.get_database(
+                    self.database_name, read_preference=self.config.make_read_preference()
+                )
+        return self._read_db
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """
+        Result cache hit/miss counters and size; the count and filter caches'
+        and read coalescing's are under 'counts', 'filters' and 'single_flight'
+        """
+        return {
+            **self.result_cache.stats(),
+            "counts": self.count_cache.stats(),
+            "filters": self.filters.stats(),
+            "single_flight": self.flights.stats(),
+        }
+
+    def _invalidate(self, collection_name: Optional[str] = None) -> None:
+        """Drop cached and in-flight reads of a collection (or of every collection) after a write"""
+        # Invalidating moves the cache generations on, so the reads detached
+        # below cannot put their pre-write results back into the caches
+        self.result_cache.invalidate(collection_name)
+        self.count_cache.invalidate(collection_name)
+        self.flights.forget(collection_name)
+
+    def write_stats(self) -> Dict[str, Any]:
+        """insert_document batching counters"""
+        return self.write_combiner.stats()
+
+    def shape_stats(self) -> Dict[str, Any]:
+        """Query shape tracker counters and the tracked shapes, slowest first"""
+        return {**self.shape_tracker.stats(), "top_shapes": self.shape_tracker.shapes()[:20]}
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """Connection pool usage since the current client was created, with its sizing settings"""
+        pool_options = getattr(getattr(self.client, "options", None), "pool_options", None)
+        return {
+            "max_pool_size": getattr(pool_options, "max_pool_size", self.config.max_pool_size),
+            "min_pool_size": getattr(pool_options, "min_pool_size", self.config.min_pool_size),
+            "read_preference": self.config.read_preference,
+            "compressors": list(self.config.compressors),
+            **self._pool_stats.snapshot(),
+        }
+
+    def _loop_changed(self) -> bool:
+        if self._loop is None:
+            return False
+        try:
+            return asyncio.get_running_loop() is not self._loop
+        except RuntimeError:
+            return False
+
+    def _create_client(self, background_ping: bool = True) -> None:
+        """Build the Motor client without any network round trip"""
+        if self.client is not None:
+            self.client.close()
+        driver_import_ms = _load_driver()
+        start = time.perf_counter()
+        self._pool_stats = PoolStats()
+        self.client = AsyncIOMotorClient(
+            self.connection_string,
+            event_listeners=[self._pool_stats.make_listener()],
+            **self.config.client_kwargs(),
+        )
+        self._db = self.client[self.database_name]
+        self._read_db = None
+        self.connect_timings = {
+            "driver_import_ms": round(driver_import_ms, 3),
+            "client_init_ms": round((time.perf_counter() - start) * 1000, 3),
+        }
+        try:
+            self._loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._loop = None
+            return
+        if background_ping:
+            # Check connectivity off the request path; failures are only logged
+            self._loop.create_task(self._background_ping())
+
+    async def _background_ping(self) -> None:
+        try:
+            await self.ping()
+        except Exception as e:
+            logger.warning(f"MongoDB ping failed: {e}")
+
+    async def ping(self) -> float:
+        """Round-trip a ping to the server; returns the latency in ms"""
+        start = time.perf_counter()
+        await self.db.client.admin.command('ping')
+        elapsed = (time.perf_counter() - start) * 1000
+        self.connect_timings["ping_ms"] = round(elapsed, 3)
+        return elapsed
+
+    async def warm(self, connections: int) -> float:
+        """
+        Open up to `connections` pooled connections before traffic arrives by
+        running that many pings at once; returns the elapsed time in ms
+        """
+        start = time.perf_counter()
+        admin = self.db.client.admin
+        await asyncio.gather(*(admin.command('ping') for _ in range(max(1, connections))))
+        elapsed = (time.perf_counter() - start) * 1000
+        self.connect_timings["warm_ms"] = round(elapsed, 3)
+        return elapsed
 
     async def __aenter__(self):
         """Async context manager entry"""
@@ -28,99 +257,226 @@ class MongoDBClient:
         if self.client:
             self.client.close()
 
-    async def connect(self):
-        """Establishes connection to MongoDB"""
+    async def connect(self, ping: bool = True):
+        """
+        Establishes connection to MongoDB.
+        
+        Args:
+            ping: Wait for a ping round trip to verify the connection (default: True).
+                  With False the client is created and checked in the background.
+        """
         try:
-            self.client = AsyncIOMotorClient(self.connection_string)
-            self.db = self.client[self.database_name]
-            # Test the connection
-            await self.client.admin.command('ping')
-            print(f"Successfully connected to MongoDB database: {self.database_name}")
+            if self.client is None or self._loop_changed():
+                self._create_client(background_ping=not ping)
+            if ping:
+                # Test the connection
+                await self.ping()
+            logger.info(f"Successfully connected to MongoDB database: {self.database_name}")
         except Exception as e:
             raise RuntimeError(f"Failed to connect to MongoDB: {e}")
 
-    async def list_collections(self) -> str:
+    async def list_collections_structured(self) -> Dict[str, Any]:
         """List all collections in the database"""
         try:
-            collections = await self.db.list_collection_names()
-            return json.dumps({"collections": collections})
+            return await self.flights.do(("list_collections",), None, self._list_collections)
         except PyMongoError as e:
-            return json.dumps({"error": f"Failed to list collections: {e}"})
+            return {"error": f"Failed to list collections: {e}"}
+
+    async def _list_collections(self) -> Dict[str, Any]:
+        return {"collections": await self.read_db.list_collection_names()}
 
-    async def find_documents(self, collection_name: str, query: str = "{}", limit: int = 10) -> str:
+    async def find_documents_structured(self, collection_name: str, query: str = "{}", limit: int = 10,
+                                        projection: Optional[str] = None, sort: Optional[str] = None,
+                                        batch_size: Optional[int] = None,
+                                        cursor: Optional[str] = None,
+                                        max_time_ms: Optional[int] = None) -> Dict[str, Any]:
         """
         Find documents in a collection based on a query.
         
+        When sort or cursor is given the results are paginated by range: a full
+        page carries a next_cursor token, and passing it back (with the same
+        query and sort) returns the following page without using skip.
+        
         Args:
             collection_name: Name of the collection
             query: MongoDB query as JSON string (default: "{}")
             limit: Maximum number of documents to return (default: 10)
+            projection: Fields to return as JSON string, e.g. '{"name": 1}' (default: all)
+            sort: Sort order as JSON string, e.g. '{"visit_date": -1}' (default: natural order)
+            batch_size: Documents fetched per round trip to the server (default: driver's)
+            cursor: next_cursor token from the previous page
+            max_time_ms: Server-side time limit in milliseconds (default: MONGODB_MAX_TIME_MS, 0 for none)
         """
         try:
-            collection = self.db[collection_name]
-            query_dict = json.loads(query) if query else {}
+            collection = self.read_db[collection_name]
+            query_dict = self.filters.parse_filter(query)
+            projection_dict = json.loads(projection) if projection else None
+            cache_key = self.result_cache.make_key(
+                "find_documents", collection_name, query_dict, limit=limit,
+                projection=json.dumps(projection_dict, separators=(",", ":")), sort=sort or "", cursor=cursor or ""
+            )
+            cached = self.result_cache.get(cache_key)
+            if cached is not None:
+                return cached
             
-            # Handle ObjectId in queries
-            if '_id' in query_dict and isinstance(query_dict['_id'], str):
-                try:
-                    query_dict['_id'] = bson.ObjectId(query_dict['_id'])
-                except bson.errors.InvalidId:
-                    return json.dumps({"error": "Invalid ObjectId format"})
+            paginate = bool(sort or cursor)
+            find_filter = query_dict
+            added_fields: List[str] = []
+            if paginate:
+                sort_spec = pagination.parse_sort(sort)
+                query_fingerprint = pagination.fingerprint(query_dict, sort_spec)
+                if cursor:
+                    after = pagination.keyset_filter(sort_spec, pagination.decode_cursor(cursor, query_fingerprint))
+                    find_filter = {"$and": [query_dict, after]} if query_dict else after
+                projection_dict, added_fields = pagination.with_sort_fields(projection_dict, sort_spec)
+            time_limit = self._max_time_ms(max_time_ms)
+            generation = self.result_cache.generation(collection_name)
             
-            cursor = collection.find(query_dict).limit(limit)
-            documents = []
-            async for doc in cursor:
-                # Convert ObjectId to string for JSON serialization
-                if '_id' in doc:
-                    doc['_id'] = str(doc['_id'])
-                # Convert datetime objects to ISO format
-                for key, value in doc.items():
-                    if isinstance(value, datetime):
-                        doc[key] = value.isoformat()
-                documents.append(doc)
+            async def run_find() -> Dict[str, Any]:
+                find_cursor = collection.find(find_filter, projection_dict)
+                if paginate:
+                    find_cursor = find_cursor.sort(sort_spec)
+                # One extra document tells whether another page exists
+                find_cursor = find_cursor.limit(limit + 1 if paginate and limit > 0 else limit)
+                if batch_size:
+                    find_cursor = find_cursor.batch_size(batch_size)
+                if time_limit:
+                    find_cursor = find_cursor.max_time_ms(time_limit)
+                started = time.perf_counter()
+                documents = await self._collect(find_cursor)
+                self._track_query("find_documents", collection_name, query_dict, sort_spec if paginate else (), started)
+                
+                next_cursor = None
+                if paginate and limit > 0 and len(documents) > limit:
+                    documents = documents[:limit]
+                    next_cursor = pagination.encode_cursor(sort_spec, documents[-1], query_fingerprint)
+                pagination.strip_fields(documents, added_fields)
+                
+                result = {"documents": documents, "count": len(documents)}
+                if paginate:
+                    result["next_cursor"] = next_cursor
+                self.result_cache.put(cache_key, collection_name, result, generation)
+                return result
             
-            return json.dumps({"documents": documents, "count": len(documents)})
+            return await self.flights.do(cache_key + (time_limit,), collection_name, run_find)
         except json.JSONDecodeError:
-            return json.dumps({"error": "Invalid JSON query format"})
+            return {"error": "Invalid JSON format in query, projection or sort"}
+        except ValueError as e:
+            # Invalid sort specification or cursor token
+            return {"error": str(e)}
         except PyMongoError as e:
-            return json.dumps({"error": f"Database error: {e}"})
+            return {"error": f"Database error: {e}"}
         except Exception as e:
-            return json.dumps({"error": f"Unexpected error: {e}"})
+            return {"error": f"Unexpected error: {e}"}
 
-    async def insert_document(self, collection_name: str, document: str) -> str:
+    async def insert_document_structured(self, collection_name: str, document: str) -> Dict[str, Any]:
         """
         Insert a document into a collection.
         
+        With the write combiner enabled, concurrent inserts into the same
+        collection go to the server together as one insert_many.
+        
         Args:
             collection_name: Name of the collection
             document: Document to insert as JSON string
         """
         try:
             collection = self.db[collection_name]
-            doc_dict = json.loads(document)
-            
-            # Handle datetime fields
-            for key, value in doc_dict.items():
-                if isinstance(value, str) and value.endswith('Z'):
-                    try:
-                        doc_dict[key] = datetime.fromisoformat(value.replace('Z', '+00:00'))
-                    except ValueError:
-                        pass  # Keep as string if not a valid datetime
+            doc_dict = self._convert_datetimes(loads_extended(document))
             
-            result = await collection.insert_one(doc_dict)
-            return json.dumps({
+            try:
+                if self.write_combiner.enabled:
+                    inserted_id = await self.write_combiner.insert(collection_name, collection, doc_dict)
+                else:
+                    inserted_id = (await collection.insert_one(doc_dict)).inserted_id
+            finally:
+                self._invalidate(collection_name)
+            return {
                 "success": True,
-                "inserted_id": str(result.inserted_id),
+                "inserted_id": str(inserted_id),
                 "message": "Document inserted successfully"
-            })
+            }
         except json.JSONDecodeError:
-            return json.dumps({"error": "Invalid JSON document format"})
+            return {"error": "Invalid JSON document format"}
         except PyMongoError as e:
-            return json.dumps({"error": f"Database error: {e}"})
+            return {"error": f"Database error: {e}"}
         except Exception as e:
-            return json.dumps({"error": f"Unexpected error: {e}"})
+            return {"error": f"Unexpected error: {e}"}
 
-    async def update_documents(self, collection_name: str, query: str, update: str) -> str:
+    async def insert_documents_structured(self, collection_name: str, documents: str, ordered: bool = True,
+                                          chunk_size: int = bulk_writes.DEFAULT_CHUNK_SIZE) -> Dict[str, Any]:
+        """
+        Insert many documents, split into chunks below the server's message size limit.
+        
+        Args:
+            collection_name: Name of the collection
+            documents: Documents as a JSON array or NDJSON (one per line)
+            ordered: Stop at the first error (default: True); False runs chunks concurrently
+            chunk_size: Maximum documents per chunk (default: 1000)
+        """
+        try:
+            from pymongo import InsertOne
+            
+            records = bulk_writes.parse_records(documents)
+            if not all(isinstance(record, dict) for record in records):
+                return {"error": "Every document must be a JSON object"}
+            operations = [InsertOne(self._convert_datetimes(record)) for record in records]
+            sizes = [bulk_writes.encoded_size(record) for record in records]
+            try:
+                return await bulk_writes.execute_chunks(
+                    self.db[collection_name], operations, sizes, ordered=ordered, chunk_size=chunk_size
+                )
+            finally:
+                self._invalidate(collection_name)
+        except ValueError as e:
+            return {"error": str(e)}
+        except PyMongoError as e:
+            return {"error": f"Database error: {e}"}
+        except Exception as e:
+            return {"error": f"Unexpected error: {e}"}
+
+    async def bulk_write_structured(self, collection_name: str, operations: str, ordered: bool = True,
+                                    chunk_size: int = bulk_writes.DEFAULT_CHUNK_SIZE) -> Dict[str, Any]:
+        """
+        Run a batch of write operations, split into chunks below the server's message size limit.
+        
+        Args:
+            collection_name: Name of the collection
+            operations: Shell-style operations ({"insertOne": {"document": ...}},
+                        {"updateOne": {"filter": ..., "update": ..., "upsert": false}},
+                        updateMany, replaceOne, deleteOne, deleteMany) as a JSON array or NDJSON
+            ordered: Stop at the first error (default: True); False runs chunks concurrently
+            chunk_size: Maximum operations per chunk (default: 1000)
+        """
+        try:
+            specs = bulk_writes.parse_records(operations)
+            models = []
+            sizes = []
+            for spec in specs:
+                for args in spec.values() if isinstance(spec, dict) else ():
+                    if isinstance(args, dict):
+                        # Same conversions as the single-document tools
+                        for key in ("document", "replacement"):
+                            if isinstance(args.get(key), dict):
+                                self._convert_datetimes(args[key])
+                        if isinstance(args.get("filter"), dict):
+                            coerce_ids(args["filter"])
+                models.append(bulk_writes.build_operation(spec))
+                sizes.append(bulk_writes.operation_size(spec))
+            try:
+                return await bulk_writes.execute_chunks(
+                    self.db[collection_name], models, sizes, ordered=ordered, chunk_size=chunk_size
+                )
+            finally:
+                self._invalidate(collection_name)
+        except ValueError as e:
+            return {"error": str(e)}
+        except PyMongoError as e:
+            return {"error": f"Database error: {e}"}
+        except Exception as e:
+            return {"error": f"Unexpected error: {e}"}
+
+    async def update_documents_structured(self, collection_name: str, query: str, update: str) -> Dict[str, Any]:
         """
         Update documents in a collection.
         
@@ -131,31 +487,31 @@ class MongoDBClient:
         """
         try:
             collection = self.db[collection_name]
-            query_dict = json.loads(query)
-            update_dict = json.loads(update)
+            query_dict = self.filters.parse_filter(query, allow_empty=False)
+            update_dict = loads_extended(update)
             
-            # Handle ObjectId in queries
-            if '_id' in query_dict and isinstance(query_dict['_id'], str):
-                try:
-                    query_dict['_id'] = bson.ObjectId(query_dict['_id'])
-                except bson.errors.InvalidId:
-                    return json.dumps({"error": "Invalid ObjectId format"})
-            
-            result = await collection.update_many(query_dict, update_dict)
-            return json.dumps({
+            started = time.perf_counter()
+            try:
+                result = await collection.update_many(query_dict, update_dict)
+            finally:
+                self._invalidate(collection_name)
+            self._track_query("update_documents", collection_name, query_dict, (), started)
+            return {
                 "success": True,
                 "matched_count": result.matched_count,
                 "modified_count": result.modified_count,
                 "message": f"Updated {result.modified_count} documents"
-            })
+            }
         except json.JSONDecodeError:
-            return json.dumps({"error": "Invalid JSON format in query or update"})
+            return {"error": "Invalid JSON format in query or update"}
+        except ValueError as e:
+            return {"error": str(e)}
         except PyMongoError as e:
-            return json.dumps({"error": f"Database error: {e}"})
+            return {"error": f"Database error: {e}"}
         except Exception as e:
-            return json.dumps({"error": f"Unexpected error: {e}"})
+            return {"error": f"Unexpected error: {e}"}
 
-    async def delete_documents(self, collection_name: str, query: str) -> str:
+    async def delete_documents_structured(self, collection_name: str, query: str) -> Dict[str, Any]:
         """
         Delete documents from a collection.
         
@@ -165,90 +521,358 @@ class MongoDBClient:
         """
         try:
             collection = self.db[collection_name]
-            query_dict = json.loads(query)
-            
-            # Handle ObjectId in queries
-            if '_id' in query_dict and isinstance(query_dict['_id'], str):
-                try:
-                    query_dict['_id'] = bson.ObjectId(query_dict['_id'])
-                except bson.errors.InvalidId:
-                    return json.dumps({"error": "Invalid ObjectId format"})
+            query_dict = self.filters.parse_filter(query, allow_empty=False)
             
-            result = await collection.delete_many(query_dict)
-            return json.dumps({
+            started = time.perf_counter()
+            try:
+                result = await collection.delete_many(query_dict)
+            finally:
+                self._invalidate(collection_name)
+            self._track_query("delete_documents", collection_name, query_dict, (), started)
+            return {
                 "success": True,
                 "deleted_count": result.deleted_count,
                 "message": f"Deleted {result.deleted_count} documents"
-            })
+            }
         except json.JSONDecodeError:
-            return json.dumps({"error": "Invalid JSON query format"})
+            return {"error": "Invalid JSON query format"}
+        except ValueError as e:
+            return {"error": str(e)}
         except PyMongoError as e:
-            return json.dumps({"error": f"Database error: {e}"})
+            return {"error": f"Database error: {e}"}
         except Exception as e:
-            return json.dumps({"error": f"Unexpected error: {e}"})
+            return {"error": f"Unexpected error: {e}"}
 
-    async def count_documents(self, collection_name: str, query: str = "{}") -> str:
+    async def count_documents_structured(self, collection_name: str, query: str = "{}",
+                                         exact: bool = True, max_time_ms: Optional[int] = None) -> Dict[str, Any]:
         """
         Count documents in a collection based on a query.
         
+        With exact=False and an empty query the count comes from collection
+        metadata (estimated_document_count) instead of scanning the collection;
+        it can be off after unclean shutdowns or during chunk migrations.
+        Filtered counts are always exact. Recent counts are answered from a
+        short-TTL cache that writes through this client invalidate.
+        
         Args:
             collection_name: Name of the collection
             query: MongoDB query as JSON string (default: "{}")
+            exact: Require an exact count for an empty query (default: True)
+            max_time_ms: Server-side time limit in milliseconds (default: MONGODB_MAX_TIME_MS, 0 for none)
         """
         try:
-            collection = self.db[collection_name]
-            query_dict = json.loads(query) if query else {}
+            collection = self.read_db[collection_name]
+            query_dict = self.filters.parse_filter(query)
+            estimated = not exact and not query_dict
+            time_limit = self._time_limit_option(max_time_ms)
+            cache_key = self.result_cache.make_key("count_documents", collection_name, query_dict, estimated=estimated)
+            cached = self.result_cache.get(cache_key) or self.count_cache.get(cache_key)
+            if cached is not None:
+                return cached
+            # A write finishing while the count runs makes the result unfit for either cache
+            generation = self.result_cache.generation(collection_name)
+            count_generation = self.count_cache.generation(collection_name)
             
-            # Handle ObjectId in queries
-            if '_id' in query_dict and isinstance(query_dict['_id'], str):
-                try:
-                    query_dict['_id'] = bson.ObjectId(query_dict['_id'])
-                except bson.errors.InvalidId:
-                    return json.dumps({"error": "Invalid ObjectId format"})
+            async def run_count() -> Dict[str, Any]:
+                if estimated:
+                    result = {"count": await collection.estimated_document_count(**time_limit), "exact": False}
+                    self.count_cache.put(cache_key, collection_name, result, count_generation)
+                    return result
+                
+                started = time.perf_counter()
+                count = await collection.count_documents(query_dict, **time_limit)
+                self._track_query("count_documents", collection_name, query_dict, (), started)
+                result = {"count": count, "exact": True}
+                self.result_cache.put(cache_key, collection_name, result, generation)
+                self.count_cache.put(cache_key, collection_name, result, count_generation)
+                return result
             
-            count = await collection.count_documents(query_dict)
-            return json.dumps({"count": count})
+            return await self.flights.do(cache_key + (time_limit.get("maxTimeMS"),), collection_name, run_count)
         except json.JSONDecodeError:
-            return json.dumps({"error": "Invalid JSON query format"})
+            return {"error": "Invalid JSON query format"}
+        except ValueError as e:
+            return {"error": str(e)}
         except PyMongoError as e:
-            return json.dumps({"error": f"Database error: {e}"})
+            return {"error": f"Database error: {e}"}
         except Exception as e:
-            return json.dumps({"error": f"Unexpected error: {e}"})
+            return {"error": f"Unexpected error: {e}"}
 
-    async def aggregate(self, collection_name: str, pipeline: str) -> str:
+    async def aggregate_structured(self, collection_name: str, pipeline: str,
+                                   max_time_ms: Optional[int] = None, max_results: Optional[int] = None,
+                                   allow_disk_use: Optional[bool] = None, batch_size: Optional[int] = None,
+                                   max_bytes: Optional[int] = None) -> Dict[str, Any]:
         """
         Perform aggregation operations on a collection.
         
+        Results are read until their encoded size reaches max_bytes; the rest
+        of the cursor is then dropped and the result is marked truncated.
+        
         Args:
             collection_name: Name of the collection
             pipeline: Aggregation pipeline as JSON string
+            max_time_ms: Server-side time limit in milliseconds (default: MONGODB_MAX_TIME_MS, 0 for none)
+            max_results: Maximum number of results; adds or tightens a $limit stage (default: no limit)
+            allow_disk_use: Let blocking stages such as $sort and $group spill to disk (default: server's)
+            batch_size: Documents fetched per round trip to the server (default: driver's)
+            max_bytes: Byte budget for the results (default: MCP_AGGREGATE_MAX_BYTES)
         """
         try:
-            collection = self.db[collection_name]
-            pipeline_list = json.loads(pipeline)
+            pipeline_list = self.filters.parse_pipeline(pipeline)
+            options = self._aggregate_options(max_time_ms, allow_disk_use, batch_size)
+            
+            if self._writes_output(pipeline_list):
+                # $out/$merge write to another collection: never cached, and
+                # cached reads of the target may now be stale
+                try:
+                    results = await self._collect(self.db[collection_name].aggregate(pipeline_list, **options))
+                finally:
+                    self._invalidate()
+                return {"results": results, "count": len(results)}
+            
+            limit_action = None
+            if max_results is not None:
+                if max_results <= 0:
+                    return {"error": "max_results must be a positive integer"}
+                pipeline_list, limit_action = pipeline_analysis.limit_pipeline(pipeline_list, max_results)
+            budget = min(max_bytes, pipeline_analysis.AGGREGATE_MAX_BYTES) if max_bytes \
+                else pipeline_analysis.AGGREGATE_MAX_BYTES
             
-            if not isinstance(pipeline_list, list):
-                return json.dumps({"error": "Pipeline must be a list of aggregation stages"})
+            cache_key = self.result_cache.make_key("aggregate", collection_name, pipeline_list, max_bytes=budget)
+            cached = self.result_cache.get(cache_key)
+            if cached is not None:
+                return cached
+            generation = self.result_cache.generation(collection_name)
             
-            cursor = collection.aggregate(pipeline_list)
-            results = []
-            async for doc in cursor:
-                # Convert ObjectId to string for JSON serialization
-                if '_id' in doc:
-                    doc['_id'] = str(doc['_id'])
-                # Convert datetime objects to ISO format
-                for key, value in doc.items():
-                    if isinstance(value, datetime):
-                        doc[key] = value.isoformat()
-                results.append(doc)
+            async def run_aggregate() -> Dict[str, Any]:
+                cursor = self.read_db[collection_name].aggregate(pipeline_list, **options)
+                results, truncated = await pipeline_analysis.collect_within_budget(cursor, budget)
+                
+                result = {"results": results, "count": len(results)}
+                if limit_action:
+                    result["limit"] = {"max_results": max_results, "action": limit_action}
+                if truncated:
+                    # Marker for callers: narrow the pipeline or page through it
+                    result["truncated"] = True
+                    result["truncated_reason"] = f"results exceeded the {budget} byte budget"
+                self.result_cache.put(cache_key, collection_name, result, generation)
+                return result
             
-            return json.dumps({"results": results, "count": len(results)})
+            flight_key = cache_key + (options.get("maxTimeMS"), options.get("allowDiskUse"))
+            return await self.flights.do(flight_key, collection_name, run_aggregate)
         except json.JSONDecodeError:
-            return json.dumps({"error": "Invalid JSON pipeline format"})
+            return {"error": "Invalid JSON pipeline format"}
+        except ValueError as e:
+            return {"error": str(e)}
         except PyMongoError as e:
-            return json.dumps({"error": f"Database error: {e}"})
+            return {"error": f"Database error: {e}"}
         except Exception as e:
-            return json.dumps({"error": f"Unexpected error: {e}"})
+            return {"error": f"Unexpected error: {e}"}
+
+    # JSON-string API kept for existing callers
+    list_collections = _json_string_tool(list_collections_structured)
+    find_documents = _json_string_tool(find_documents_structured)
+    insert_document = _json_string_tool(insert_document_structured)
+    update_documents = _json_string_tool(update_documents_structured)
+    delete_documents = _json_string_tool(delete_documents_structured)
+    count_documents = _json_string_tool(count_documents_structured)
+    aggregate = _json_string_tool(aggregate_structured)
+    insert_documents = _json_string_tool(insert_documents_structured)
+    bulk_write = _json_string_tool(bulk_write_structured)
+
+    async def suggest_indexes_structured(self, collection_name: Optional[str] = None, limit: int = 5,
+                                         create: bool = False) -> Dict[str, Any]:
+        """
+        Rank candidate compound indexes for the query shapes seen so far.
+        
+        Args:
+            collection_name: Only suggest indexes for this collection (default: all)
+            limit: Maximum number of suggestions (default: 5)
+            create: Create the suggested indexes (default: False)
+        """
+        try:
+            candidates = self.shape_tracker.candidates(collection_name)
+            existing: Dict[str, List[Any]] = {}
+            for name in {candidate["collection"] for candidate in candidates}:
+                info = await self.db[name].index_information()
+                existing[name] = [spec["key"] for spec in info.values()]
+            suggestions = [
+                candidate for candidate in candidates
+                if not any(covers(keys, candidate["keys"]) for keys in existing[candidate["collection"]])
+            ][:limit]
+            
+            created = []
+            if create:
+                for suggestion in suggestions:
+                    index_name = await self.db[suggestion["collection"]].create_index(list(suggestion["keys"]))
+                    created.append({"collection": suggestion["collection"], "name": index_name})
+            return {
+                "suggestions": [
+                    {
+                        "collection": s["collection"],
+                        "keys": dict(s["keys"]),
+                        "score": round(s["score"], 3),
+                        "calls": s["calls"],
+                        "total_ms": round(s["total_ms"], 3),
+                        "collscan": s["collscan"],
+                        "shapes": s["shapes"],
+                    }
+                    for s in suggestions
+                ],
+                "created": created,
+                "shapes_tracked": self.shape_tracker.stats()["shapes"],
+            }
+        except PyMongoError as e:
+            return {"error": f"Database error: {e}"}
+        except Exception as e:
+            return {"error": f"Unexpected error: {e}"}
+
+    suggest_indexes = _json_string_tool(suggest_indexes_structured)
+
+    def _track_query(self, tool: str, collection_name: str, query_dict: Dict[str, Any],
+                     sort_spec, started: float) -> None:
+        """Record an executed filter's shape and latency for suggest_indexes"""
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.shape_tracker.record(tool, collection_name, query_dict, sort_spec, elapsed_ms, db=self.read_db)
+
+    @staticmethod
+    def _convert_datetimes(doc: Dict[str, Any]) -> Dict[str, Any]:
+        """Turn top-level ISO strings ending in 'Z' into datetimes, in place"""
+        for key, value in doc.items():
+            if isinstance(value, str) and value.endswith('Z'):
+                try:
+                    doc[key] = datetime.fromisoformat(value.replace('Z', '+00:00'))
+                except ValueError:
+                    pass  # Keep as string if not a valid datetime
+        return doc
+
+    async def stream_find_documents(self, collection_name: str, query: str = "{}", limit: int = 10,
+                                    batch_size: int = 100, projection: Optional[str] = None,
+                                    sort: Optional[str] = None, cursor: Optional[str] = None,
+                                    max_time_ms: Optional[int] = None) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Stream documents matching a query in batches, as the cursor yields them.
+        
+        With a next_cursor token from find_documents (and the same query and
+        sort) the stream starts right after that page.
+        
+        Args:
+            collection_name: Name of the collection
+            query: MongoDB query as JSON string (default: "{}")
+            limit: Maximum number of documents to return, 0 for no limit (default: 10)
+            batch_size: Number of documents per yielded batch (default: 100)
+            projection: Fields to return as JSON string (default: all)
+            sort: Sort order as JSON string (default: natural order)
+            cursor: next_cursor token of the find_documents page to continue after
+            max_time_ms: Server-side time limit in milliseconds (default: MONGODB_MAX_TIME_MS, 0 for none)
+        
+        Raises:
+            ValueError: If the query, projection, sort or cursor is invalid, or has an invalid ObjectId
+        """
+        try:
+            query_dict = self.filters.parse_filter(query)
+            projection_dict = json.loads(projection) if projection else None
+            sort_spec = pagination.parse_sort(sort) if sort or cursor else None
+        except json.JSONDecodeError:
+            raise ValueError("Invalid JSON format in query, projection or sort")
+        find_filter = query_dict
+        if cursor:
+            query_fingerprint = pagination.fingerprint(query_dict, sort_spec)
+            after = pagination.keyset_filter(sort_spec, pagination.decode_cursor(cursor, query_fingerprint))
+            find_filter = {"$and": [query_dict, after]} if query_dict else after
+        
+        find_cursor = self.read_db[collection_name].find(find_filter, projection_dict)
+        if sort_spec:
+            find_cursor = find_cursor.sort(sort_spec)
+        find_cursor = find_cursor.limit(limit).batch_size(batch_size)
+        time_limit = self._max_time_ms(max_time_ms)
+        if time_limit:
+            find_cursor = find_cursor.max_time_ms(time_limit)
+        async for batch in self._iterate_batches(find_cursor, batch_size):
+            yield batch
+
+    async def stream_aggregate(self, collection_name: str, pipeline: str, batch_size: int = 100,
+                               max_time_ms: Optional[int] = None, max_results: Optional[int] = None,
+                               allow_disk_use: Optional[bool] = None,
+                               max_bytes: Optional[int] = None) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Stream aggregation results in batches, as the cursor yields them.
+        Streams hold one batch at a time, so max_bytes is accepted but not applied.
+        
+        Args:
+            collection_name: Name of the collection
+            pipeline: Aggregation pipeline as JSON string
+            batch_size: Number of documents per yielded batch (default: 100)
+            max_time_ms: Server-side time limit in milliseconds (default: MONGODB_MAX_TIME_MS, 0 for none)
+            max_results: Maximum number of results; adds or tightens a $limit stage (default: no limit)
+            allow_disk_use: Let blocking stages spill to disk (default: server's)
+            max_bytes: Ignored when streaming
+        
+        Raises:
+            ValueError: If the pipeline is not valid JSON or not a list of stages
+        """
+        try:
+            pipeline_list = self.filters.parse_pipeline(pipeline)
+        except json.JSONDecodeError:
+            raise ValueError("Invalid JSON pipeline format")
+        if max_results is not None and not self._writes_output(pipeline_list):
+            if max_results <= 0:
+                raise ValueError("max_results must be a positive integer")
+            pipeline_list, _ = pipeline_analysis.limit_pipeline(pipeline_list, max_results)
+        
+        options = self._aggregate_options(max_time_ms, allow_disk_use, batch_size)
+        cursor = self._aggregation_db(pipeline_list)[collection_name].aggregate(pipeline_list, **options)
+        async for batch in self._iterate_batches(cursor, batch_size):
+            yield batch
+
+    @staticmethod
+    def _writes_output(pipeline_list: List[Any]) -> bool:
+        """Whether a pipeline writes its output with $out or $merge"""
+        return any(isinstance(stage, dict) and ("$out" in stage or "$merge" in stage)
+                   for stage in pipeline_list)
+
+    def _aggregation_db(self, pipeline_list: List[Any]):
+        """Pipelines that write ($out/$merge) must run on the primary; others are reads"""
+        return self.db if self._writes_output(pipeline_list) else self.read_db
+
+    def _max_time_ms(self, max_time_ms: Optional[int]) -> Optional[int]:
+        """Per-call time limit, falling back to the configured default; 0 means none"""
+        limit = max_time_ms if max_time_ms is not None else self.config.max_time_ms
+        return limit or None
+
+    def _time_limit_option(self, max_time_ms: Optional[int]) -> Dict[str, int]:
+        """maxTimeMS keyword argument for count and aggregate, empty when there is no limit"""
+        limit = self._max_time_ms(max_time_ms)
+        return {"maxTimeMS": limit} if limit else {}
+
+    def _aggregate_options(self, max_time_ms: Optional[int], allow_disk_use: Optional[bool],
+                           batch_size: Optional[int]) -> Dict[str, Any]:
+        """Keyword arguments for collection.aggregate(); unset options are left to the server"""
+        options: Dict[str, Any] = self._time_limit_option(max_time_ms)
+        if allow_disk_use is not None:
+            options["allowDiskUse"] = allow_disk_use
+        if batch_size:
+            options["batchSize"] = batch_size
+        return options
+
+    @staticmethod
+    async def _collect(cursor) -> List[Dict[str, Any]]:
+        """Read a cursor to the end, killing it on the server if the call is cancelled"""
+        try:
+            return [doc async for doc in cursor]
+        finally:
+            await cursor.close()
+
+    async def _iterate_batches(self, cursor, batch_size: int) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Yield raw documents from a cursor, batch_size at a time (serialize with bson_codec)"""
+        try:
+            while True:
+                batch = await cursor.to_list(length=batch_size)
+                if not batch:
+                    break
+                yield batch
+        finally:
+            # Release the server-side cursor if the consumer stops early
+            await cursor.close()
 
     def get_available_tools(self) -> Dict[str, Any]:
         """Return available MongoDB operations as tool definitions"""
@@ -256,6 +880,7 @@ class MongoDBClient:
             "list_collections": {
                 "name": "list_collections",
                 "callable": self.list_collections,
+                "structured_callable": self.list_collections_structured,
                 "schema": {
                     "type": "function",
                     "function": {
@@ -272,6 +897,8 @@ class MongoDBClient:
             "find_documents": {
     "name": "find_documents",
     "callable": self.find_documents,
+    "structured_callable": self.find_documents_structured,
+    "stream_callable": self.stream_find_documents,
     "schema": {
         "type": "function",
         "function": {
@@ -291,6 +918,26 @@ class MongoDBClient:
                     "limit": {
                         "type": "integer",
                         "description": "Maximum number of documents to return"
+                    },
+                    "projection": {
+                        "type": "string",
+                        "description": "Fields to return as a JSON string, e.g. {\"name\": 1, \"dob\": 1}"
+                    },
+                    "sort": {
+                        "type": "string",
+                        "description": "Sort order as a JSON string, e.g. {\"visit_date\": -1}. Enables next_cursor pagination"
+                    },
+                    "batch_size": {
+                        "type": "integer",
+                        "description": "Number of documents fetched per round trip to the database"
+                    },
+                    "cursor": {
+                        "type": "string",
+                        "description": "next_cursor value from the previous page, to fetch the following page"
+                    },
+                    "max_time_ms": {
+                        "type": "integer",
+                        "description": "Server-side time limit for the query in milliseconds (0 for no limit)"
                     }
                 },
                 "required": ["collection_name"]
@@ -302,6 +949,7 @@ class MongoDBClient:
             "insert_document": {
                 "name": "insert_document",
                 "callable": self.insert_document,
+                "structured_callable": self.insert_document_structured,
                 "schema": {
                     "type": "function",
                     "function": {
@@ -324,9 +972,78 @@ class MongoDBClient:
                     }
                 }
             },
+            "insert_documents": {
+                "name": "insert_documents",
+                "callable": self.insert_documents,
+                "structured_callable": self.insert_documents_structured,
+                "schema": {
+                    "type": "function",
+                    "function": {
+                        "name": "insert_documents",
+                        "description": "Insert many documents into a MongoDB collection in chunked batches",
+                        "parameters": {
+                            "type": "object",
+                            "properties": {
+                                "collection_name": {
+                                    "type": "string",
+                                    "description": "Name of the collection to write to"
+                                },
+                                "documents": {
+                                    "type": "string",
+                                    "description": "Documents to insert as a JSON array or as NDJSON (one document per line)"
+                                },
+                                "ordered": {
+                                    "type": "boolean",
+                                    "description": "Stop at the first error (true, default) or keep going and run chunks concurrently (false)"
+                                },
+                                "chunk_size": {
+                                    "type": "integer",
+                                    "description": "Maximum operations sent per chunk (default 1000)"
+                                }
+                            },
+                            "required": ["collection_name", "documents"]
+                        }
+                    }
+                }
+            },
+            "bulk_write": {
+                "name": "bulk_write",
+                "callable": self.bulk_write,
+                "structured_callable": self.bulk_write_structured,
+                "schema": {
+                    "type": "function",
+                    "function": {
+                        "name": "bulk_write",
+                        "description": "Run a batch of insertOne/updateOne/updateMany/replaceOne/deleteOne/deleteMany operations on a MongoDB collection",
+                        "parameters": {
+                            "type": "object",
+                            "properties": {
+                                "collection_name": {
+                                    "type": "string",
+                                    "description": "Name of the collection to write to"
+                                },
+                                "operations": {
+                                    "type": "string",
+                                    "description": "Operations as a JSON array or NDJSON, each shaped like {\"updateOne\": {\"filter\": {...}, \"update\": {...}}}"
+                                },
+                                "ordered": {
+                                    "type": "boolean",
+                                    "description": "Stop at the first error (true, default) or keep going and run chunks concurrently (false)"
+                                },
+                                "chunk_size": {
+                                    "type": "integer",
+                                    "description": "Maximum operations sent per chunk (default 1000)"
+                                }
+                            },
+                            "required": ["collection_name", "operations"]
+                        }
+                    }
+                }
+            },
             "update_documents": {
     "name": "update_documents",
     "callable": self.update_documents,
+    "structured_callable": self.update_documents_structured,
     "schema": {
         "type": "function",
         "function": {
@@ -357,6 +1074,7 @@ class MongoDBClient:
             "delete_documents": {
     "name": "delete_documents",
     "callable": self.delete_documents,
+    "structured_callable": self.delete_documents_structured,
     "schema": {
         "type": "function",
         "function": {
@@ -383,6 +1101,7 @@ class MongoDBClient:
             "count_documents": {
     "name": "count_documents",
     "callable": self.count_documents,
+    "structured_callable": self.count_documents_structured,
     "schema": {
         "type": "function",
         "function": {
@@ -398,6 +1117,14 @@ class MongoDBClient:
                     "query": {
                         "type": "string",
                         "description": "MongoDB query as a JSON string"
+                    },
+                    "exact": {
+                        "type": "boolean",
+                        "description": "Set to false to get a fast estimated count from collection metadata when the query is empty"
+                    },
+                    "max_time_ms": {
+                        "type": "integer",
+                        "description": "Server-side time limit for the count in milliseconds (0 for no limit)"
                     }
                 },
                 "required": ["collection_name"]
@@ -409,6 +1136,8 @@ class MongoDBClient:
             "aggregate": {
                 "name": "aggregate",
                 "callable": self.aggregate,
+                "structured_callable": self.aggregate_structured,
+                "stream_callable": self.stream_aggregate,
                 "schema": {
                     "type": "function",
                     "function": {
@@ -424,12 +1153,62 @@ class MongoDBClient:
                                 "pipeline": {
                                     "type": "STRING",
                                     "description": "Aggregation pipeline as JSON string (list of aggregation stages)"
+                                },
+                                "max_time_ms": {
+                                    "type": "INTEGER",
+                                    "description": "Server-side time limit for the pipeline in milliseconds (0 for no limit)"
+                                },
+                                "max_results": {
+                                    "type": "INTEGER",
+                                    "description": "Maximum number of results to return; a $limit stage is added or tightened to match"
+                                },
+                                "allow_disk_use": {
+                                    "type": "BOOLEAN",
+                                    "description": "Allow $sort/$group stages to spill to disk for large inputs"
+                                },
+                                "batch_size": {
+                                    "type": "INTEGER",
+                                    "description": "Number of results fetched per round trip to the database"
+                                },
+                                "max_bytes": {
+                                    "type": "INTEGER",
+                                    "description": "Byte budget for the results; output beyond it is dropped and the result is marked truncated"
                                 }
                             },
                             "required": ["collection_name", "pipeline"]
                         }
                     }
                 }
+            },
+            "suggest_indexes": {
+                "name": "suggest_indexes",
+                "callable": self.suggest_indexes,
+                "structured_callable": self.suggest_indexes_structured,
+                "schema": {
+                    "type": "function",
+                    "function": {
+                        "name": "suggest_indexes",
+                        "description": "Suggest compound indexes for the slowest and most frequent query shapes seen by this server, and optionally create them",
+                        "parameters": {
+                            "type": "object",
+                            "properties": {
+                                "collection_name": {
+                                    "type": "string",
+                                    "description": "Only suggest indexes for this collection"
+                                },
+                                "limit": {
+                                    "type": "integer",
+                                    "description": "Maximum number of suggestions (default 5)"
+                                },
+                                "create": {
+                                    "type": "boolean",
+                                    "description": "Create the suggested indexes (default false)"
+                                }
+                            },
+                            "required": []
+                        }
+                    }
+                }
             }
         }
 
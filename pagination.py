@@ -0,0 +1,205 @@
+"""
+Keyset (range-based) pagination for find_documents.
+
+Instead of skip(), each page ends with an opaque cursor token holding the
+sort key values of its last document. The next page adds a range filter
+that starts right after those values, so a deep page costs the same index
+scan as the first one. _id is always appended to the sort as a tiebreaker
+so the order is total.
+
+Documents missing a sort field sort as null, and values of different BSON
+types sort by type (null, numbers, strings, objects, ...). Range operators
+only match values of their operand's type, so the filter also selects the
+types that sort after the cursor's value. Array-valued sort fields are not
+supported.
+"""
+import base64
+import datetime
+import hashlib
+import json
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+import bson
+from bson import json_util
+from bson.decimal128 import Decimal128
+
+SortSpec = List[Tuple[str, int]]
+
+
+class CursorError(ValueError):
+    """Raised for malformed cursor tokens or tokens from a different query"""
+
+
+def parse_sort(sort: Optional[str]) -> SortSpec:
+    """
+    Parse a sort JSON string ('{"visit_date": -1}') into a sort spec
+    ending with an _id tiebreaker.
+    """
+    spec: SortSpec = []
+    if sort:
+        sort_dict = json.loads(sort)
+        if not isinstance(sort_dict, dict):
+            raise ValueError("Sort must be a JSON object of field: 1 or -1")
+        for field, direction in sort_dict.items():
+            if direction not in (1, -1):
+                raise ValueError(f"Sort direction for '{field}' must be 1 or -1")
+            spec.append((field, direction))
+    if not any(field == "_id" for field, _ in spec):
+        spec.append(("_id", spec[-1][1] if spec else 1))
+    return spec
+
+
+def fingerprint(query: Any, sort_spec: SortSpec) -> str:
+    """Short hash binding a cursor token to the query and sort it was issued for"""
+    source = json_util.dumps([query, sort_spec], separators=(",", ":"), sort_keys=True,
+                             json_options=json_util.CANONICAL_JSON_OPTIONS)
+    return hashlib.sha256(source.encode()).hexdigest()[:16]
+
+
+def get_path(doc: Dict[str, Any], path: str) -> Any:
+    """Value at a dotted path, or None when any part is missing"""
+    value: Any = doc
+    for part in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def _pop_path(doc: Dict[str, Any], path: str) -> None:
+    parts = path.split(".")
+    for part in parts[:-1]:
+        doc = doc.get(part)
+        if not isinstance(doc, dict):
+            return
+    doc.pop(parts[-1], None)
+
+
+def encode_cursor(sort_spec: SortSpec, last_doc: Dict[str, Any], query_fingerprint: str) -> str:
+    """Build the opaque token for the page after `last_doc`"""
+    values = [get_path(last_doc, field) for field, _ in sort_spec]
+    raw = bson.encode({"f": query_fingerprint, "v": values})
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str, query_fingerprint: str) -> List[Any]:
+    """Return the sort key values stored in a token issued for this query and sort"""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        data = bson.decode(raw)
+    except Exception:
+        raise CursorError("Invalid cursor token")
+    if data.get("f") != query_fingerprint:
+        raise CursorError("Cursor token does not match this query and sort")
+    return data["v"]
+
+
+# $type aliases of each group in MongoDB's cross-type sort order, null first
+TYPE_ORDER = (
+    ("null",),
+    ("double", "int", "long", "decimal"),
+    ("symbol", "string"),
+    ("object",),
+    ("binData",),
+    ("objectId",),
+    ("bool",),
+    ("date",),
+    ("timestamp",),
+    ("regex",),
+)
+
+
+def _type_rank(value: Any) -> Optional[int]:
+    """Position of a decoded BSON value's type in TYPE_ORDER, or None if unknown"""
+    if value is None:
+        return 0
+    if isinstance(value, bool):
+        return 6
+    if isinstance(value, (int, float, Decimal128)):
+        return 1
+    if isinstance(value, str):
+        return 2
+    if isinstance(value, dict):
+        return 3
+    if isinstance(value, bytes):
+        return 4
+    if isinstance(value, bson.ObjectId):
+        return 5
+    if isinstance(value, datetime.datetime):
+        return 7
+    if isinstance(value, bson.Timestamp):
+        return 8
+    if isinstance(value, (bson.Regex, re.Pattern)):
+        return 9
+    return None
+
+
+def _after(field: str, direction: int, value: Any) -> Dict[str, Any]:
+    """Condition on one sort key selecting values strictly after `value`"""
+    rank = _type_rank(value)
+    if direction == 1:
+        if value is None:
+            # Everything but null/missing sorts after null
+            return {field: {"$ne": None}}
+        later = [alias for group in TYPE_ORDER[rank + 1:] for alias in group] if rank is not None else []
+        after = {field: {"$gt": value}}
+        return {"$or": [after, {field: {"$type": later}}]} if later else after
+    if value is None:
+        # Nothing sorts before null, so nothing follows it in descending order
+        return {field: {"$in": []}}
+    after = {field: {"$lt": value}}
+    if rank is None:
+        return after
+    earlier = [alias for group in TYPE_ORDER[1:rank] for alias in group]
+    alternatives = [after, {field: None}]
+    if earlier:
+        alternatives.insert(1, {field: {"$type": earlier}})
+    return {"$or": alternatives}
+
+
+def keyset_filter(sort_spec: SortSpec, values: List[Any]) -> Dict[str, Any]:
+    """
+    Range filter selecting documents strictly after `values` in sort order:
+    (k1 > v1) OR (k1 = v1 AND k2 > v2) OR ... with > flipped for descending
+    keys. Equality on a null value also matches documents missing the field,
+    which sort in the same place.
+    """
+    clauses = []
+    for i, (field, direction) in enumerate(sort_spec):
+        clause = {prev_field: values[j] for j, (prev_field, _) in enumerate(sort_spec[:i])}
+        clause.update(_after(field, direction, values[i]))
+        clauses.append(clause)
+    return clauses[0] if len(clauses) == 1 else {"$or": clauses}
+
+
+def with_sort_fields(projection: Optional[Dict[str, Any]], sort_spec: SortSpec) -> Tuple[Optional[Dict[str, Any]], List[str]]:
+    """
+    Make sure a projection returns the sort fields needed to build the next
+    cursor. Returns the adjusted projection and the fields that were added,
+    which are stripped from the documents again before they are returned.
+    """
+    if not projection:
+        return projection, []
+    projection = dict(projection)
+    added = []
+    inclusion = any(value not in (0, False) for key, value in projection.items() if key != "_id")
+    for field, _ in sort_spec:
+        if field == "_id":
+            if projection.get("_id") in (0, False):
+                del projection["_id"]
+                added.append("_id")
+        elif inclusion and field not in projection:
+            projection[field] = 1
+            added.append(field)
+        elif not inclusion and projection.get(field) in (0, False):
+            del projection[field]
+            added.append(field)
+    return projection, added
+
+
+def strip_fields(documents: List[Dict[str, Any]], fields: List[str]) -> None:
+    """Remove fields that were only fetched to build the cursor"""
+    for doc in documents:
+        for field in fields:
+            _pop_path(doc, field)
@@ -0,0 +1,68 @@
+"""
+Pipeline rewriting and result budgets for the aggregate tool.
+
+limit_pipeline() makes sure a pipeline returns at most max_results
+documents: an existing $limit that only has one-document-in,
+one-document-out stages after it is tightened, otherwise a $limit is
+appended (the server moves it ahead of those stages and folds it into a
+preceding $sort). collect_within_budget() reads a cursor until the
+encoded size of the documents read reaches a byte budget, then stops
+and closes the cursor so the rest is never fetched.
+"""
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+import bson
+
+# Encoded size of aggregate results kept in memory when the caller does not set max_bytes
+AGGREGATE_MAX_BYTES = int(os.getenv("MCP_AGGREGATE_MAX_BYTES", str(8 * 1024 * 1024)))
+
+# Stages that neither add nor drop documents, so a $limit after them can
+# equally be applied before them
+ONE_TO_ONE_STAGES = {"$project", "$addFields", "$set", "$unset", "$replaceRoot", "$replaceWith"}
+
+
+def _stage_name(stage: Any) -> Optional[str]:
+    if isinstance(stage, dict) and len(stage) == 1:
+        return next(iter(stage))
+    return None
+
+
+def limit_pipeline(pipeline: List[Any], max_results: int) -> Tuple[List[Any], str]:
+    """
+    Return a copy of `pipeline` returning at most `max_results` documents,
+    and what was done: "tightened", "kept" (an existing $limit was already
+    small enough) or "appended".
+    """
+    pipeline = list(pipeline)
+    for index in range(len(pipeline) - 1, -1, -1):
+        name = _stage_name(pipeline[index])
+        if name == "$limit":
+            current = pipeline[index]["$limit"]
+            if isinstance(current, int) and current <= max_results:
+                return pipeline, "kept"
+            pipeline[index] = {"$limit": max_results}
+            return pipeline, "tightened"
+        if name not in ONE_TO_ONE_STAGES:
+            break
+    pipeline.append({"$limit": max_results})
+    return pipeline, "appended"
+
+
+async def collect_within_budget(cursor, max_bytes: int) -> Tuple[List[Dict[str, Any]], bool]:
+    """
+    Read documents until their encoded size would exceed `max_bytes`.
+    Returns the documents and whether the cursor was cut short; the cursor
+    is always closed.
+    """
+    documents: List[Dict[str, Any]] = []
+    total = 0
+    try:
+        async for doc in cursor:
+            total += len(bson.encode(doc))
+            if total > max_bytes:
+                return documents, True
+            documents.append(doc)
+        return documents, False
+    finally:
+        await cursor.close()
@@ -0,0 +1,159 @@
+"""
+Shared parsing of query filters and pipelines from tool arguments.
+
+Arguments are MongoDB Extended JSON, so {"$oid": ...}, {"$date": ...},
+{"$numberDecimal": ...} and friends become BSON values at any depth.
+For compatibility with plain-JSON callers, string values of _id (and of
+dotted paths ending in ._id) are also turned into ObjectIds, directly or
+inside $eq/$ne/$in/$nin and within $and/$or/$nor branches.
+
+Parsed filters and pipelines are kept in an LRU keyed by their source
+string, so an agent repeating a query skips the (pure-Python) Extended
+JSON decoding. Cached values are shared between callers and must not be
+mutated.
+"""
+import os
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional
+
+import bson
+from bson import json_util
+
+FILTER_CACHE_SIZE = int(os.getenv("MCP_FILTER_CACHE_SIZE", "1024"))
+
+_JSON_OPTIONS = json_util.JSONOptions(json_mode=json_util.JSONMode.RELAXED, tz_aware=False)
+ID_OPERATORS = ("$eq", "$ne", "$in", "$nin")
+LOGICAL_OPERATORS = ("$and", "$or", "$nor")
+
+
+class FilterError(ValueError):
+    """Raised for Extended JSON values or _id strings that cannot be converted"""
+
+
+def loads_extended(source: str) -> Any:
+    """
+    Decode Extended JSON. Malformed JSON raises json.JSONDecodeError as
+    before; malformed Extended JSON values raise FilterError.
+    """
+    try:
+        return json_util.loads(source, json_options=_JSON_OPTIONS)
+    except ValueError:
+        raise
+    except (TypeError, bson.errors.BSONError) as e:
+        raise FilterError(f"Invalid Extended JSON value: {e}")
+
+
+def _to_object_id(value: Any, strict: bool) -> Any:
+    if isinstance(value, str):
+        if bson.ObjectId.is_valid(value):
+            return bson.ObjectId(value)
+        if strict:
+            raise FilterError("Invalid ObjectId format")
+    return value
+
+
+def _coerce_id_condition(condition: Any, strict: bool) -> Any:
+    if isinstance(condition, dict):
+        for operator in ID_OPERATORS:
+            if operator not in condition:
+                continue
+            value = condition[operator]
+            if isinstance(value, list):
+                # Lists may mix ObjectIds with other id types; only valid hex strings convert
+                condition[operator] = [_to_object_id(item, strict=False) for item in value]
+            else:
+                condition[operator] = _to_object_id(value, strict)
+        return condition
+    return _to_object_id(condition, strict)
+
+
+def coerce_ids(query: Dict[str, Any], strict: bool = True) -> Dict[str, Any]:
+    """
+    Turn _id strings in a filter into ObjectIds, in place. With strict, a
+    plain string _id that is not a valid ObjectId raises FilterError, as
+    the tools always have; otherwise, and on nested ._id paths, strings
+    only convert when valid.
+    """
+    for key, value in query.items():
+        if key == "_id":
+            query[key] = _coerce_id_condition(value, strict)
+        elif key.endswith("._id"):
+            query[key] = _coerce_id_condition(value, strict=False)
+        elif key in LOGICAL_OPERATORS and isinstance(value, list):
+            for clause in value:
+                if isinstance(clause, dict):
+                    coerce_ids(clause, strict)
+    return query
+
+
+class FilterParser:
+    """LRU cache of parsed filters and pipelines, keyed by their source string"""
+
+    def __init__(self, max_entries: int = FILTER_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls) -> "FilterParser":
+        """Build a parser whose cache holds MCP_FILTER_CACHE_SIZE entries (0 disables caching)"""
+        return cls(max_entries=FILTER_CACHE_SIZE)
+
+    def _cached(self, key: Hashable, build) -> Any:
+        value = self._entries.get(key)
+        if value is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+        self.misses += 1
+        value = build()
+        if self.max_entries > 0:
+            self._entries[key] = value
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def parse_filter(self, source: Optional[str], allow_empty: bool = True) -> Dict[str, Any]:
+        """
+        Parse a query filter. An empty source is the empty filter, unless
+        allow_empty is False (update/delete must not match everything by accident).
+        """
+        if not source:
+            if not allow_empty:
+                raise FilterError("A query is required")
+            return {}
+
+        def build():
+            query = loads_extended(source)
+            if not isinstance(query, dict):
+                raise FilterError("Query must be a JSON object")
+            return coerce_ids(query)
+
+        return self._cached(("filter", source), build)
+
+    def parse_pipeline(self, source: str) -> List[Any]:
+        """
+        Parse an aggregation pipeline, converting valid ObjectId strings on _id
+        in $match stages (after a $group, _id may legitimately be any string)
+        """
+        def build():
+            pipeline = loads_extended(source)
+            if not isinstance(pipeline, list):
+                raise FilterError("Pipeline must be a list of aggregation stages")
+            for stage in pipeline:
+                if isinstance(stage, dict) and isinstance(stage.get("$match"), dict):
+                    coerce_ids(stage["$match"], strict=False)
+            return pipeline
+
+        return self._cached(("pipeline", source), build)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
@@ -0,0 +1,299 @@
+"""
+Query-shape tracking and index suggestions.
+
+Every filter (and sort) run by find/count/update/delete is reduced to a
+shape: the same document with each literal replaced by "?", so
+{"age": {"$gt": 40}, "ward": "B"} and {"ward": "C", "age": {"$gt": 18}}
+share one shape. Calls and latency are aggregated per collection and
+shape. A sampled fraction of shapes is also run through explain in the
+background to find collection scans.
+
+Candidate indexes follow the equality / sort / range rule: equality
+fields first, then the sort keys, then range fields. A candidate's score
+is the total time spent in its shapes, multiplied by the documents
+examined per document returned when explain ran with executionStats.
+Shapes explain showed to be served by an index are left out.
+"""
+import asyncio
+import json
+import os
+import random
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+IndexKeys = Tuple[Tuple[str, int], ...]
+
+# Operators matching one (or a few) exact values; any other operator makes a field a range field
+EQUALITY_OPERATORS = {"$eq", "$in"}
+
+
+def shape_of(value: Any) -> Any:
+    """Replace every literal in a filter with "?" while keeping field names and operators"""
+    if isinstance(value, dict):
+        return {key: shape_of(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [shape_of(item) for item in value]
+    return "?"
+
+
+def shape_key(query: Dict[str, Any], sort: Sequence[Tuple[str, int]] = ()) -> str:
+    """Stable string key for a filter and sort shape (filter field order is ignored)"""
+    source = {"filter": shape_of(query), "sort": [list(item) for item in sort]}
+    source["filter"] = _drop_operator_values(source["filter"])
+    return json.dumps(source, separators=(",", ":"), sort_keys=True)
+
+
+def _drop_operator_values(shape: Any) -> Any:
+    # {"$in": ["?", "?", "?"]} and {"$in": ["?"]} are the same shape
+    if isinstance(shape, dict):
+        return {key: "?" if key in ("$in", "$nin", "$all") else _drop_operator_values(item)
+                for key, item in shape.items()}
+    if isinstance(shape, list):
+        return [_drop_operator_values(item) for item in shape]
+    return shape
+
+
+def classify_fields(query: Dict[str, Any]) -> Tuple[List[str], List[str]]:
+    """
+    Split the fields of a filter into equality and range fields. Clauses of a
+    top-level $and are flattened; $or/$nor branches are not indexable by one
+    compound index and are ignored.
+    """
+    equality: List[str] = []
+    ranges: List[str] = []
+    for field, condition in query.items():
+        if field == "$and" and isinstance(condition, list):
+            for clause in condition:
+                if isinstance(clause, dict):
+                    sub_equality, sub_ranges = classify_fields(clause)
+                    equality += [f for f in sub_equality if f not in equality]
+                    ranges += [f for f in sub_ranges if f not in ranges]
+            continue
+        if field.startswith("$"):
+            continue
+        operators = set(condition) if isinstance(condition, dict) and condition and \
+            all(key.startswith("$") for key in condition) else set()
+        target = ranges if operators and not operators <= EQUALITY_OPERATORS else equality
+        if field not in target:
+            target.append(field)
+    ranges = [field for field in ranges if field not in equality]
+    return equality, ranges
+
+
+def candidate_index(query: Dict[str, Any], sort: Sequence[Tuple[str, int]] = ()) -> IndexKeys:
+    """Compound index keys for a filter and sort, in equality, sort, range order"""
+    equality, ranges = classify_fields(query)
+    keys: List[Tuple[str, int]] = [(field, 1) for field in equality]
+    seen = set(equality)
+    for field, direction in sort:
+        if field not in seen:
+            keys.append((field, direction))
+            seen.add(field)
+    keys += [(field, 1) for field in ranges if field not in seen]
+    return tuple(keys)
+
+
+def covers(existing: Sequence[Tuple[str, int]], keys: IndexKeys) -> bool:
+    """Whether an existing index has `keys` as a prefix (or as a prefix in reverse direction)"""
+    existing = tuple((field, int(direction)) if isinstance(direction, (int, float)) else (field, direction)
+                     for field, direction in existing)
+    if len(existing) < len(keys):
+        return False
+    prefix = existing[:len(keys)]
+    reversed_keys = tuple((field, -direction) for field, direction in keys)
+    return prefix == keys or prefix == reversed_keys
+
+
+def plan_summary(explain: Dict[str, Any]) -> Dict[str, Any]:
+    """Winning plan stages and execution counters from an explain result"""
+    stages: List[str] = []
+
+    def walk(plan: Any) -> None:
+        if isinstance(plan, dict):
+            if "stage" in plan:
+                stages.append(plan["stage"])
+            for key in ("inputStage", "queryPlan"):
+                walk(plan.get(key))
+            for child in plan.get("inputStages", []):
+                walk(child)
+
+    planner = explain.get("queryPlanner", {})
+    walk(planner.get("winningPlan"))
+    summary: Dict[str, Any] = {"stages": stages, "collscan": "COLLSCAN" in stages}
+    stats = explain.get("executionStats")
+    if stats:
+        summary["docs_examined"] = stats.get("totalDocsExamined", 0)
+        summary["keys_examined"] = stats.get("totalKeysExamined", 0)
+        summary["returned"] = stats.get("nReturned", 0)
+    return summary
+
+
+class _ShapeStats:
+    __slots__ = ("collection", "tools", "shape", "keys", "calls", "total_ms", "max_ms",
+                 "example_filter", "example_sort", "plan", "explained_at")
+
+    def __init__(self, collection: str, shape: str, keys: IndexKeys, query: Dict[str, Any], sort: Sequence):
+        self.collection = collection
+        self.tools: Dict[str, int] = {}
+        self.shape = shape
+        self.keys = keys
+        self.calls = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        # Most recent concrete filter, used when the shape is explained
+        self.example_filter = query
+        self.example_sort = list(sort)
+        self.plan: Optional[Dict[str, Any]] = None
+        self.explained_at: Optional[float] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "collection": self.collection,
+            "shape": json.loads(self.shape),
+            "tools": dict(self.tools),
+            "calls": self.calls,
+            "avg_ms": round(self.total_ms / self.calls, 3) if self.calls else 0.0,
+            "max_ms": round(self.max_ms, 3),
+            "plan": self.plan,
+        }
+
+
+class QueryShapeTracker:
+    """
+    Aggregates calls and latency per (collection, query shape) and ranks
+    candidate indexes. Holds at most `max_shapes` shapes; when full, the
+    least called shape is dropped to make room.
+    """
+
+    def __init__(self, enabled: bool = True, max_shapes: int = 500, explain_sample_rate: float = 0.0,
+                 explain_interval: float = 300.0, explain_verbosity: str = "queryPlanner",
+                 clock: Callable[[], float] = time.monotonic):
+        self.enabled = enabled
+        self.max_shapes = max_shapes
+        self.explain_sample_rate = explain_sample_rate
+        self.explain_interval = explain_interval
+        self.explain_verbosity = explain_verbosity
+        self._clock = clock
+        self._shapes: Dict[Tuple[str, str], _ShapeStats] = {}
+        # Keeps background explain tasks referenced until they finish
+        self._tasks: set = set()
+        self.explains = 0
+        self.explain_failures = 0
+
+    @classmethod
+    def from_env(cls) -> "QueryShapeTracker":
+        """
+        Build a tracker from MCP_QUERY_SHAPES (on unless "false"), MCP_QUERY_SHAPES_MAX,
+        MCP_EXPLAIN_SAMPLE_RATE (0 disables explain), MCP_EXPLAIN_INTERVAL_SECONDS
+        (minimum time between explains of one shape) and MCP_EXPLAIN_VERBOSITY
+        ("queryPlanner", or "executionStats" which runs the query again)
+        """
+        return cls(
+            enabled=os.getenv("MCP_QUERY_SHAPES", "true").lower() in ("1", "true", "yes"),
+            max_shapes=int(os.getenv("MCP_QUERY_SHAPES_MAX", "500")),
+            explain_sample_rate=float(os.getenv("MCP_EXPLAIN_SAMPLE_RATE", "0")),
+            explain_interval=float(os.getenv("MCP_EXPLAIN_INTERVAL_SECONDS", "300")),
+            explain_verbosity=os.getenv("MCP_EXPLAIN_VERBOSITY", "queryPlanner"),
+        )
+
+    def record(self, tool: str, collection: str, query: Dict[str, Any], sort: Sequence[Tuple[str, int]],
+               elapsed_ms: float, db=None) -> None:
+        """
+        Count one executed filter. When `db` is given and the shape is due
+        for a sampled explain, the explain runs as a background task on it.
+        """
+        if not self.enabled:
+            return
+        key = (collection, shape_key(query, sort))
+        stats = self._shapes.get(key)
+        if stats is None:
+            if len(self._shapes) >= self.max_shapes:
+                del self._shapes[min(self._shapes, key=lambda k: self._shapes[k].calls)]
+            stats = self._shapes[key] = _ShapeStats(collection, key[1], candidate_index(query, sort), query, sort)
+        stats.tools[tool] = stats.tools.get(tool, 0) + 1
+        stats.calls += 1
+        stats.total_ms += elapsed_ms
+        stats.max_ms = max(stats.max_ms, elapsed_ms)
+        stats.example_filter = query
+        stats.example_sort = list(sort)
+        if db is not None and self._explain_due(stats):
+            stats.explained_at = self._clock()
+            task = asyncio.get_running_loop().create_task(self._explain(db, stats))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    def _explain_due(self, stats: _ShapeStats) -> bool:
+        if self.explain_sample_rate <= 0 or not stats.keys:
+            return False
+        if stats.explained_at is not None and self._clock() - stats.explained_at < self.explain_interval:
+            return False
+        return random.random() < self.explain_sample_rate
+
+    async def _explain(self, db, stats: _ShapeStats) -> None:
+        command: Dict[str, Any] = {"find": stats.collection, "filter": stats.example_filter}
+        if stats.example_sort:
+            command["sort"] = dict(stats.example_sort)
+        try:
+            explain = await db.command({"explain": command, "verbosity": self.explain_verbosity})
+            stats.plan = plan_summary(explain)
+            self.explains += 1
+        except Exception:
+            self.explain_failures += 1
+
+    def shapes(self, collection: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Tracked shapes, most time consuming first"""
+        selected = [s for s in self._shapes.values() if collection is None or s.collection == collection]
+        return [s.as_dict() for s in sorted(selected, key=lambda s: s.total_ms, reverse=True)]
+
+    def candidates(self, collection: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Candidate indexes ranked by score. Candidates that are a prefix of a
+        longer candidate on the same collection are folded into it, since the
+        longer index serves both.
+        """
+        merged: Dict[Tuple[str, IndexKeys], Dict[str, Any]] = {}
+        for stats in self._shapes.values():
+            if collection is not None and stats.collection != collection:
+                continue
+            if not stats.keys or (stats.plan and not stats.plan["collscan"]):
+                continue
+            penalty = 1.0
+            if stats.plan and "docs_examined" in stats.plan:
+                penalty = max(1.0, stats.plan["docs_examined"] / max(stats.plan["returned"], 1))
+            entry = merged.setdefault((stats.collection, stats.keys), {
+                "collection": stats.collection, "keys": stats.keys, "score": 0.0,
+                # None until explain has run on one of the shapes
+                "calls": 0, "total_ms": 0.0, "collscan": None, "shapes": [],
+            })
+            entry["score"] += stats.total_ms * penalty
+            entry["calls"] += stats.calls
+            entry["total_ms"] += stats.total_ms
+            if stats.plan:
+                entry["collscan"] = bool(entry["collscan"] or stats.plan["collscan"])
+            entry["shapes"].append(json.loads(stats.shape))
+
+        ranked = sorted(merged.values(), key=lambda c: len(c["keys"]), reverse=True)
+        kept: List[Dict[str, Any]] = []
+        for candidate in ranked:
+            host = next((k for k in kept if k["collection"] == candidate["collection"]
+                         and covers(k["keys"], candidate["keys"])), None)
+            if host is None:
+                kept.append(candidate)
+            else:
+                for field in ("score", "calls", "total_ms"):
+                    host[field] += candidate[field]
+                if candidate["collscan"] is not None:
+                    host["collscan"] = bool(host["collscan"] or candidate["collscan"])
+                host["shapes"] += candidate["shapes"]
+        kept.sort(key=lambda c: c["score"], reverse=True)
+        return kept
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "shapes": len(self._shapes),
+            "max_shapes": self.max_shapes,
+            "explain_sample_rate": self.explain_sample_rate,
+            "explains": self.explains,
+            "explain_failures": self.explain_failures,
+        }
@@ -0,0 +1,158 @@
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+# Logging configuration, read from the environment like the rest of the server
+LOG_LEVEL = os.getenv("MCP_LOG_LEVEL", "INFO").upper()
+# Fraction of requests whose INFO/DEBUG records are written (warnings and errors always are)
+LOG_SAMPLE_RATE = float(os.getenv("MCP_LOG_SAMPLE_RATE", "1.0"))
+# Maximum number of characters of a request/response payload kept in a DEBUG record
+LOG_MAX_PAYLOAD = int(os.getenv("MCP_LOG_MAX_PAYLOAD", "2048"))
+# Records queued beyond this are dropped instead of blocking the event loop
+LOG_QUEUE_SIZE = int(os.getenv("MCP_LOG_QUEUE_SIZE", "10000"))
+
+logger = logging.getLogger("mcp")
+
+_sampled: contextvars.ContextVar[bool] = contextvars.ContextVar("mcp_log_sampled", default=True)
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Render a record as a single JSON line, merging any structured fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        fields = getattr(record, "fields", None)
+        if fields:
+            entry.update(fields)
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class _NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Queue handler that does as little as possible on the calling thread.
+
+    The stock handler formats every record before queueing it; here only the
+    message is merged and JSON rendering happens on the listener thread.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            pass  # Dropping a log line is better than stalling a request
+
+
+def setup_logging(stream=None) -> None:
+    """Route the "mcp" loggers through a background queue (idempotent)"""
+    global _listener
+    if _listener is not None:
+        return
+
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(JsonFormatter())
+
+    log_queue: queue.Queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    logger.addHandler(_NonBlockingQueueHandler(log_queue))
+    logger.setLevel(LOG_LEVEL)
+    logger.propagate = False
+
+    _listener = logging.handlers.QueueListener(log_queue, output)
+    _listener.start()
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the background writer"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def is_sampled() -> bool:
+    """Whether INFO/DEBUG records should be written for the current request"""
+    return _sampled.get()
+
+
+def log_payload(label: str, payload: Any) -> None:
+    """
+    Log a request or response payload at DEBUG level, capped at LOG_MAX_PAYLOAD.
+
+    Nothing is serialized unless DEBUG is enabled and the request was sampled.
+    """
+    if not (logger.isEnabledFor(logging.DEBUG) and _sampled.get()):
+        return
+
+    if isinstance(payload, (bytes, bytearray)):
+        size = len(payload)
+        text = bytes(payload[:LOG_MAX_PAYLOAD]).decode("utf-8", "replace")
+    else:
+        text = payload if isinstance(payload, str) else json.dumps(payload, default=str)
+        size = len(text)
+        text = text[:LOG_MAX_PAYLOAD]
+
+    logger.debug(label, extra={"fields": {
+        "payload": text,
+        "payload_size": size,
+        "truncated": size > LOG_MAX_PAYLOAD,
+    }})
+
+
+class RequestLogMiddleware:
+    """
+    ASGI middleware that times each HTTP request and writes one sampled record.
+
+    The request body is never read here, so the endpoint receives the original
+    stream untouched. Server errors are always logged regardless of sampling.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = _sampled.set(LOG_SAMPLE_RATE >= 1.0 or random.random() < LOG_SAMPLE_RATE)
+        start = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            level = logging.WARNING if status >= 500 else logging.INFO
+            if logger.isEnabledFor(level) and (level >= logging.WARNING or _sampled.get()):
+                logger.log(level, "request", extra={"fields": {
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "status": status,
+                    "duration_ms": round((time.perf_counter() - start) * 1000, 3),
+                }})
+            _sampled.reset(token)
@@ -0,0 +1,160 @@
+"""
+Content negotiation for JSON-RPC responses.
+
+Media type: clients that list application/msgpack (or application/cbor) in
+Accept ahead of, or instead of, application/json get the response in that
+format, with the same structure as the JSON one (BSON values are converted
+the same way, except that CBOR keeps datetimes as native CBOR timestamps).
+msgpack and cbor2 are optional; without them the response stays JSON.
+
+Compression: responses of at least MCP_COMPRESS_MIN_BYTES (default 1024)
+are compressed with the first encoding in MCP_COMPRESSION (default
+"zstd,br,gzip", server preference order; empty disables compression)
+that the client accepts and is available: gzip always is, br needs brotli
+(or brotlicffi) and zstd needs zstandard (or Python 3.14's compression.zstd).
+
+Streamed tool calls are neither re-encoded nor compressed, so each batch
+reaches the client as soon as it is read.
+"""
+import contextvars
+import datetime
+import gzip
+import os
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import bson_codec
+
+try:
+    import msgpack
+except ImportError:  # msgpack is optional
+    msgpack = None
+
+try:
+    import cbor2
+except ImportError:  # cbor2 is optional
+    cbor2 = None
+
+try:
+    import brotli
+except ImportError:  # brotli is optional
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+try:
+    import zstandard
+    _zstd_compress: Optional[Callable[[bytes], bytes]] = zstandard.ZstdCompressor(level=3).compress
+except ImportError:  # zstd is optional
+    try:
+        from compression import zstd
+        _zstd_compress = lambda data: zstd.compress(data, level=3)  # noqa: E731
+    except ImportError:
+        _zstd_compress = None
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+CBOR = "application/cbor"
+
+COMPRESS_MIN_BYTES = int(os.getenv("MCP_COMPRESS_MIN_BYTES", "1024"))
+COMPRESSION = [name.strip() for name in os.getenv("MCP_COMPRESSION", "zstd,br,gzip").split(",") if name.strip()]
+
+# Accept values that select each binary format
+_MEDIA_ALIASES = {
+    "application/msgpack": MSGPACK,
+    "application/x-msgpack": MSGPACK,
+    "application/vnd.msgpack": MSGPACK,
+    "application/cbor": CBOR,
+}
+
+
+def _compress_gzip(data: bytes) -> bytes:
+    return gzip.compress(data, compresslevel=5, mtime=0)
+
+
+def _compress_brotli(data: bytes) -> bytes:
+    return brotli.compress(data, quality=4)
+
+
+COMPRESSORS: Dict[str, Callable[[bytes], bytes]] = {"gzip": _compress_gzip}
+if brotli is not None:
+    COMPRESSORS["br"] = _compress_brotli
+if _zstd_compress is not None:
+    COMPRESSORS["zstd"] = _zstd_compress
+
+
+def _parse_header(value: Optional[str]) -> List[Tuple[str, float]]:
+    """Split an Accept or Accept-Encoding header into (token, q) pairs, keeping their order"""
+    items = []
+    for part in (value or "").split(","):
+        token, *params = [piece.strip() for piece in part.split(";")]
+        if not token:
+            continue
+        q = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        items.append((token.lower(), q))
+    return items
+
+
+def negotiate_media_type(accept: Optional[str]) -> str:
+    """The response format: msgpack or CBOR when preferred and installed, otherwise JSON"""
+    best, best_q = JSON, 0.0
+    for token, q in _parse_header(accept):
+        media_type = _MEDIA_ALIASES.get(token, JSON if token in (JSON, "*/*", "application/*") else None)
+        if media_type is None or q <= best_q:
+            continue
+        if (media_type == MSGPACK and msgpack is None) or (media_type == CBOR and cbor2 is None):
+            continue
+        best, best_q = media_type, q
+    return best
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """The first configured, available compression the client accepts, or None"""
+    accepted = {token: q for token, q in _parse_header(accept_encoding)}
+    for name in COMPRESSION:
+        if name in COMPRESSORS and accepted.get(name, accepted.get("*", 0.0)) > 0:
+            return name
+    return None
+
+
+def _cbor_default(encoder, value: Any) -> None:
+    encoder.encode(bson_codec.encode_value(value))
+
+
+def encode(content: Any, media_type: str) -> bytes:
+    """Serialize a response payload that may contain BSON values in the negotiated format"""
+    if media_type == MSGPACK:
+        return msgpack.packb(content, default=bson_codec.encode_value, use_bin_type=True)
+    if media_type == CBOR:
+        # BSON datetimes are naive UTC
+        return cbor2.dumps(content, default=_cbor_default, timezone=datetime.timezone.utc)
+    return bson_codec.dumps_bytes(content)
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    return COMPRESSORS[encoding](data)
+
+
+_preferences: contextvars.ContextVar[Tuple[str, Optional[str]]] = contextvars.ContextVar(
+    "mcp_response_encoding", default=(JSON, None)
+)
+
+
+def set_preferences(accept: Optional[str], accept_encoding: Optional[str]) -> contextvars.Token:
+    """Record the current request's negotiated format and compression"""
+    return _preferences.set((negotiate_media_type(accept), negotiate_encoding(accept_encoding)))
+
+
+def reset_preferences(token: contextvars.Token) -> None:
+    _preferences.reset(token)
+
+
+def preferences() -> Tuple[str, Optional[str]]:
+    """(media type, content encoding or None) for the current request"""
+    return _preferences.get()
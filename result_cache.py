@@ -0,0 +1,187 @@
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Set, Tuple
+
+from bson import json_util
+
+import bson_codec
+
+
+def _parse_ttls(raw: str) -> Dict[str, float]:
+    """Parse "Patients=300,Vitals=5" into per-collection TTLs"""
+    ttls = {}
+    for item in raw.split(","):
+        if "=" in item:
+            name, seconds = item.split("=", 1)
+            ttls[name.strip()] = float(seconds)
+    return ttls
+
+
+class ResultCache:
+    """
+    In-process cache for read tool results.
+
+    Entries are keyed on the tool, collection, normalized query or pipeline
+    and any other result-shaping options. The cache is bounded by the
+    serialized size of its results and evicts least recently used entries
+    first; each entry also expires after its collection's TTL. Writes made
+    through the same MongoDBClient invalidate the collection's entries.
+
+    Invalidation also moves the collection's generation on. A read takes
+    generation() before querying the database and hands it to put(), so
+    a result read before a write that finished in the meantime is not stored.
+
+    Cached results are shared between callers and must not be mutated.
+    """
+
+    def __init__(self, enabled: bool = True, max_bytes: int = 32 * 1024 * 1024,
+                 default_ttl: float = 30.0, collection_ttls: Optional[Dict[str, float]] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.enabled = enabled
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.collection_ttls = dict(collection_ttls or {})
+        self._clock = clock
+        # key -> (value, size, expires_at, collection), least recently used first
+        self._entries: "OrderedDict[Hashable, Tuple[Any, int, float, str]]" = OrderedDict()
+        self._by_collection: Dict[str, Set[Hashable]] = {}
+        # Invalidation counters: the whole cache, and per collection
+        self._generation = 0
+        self._generations: Dict[str, int] = {}
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.stale_puts = 0
+
+    @classmethod
+    def from_env(cls) -> "ResultCache":
+        """
+        Build a cache from MCP_RESULT_CACHE (off unless "true"), MCP_CACHE_MAX_BYTES,
+        MCP_CACHE_TTL_SECONDS and MCP_CACHE_COLLECTION_TTLS ("name=seconds,...")
+        """
+        return cls(
+            enabled=os.getenv("MCP_RESULT_CACHE", "false").lower() in ("1", "true", "yes"),
+            max_bytes=int(os.getenv("MCP_CACHE_MAX_BYTES", str(32 * 1024 * 1024))),
+            default_ttl=float(os.getenv("MCP_CACHE_TTL_SECONDS", "30")),
+            collection_ttls=_parse_ttls(os.getenv("MCP_CACHE_COLLECTION_TTLS", "")),
+        )
+
+    @classmethod
+    def counts_from_env(cls) -> "ResultCache":
+        """
+        Build the short-lived count_documents cache from MCP_COUNT_CACHE_TTL_SECONDS
+        (default 5, 0 disables it) and MCP_COUNT_CACHE_MAX_BYTES
+        """
+        ttl = float(os.getenv("MCP_COUNT_CACHE_TTL_SECONDS", "5"))
+        return cls(
+            enabled=ttl > 0,
+            max_bytes=int(os.getenv("MCP_COUNT_CACHE_MAX_BYTES", str(1024 * 1024))),
+            default_ttl=ttl,
+        )
+
+    @staticmethod
+    def make_key(tool: str, collection: str, spec: Any, **options: Any) -> Tuple:
+        """
+        Cache key for a read. `spec` is the parsed query or pipeline; it is
+        re-serialized compactly so whitespace differences share an entry, but
+        key order is kept since it is significant in MongoDB documents.
+        Canonical Extended JSON keeps BSON types apart, so an ObjectId and
+        its hex string (or a datetime and its ISO text) get different keys.
+        """
+        normalized = json_util.dumps(spec, separators=(",", ":"), json_options=json_util.CANONICAL_JSON_OPTIONS)
+        return (tool, collection, normalized, tuple(sorted(options.items())))
+
+    def ttl_for(self, collection: str) -> float:
+        return self.collection_ttls.get(collection, self.default_ttl)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return a live cached result, or None on a miss"""
+        if not self.enabled:
+            return None
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        value, _, expires_at, _ = entry
+        if expires_at <= self._clock():
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def generation(self, collection: str) -> Tuple[int, int]:
+        """Invalidation generation of a collection, taken before reading it"""
+        return (self._generation, self._generations.get(collection, 0))
+
+    def put(self, key: Hashable, collection: str, value: Any,
+            generation: Optional[Tuple[int, int]] = None) -> None:
+        """
+        Store a result, evicting least recently used entries to stay within
+        max_bytes. With `generation`, the result is dropped if the collection
+        was invalidated since that generation was taken.
+        """
+        if not self.enabled:
+            return
+        if generation is not None and generation != self.generation(collection):
+            self.stale_puts += 1
+            return
+        ttl = self.ttl_for(collection)
+        if ttl <= 0:
+            return
+        size = len(bson_codec.dumps_bytes(value))
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        while self._bytes + size > self.max_bytes and self._entries:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+        self._entries[key] = (value, size, self._clock() + ttl, collection)
+        self._by_collection.setdefault(collection, set()).add(key)
+        self._bytes += size
+
+    def invalidate(self, collection: Optional[str] = None) -> None:
+        """Drop every entry for a collection, or the whole cache when collection is None"""
+        if collection is None:
+            self._generation += 1
+            keys = list(self._entries)
+        else:
+            self._generations[collection] = self._generations.get(collection, 0) + 1
+            keys = list(self._by_collection.get(collection, ()))
+        for key in keys:
+            self._remove(key)
+        if keys:
+            self.invalidations += 1
+
+    def _remove(self, key: Hashable) -> None:
+        _, size, _, collection = self._entries.pop(key)
+        self._bytes -= size
+        keys = self._by_collection.get(collection)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_collection[collection]
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+            # Results not stored because a write invalidated them while they were read
+            "stale_puts": self.stale_puts,
+        }
@@ -0,0 +1,94 @@
+"""
+Production entry point for self-hosting the MCP server outside Vercel.
+
+Runs the app under uvicorn with several worker processes, so one server
+uses more than one core:
+
+    python serve.py --workers 4 --port 5000
+
+Settings come from the command line or MCP_WORKERS (default: CPU count),
+MCP_HOST (default 0.0.0.0), PORT (default 5000), MCP_KEEP_ALIVE_SECONDS
+and MCP_GRACEFUL_TIMEOUT_SECONDS. uvloop and httptools are used when they
+are installed (pip install uvloop httptools), the asyncio loop and h11
+otherwise.
+
+Workers are started as fresh processes, so each one imports the app and
+builds its own MongoDBClient (and Motor pool) on its own event loop;
+nothing is shared across processes. Unless MONGODB_PING_ON_STARTUP is
+set, the startup hook pings MongoDB before the worker accepts requests,
+and MONGODB_WARM_CONNECTIONS (--warm-connections) opens that many pooled
+connections as well. On SIGTERM or Ctrl+C each worker finishes its
+in-flight requests and closes its client. The pool settings
+(MONGODB_MAX_POOL_SIZE, ...) apply per worker.
+
+Counters on /stats/* and /metrics are per process; /health reports the
+pid of the worker that answered.
+"""
+import argparse
+import os
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def event_loop() -> str:
+    try:
+        import uvloop  # noqa: F401
+    except ImportError:  # uvloop is optional
+        return "asyncio"
+    return "uvloop"
+
+
+def http_protocol() -> str:
+    try:
+        import httptools  # noqa: F401
+    except ImportError:  # httptools is optional
+        return "h11"
+    return "httptools"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=int(os.getenv("MCP_WORKERS", "0")) or os.cpu_count() or 1,
+                        help="worker processes (default: MCP_WORKERS or the CPU count)")
+    parser.add_argument("--host", default=os.getenv("MCP_HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "5000")))
+    parser.add_argument("--warm-connections", type=int,
+                        default=int(os.getenv("MONGODB_WARM_CONNECTIONS", "0")),
+                        help="pooled connections each worker opens at startup")
+    parser.add_argument("--keep-alive", type=int, default=int(os.getenv("MCP_KEEP_ALIVE_SECONDS", "5")),
+                        help="seconds an idle keep-alive connection stays open")
+    parser.add_argument("--graceful-timeout", type=int,
+                        default=int(os.getenv("MCP_GRACEFUL_TIMEOUT_SECONDS", "30")),
+                        help="seconds to wait for in-flight requests on shutdown")
+    parser.add_argument("--app", default="mongodb_server:app", help="app import string")
+    parser.add_argument("--app-dir", default=os.path.join(ROOT, "api"), help="directory the app is imported from")
+    parser.add_argument("--factory", action="store_true", help="--app names a function that returns the app")
+    args = parser.parse_args(argv)
+
+    import uvicorn
+
+    # Read by the workers' startup hooks; workers inherit this environment
+    os.environ.setdefault("MONGODB_PING_ON_STARTUP", "true")
+    os.environ["MONGODB_WARM_CONNECTIONS"] = str(args.warm_connections)
+
+    loop, http = event_loop(), http_protocol()
+    print(f"Starting MCP MongoDB Server on {args.host}:{args.port} "
+          f"with {args.workers} worker(s), loop={loop}, http={http}")
+    uvicorn.run(
+        args.app,
+        app_dir=args.app_dir,
+        factory=args.factory,
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        loop=loop,
+        http=http,
+        timeout_keep_alive=args.keep_alive,
+        timeout_graceful_shutdown=args.graceful_timeout,
+        # Requests are already logged by RequestLogMiddleware
+        access_log=False,
+    )
+
+
+if __name__ == "__main__":
+    main()
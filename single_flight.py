@@ -0,0 +1,153 @@
+"""
+Single-flight coalescing of identical concurrent reads.
+
+When a read arrives while an identical one (same tool, collection, parsed
+query or pipeline and result-shaping options) is still running, it waits
+for that operation instead of starting its own, and both get the same
+result object. Only calls that overlap in time are merged: once the
+operation finishes its result is not reused (that is the result cache's
+job), and a write through the same client detaches in-flight reads of the
+collection so calls arriving after the write start afresh. A detached read
+still finishes for the callers already waiting, but its result is not
+cached: the write moved the caches' invalidation generation, which the
+read took before querying (ResultCache.generation).
+
+Reads are keyed by ResultCache.make_key plus their time limits. The key
+must tell BSON types apart: a query on an ObjectId and one on its hex
+string are different reads, and merging them would hand one caller the
+other's documents.
+
+The shared operation runs in its own task. A caller that is cancelled
+(e.g. its HTTP client went away) stops waiting without disturbing the
+others; the operation itself is cancelled only when nobody is left
+waiting for it.
+
+Results handed to more than one caller are remembered briefly so the
+server can serialize them once (encode_shared); like cached results they
+are shared and must not be mutated.
+"""
+import asyncio
+import os
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Set, Tuple
+
+# Recently shared results whose encoding is kept: id(result) -> (result, encoded or None)
+SHARED_RESULTS_MAX = 64
+_shared: "OrderedDict[int, Tuple[Any, Optional[bytes]]]" = OrderedDict()
+
+
+def _mark_shared(result: Any) -> None:
+    key = id(result)
+    if key in _shared and _shared[key][0] is result:
+        return
+    _shared[key] = (result, None)
+    while len(_shared) > SHARED_RESULTS_MAX:
+        _shared.popitem(last=False)
+
+
+def encode_shared(result: Any, encode: Callable[[], bytes]) -> bytes:
+    """
+    encode() once for a result shared by coalesced calls, or every time
+    for any other result. `result` identifies the shared object; encode()
+    may serialize a larger structure built from it, as long as that is
+    the same for every caller.
+    """
+    entry = _shared.get(id(result))
+    if entry is None or entry[0] is not result:
+        return encode()
+    if entry[1] is None:
+        entry = _shared[id(result)] = (result, encode())
+    return entry[1]
+
+
+class _Flight:
+    __slots__ = ("task", "collection", "waiters", "shared")
+
+    def __init__(self, task: "asyncio.Future", collection: Optional[str]):
+        self.task = task
+        self.collection = collection
+        self.waiters = 0
+        self.shared = False
+
+
+class SingleFlight:
+    """In-flight reads of one client, keyed like the result cache"""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._by_collection: Dict[Optional[str], Set[Hashable]] = {}
+        self.executed = 0
+        self.coalesced = 0
+        self.detached = 0
+
+    @classmethod
+    def from_env(cls) -> "SingleFlight":
+        """Coalesce reads unless MCP_SINGLE_FLIGHT is set to false"""
+        return cls(enabled=os.getenv("MCP_SINGLE_FLIGHT", "true").lower() in ("1", "true", "yes"))
+
+    def _remove(self, key: Hashable, flight: _Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+            keys = self._by_collection.get(flight.collection)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_collection[flight.collection]
+
+    async def do(self, key: Hashable, collection: Optional[str], operation: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run operation(), or join an identical one in flight. `collection` is
+        what writes invalidate; None marks a database-wide read such as
+        list_collections, which any write detaches.
+        """
+        if not self.enabled:
+            return await operation()
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(operation()), collection)
+            self._flights[key] = flight
+            self._by_collection.setdefault(collection, set()).add(key)
+            flight.task.add_done_callback(lambda _: self._remove(key, flight))
+            self.executed += 1
+        else:
+            flight.shared = True
+            self.coalesced += 1
+        flight.waiters += 1
+        try:
+            result = await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # Nobody wants the result any more; later callers start their own
+                self._remove(key, flight)
+                flight.task.cancel()
+            raise
+        if flight.shared:
+            _mark_shared(result)
+        return result
+
+    def forget(self, collection: Optional[str] = None) -> None:
+        """
+        Detach in-flight reads of a collection (and database-wide reads), or
+        of everything when collection is None, after a write
+        """
+        if collection is None:
+            targets = list(self._flights)
+        else:
+            targets = list(self._by_collection.get(collection, ())) + list(self._by_collection.get(None, ()))
+        for key in targets:
+            self._remove(key, self._flights[key])
+            self.detached += 1
+
+    def stats(self) -> Dict[str, Any]:
+        calls = self.executed + self.coalesced
+        return {
+            "enabled": self.enabled,
+            "in_flight": len(self._flights),
+            "executed": self.executed,
+            # Each coalesced call is a database round trip and a serialization saved
+            "coalesced": self.coalesced,
+            "coalesced_ratio": round(self.coalesced / calls, 4) if calls else 0.0,
+            "detached": self.detached,
+        }
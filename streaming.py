@@ -0,0 +1,127 @@
+import asyncio
+import json
+import os
+from typing import Any, AsyncIterator, Dict, Optional
+
+from starlette.responses import StreamingResponse
+
+import bson_codec
+import metrics
+
+# Documents per streamed batch when the caller does not ask for a size
+STREAM_BATCH_SIZE = int(os.getenv("MCP_STREAM_BATCH_SIZE", "100"))
+# Batches read ahead of the client; bounds memory to about this many batches
+STREAM_BUFFER_BATCHES = max(1, int(os.getenv("MCP_STREAM_BUFFER_BATCHES", "4")))
+
+NDJSON = "application/x-ndjson"
+SSE = "text/event-stream"
+
+
+def negotiate_stream_format(accept: Optional[str], params: Dict[str, Any]) -> Optional[str]:
+    """
+    Decide whether a tools/call should be streamed, and in which format.
+
+    Streaming is opt-in: either the client accepts NDJSON, or it sets
+    `params._meta.stream`, in which case SSE is used when accepted and NDJSON
+    otherwise. Returns the media type, or None for a normal JSON response.
+    """
+    accept = accept or ""
+    if NDJSON in accept:
+        return NDJSON
+    meta = params.get("_meta") or {}
+    if meta.get("stream"):
+        return SSE if SSE in accept else NDJSON
+    return None
+
+
+class _Failure:
+    """Carries an exception from the producer task to the consumer"""
+
+    def __init__(self, error: Exception):
+        self.error = error
+
+
+async def buffered(source: AsyncIterator[Any], maxsize: int = STREAM_BUFFER_BATCHES) -> AsyncIterator[Any]:
+    """
+    Read ahead from `source` in a background task through a bounded queue.
+
+    The database fetch of the next batch overlaps with sending the current
+    one, while the queue size caps how far the producer can run ahead of a
+    slow client. Closing the returned iterator cancels the producer.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+    done = object()
+
+    async def produce():
+        try:
+            async for item in source:
+                await queue.put(item)
+            await queue.put(done)
+        except Exception as e:
+            await queue.put(_Failure(e))
+
+    task = asyncio.create_task(produce())
+    try:
+        while True:
+            item = await queue.get()
+            if item is done:
+                break
+            if isinstance(item, _Failure):
+                raise item.error
+            yield item
+    finally:
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+
+def encode_message(media_type: str, payload: Dict[str, Any], event: Optional[str] = None) -> bytes:
+    """Frame one payload (which may hold raw BSON values) as an NDJSON line or an SSE event"""
+    data = bson_codec.dumps_bytes(payload)
+    if media_type == SSE:
+        prefix = f"event: {event}\n".encode() if event else b""
+        return prefix + b"data: " + data + b"\n\n"
+    return data + b"\n"
+
+
+def stream_tool_call(batches: AsyncIterator[Any], request_id: Any, media_type: str,
+                     tool_name: str) -> StreamingResponse:
+    """
+    Stream a tool's document batches followed by the JSON-RPC response.
+
+    Each batch is sent as `{"documents": [...]}` (an SSE `documents` event);
+    the final message is a regular JSON-RPC response whose text carries the
+    total count, or a JSON-RPC error if the tool failed part-way.
+    """
+    async def body():
+        count = 0
+        size = 0
+        try:
+            async for documents in buffered(batches):
+                count += len(documents)
+                message = encode_message(media_type, {"documents": documents}, event="documents")
+                size += len(message)
+                yield message
+            summary = json.dumps({"count": count, "streamed": True})
+            response = {"jsonrpc": "2.0", "id": request_id,
+                        "result": {"content": [{"type": "text", "text": summary}]}}
+        except Exception as e:
+            # Errors that carry their own JSON-RPC code (e.g. admission.Overloaded) keep it
+            code = getattr(e, "rpc_code", None)
+            if code is not None:
+                message = str(e)
+            else:
+                code, message = -32001, f"Tool execution failed: {str(e)}"
+            response = {"jsonrpc": "2.0", "id": request_id, "error": {"code": code, "message": message}}
+            metrics.record_rpc_error(code)
+        message = encode_message(media_type, response)
+        metrics.record_streamed_response(tool_name, size + len(message))
+        yield message
+
+    return StreamingResponse(
+        body(),
+        media_type=media_type,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,185 @@
+"""
+Per-database clients for the optional `database` tool argument.
+
+When MCP_ALLOWED_DATABASES opens more than the default database, every
+tool accepts a `database` naming the database to run against (default:
+MONGODB_DATABASE). TenantManager hands out one MongoDBClient per
+database; all databases on the same URI share one Motor client and so one
+connection pool. Databases may live on other clusters via
+MCP_TENANT_URIS, a JSON object mapping database names to URIs, in which
+case each distinct URI gets its own pool.
+
+Each tenant client has its own result and count caches and query shape
+statistics, so the manager keeps at most MCP_MAX_TENANTS of them and drops
+those unused for MCP_TENANT_IDLE_SECONDS; a dropped tenant starts cold on
+its next call. Connection pools are kept.
+
+Only MONGODB_DATABASE is served unless MCP_ALLOWED_DATABASES (comma
+separated) lists the databases that may be named; the default database is
+always allowed. MongoDB's internal admin/local/config databases are
+refused even when listed.
+"""
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import bson_codec
+from mongodb_client import MongoDBClient
+
+INTERNAL_DATABASES = frozenset({"admin", "local", "config"})
+# Characters MongoDB does not allow in database names
+_INVALID_NAME_CHARACTERS = set('/\\. "$*<>:|?\0')
+
+
+class TenantError(ValueError):
+    """Raised for a database name that is invalid or not allowed"""
+
+
+def validate_database_name(name: Any) -> str:
+    if not isinstance(name, str) or not name:
+        raise TenantError("database must be a non-empty string")
+    if len(name) > 63 or _INVALID_NAME_CHARACTERS & set(name):
+        raise TenantError(f"Invalid database name: {name!r}")
+    return name
+
+
+class TenantManager:
+    """LRU of per-database clients, bounded in count and idle time"""
+
+    # Added to every tool's inputSchema when tools are routed through the manager
+    DATABASE_PROPERTY = {
+        "type": "string",
+        "description": "Database to run against (default: the server's configured database)",
+    }
+
+    def __init__(self, default: MongoDBClient, max_tenants: int = 32, idle_timeout: float = 600.0,
+                 allowed: Optional[frozenset] = None, uris: Optional[Dict[str, str]] = None):
+        self.default = default
+        self.max_tenants = max_tenants
+        self.idle_timeout = idle_timeout
+        # Without an explicit allowlist only the default database is served
+        self.allowed = frozenset(allowed or ()) | {default.database_name}
+        self.uris = dict(uris or {})
+        self._pools: Dict[str, MongoDBClient] = {default.connection_string: default}
+        # database -> (client, time.monotonic() of its last use), least recently used first
+        self._tenants: "OrderedDict[str, Tuple[MongoDBClient, float]]" = OrderedDict()
+        self.created = 0
+        self.evicted = 0
+
+    @property
+    def multi_database(self) -> bool:
+        """Whether any database besides the default may be named"""
+        return len(self.allowed) > 1
+
+    @classmethod
+    def from_env(cls, default: MongoDBClient) -> "TenantManager":
+        """
+        Build a manager around the default client from MCP_MAX_TENANTS,
+        MCP_TENANT_IDLE_SECONDS, MCP_ALLOWED_DATABASES and MCP_TENANT_URIS
+        """
+        allowed = os.getenv("MCP_ALLOWED_DATABASES", "")
+        return cls(
+            default,
+            max_tenants=int(os.getenv("MCP_MAX_TENANTS", "32")),
+            idle_timeout=float(os.getenv("MCP_TENANT_IDLE_SECONDS", "600")),
+            allowed=frozenset(name.strip() for name in allowed.split(",") if name.strip()) or None,
+            uris=json.loads(os.getenv("MCP_TENANT_URIS", "") or "{}"),
+        )
+
+    def _check_allowed(self, database: str) -> None:
+        if database in INTERNAL_DATABASES:
+            raise TenantError(f"Database '{database}' is internal to MongoDB")
+        if database not in self.allowed:
+            raise TenantError(f"Database '{database}' is not served by this server")
+
+    def _uri_for(self, database: str) -> str:
+        return self.uris.get(database) or self.default.connection_string
+
+    def _pool_for(self, database: str) -> MongoDBClient:
+        uri = self._uri_for(database)
+        owner = self._pools.get(uri)
+        if owner is None:
+            # The first database seen on a URI owns its Motor client; its caches stay unused
+            owner = self._pools[uri] = MongoDBClient(uri, database, config=self.default.config)
+        return owner
+
+    def _evict(self, now: float) -> None:
+        while self._tenants:
+            database, (_, last_used) = next(iter(self._tenants.items()))
+            if len(self._tenants) <= self.max_tenants and now - last_used < self.idle_timeout:
+                return
+            del self._tenants[database]
+            self.evicted += 1
+
+    def get(self, database: Optional[str] = None) -> MongoDBClient:
+        """The client for a database; None or the default database gives the default client"""
+        if database is None or database == self.default.database_name:
+            return self.default
+        validate_database_name(database)
+        self._check_allowed(database)
+        now = time.monotonic()
+        entry = self._tenants.pop(database, None)
+        if entry is None:
+            client = MongoDBClient(
+                self._uri_for(database), database,
+                config=self.default.config,
+                filter_parser=self.default.filters,
+                pool_owner=self._pool_for(database),
+            )
+            self.created += 1
+        else:
+            client = entry[0]
+        self._tenants[database] = (client, now)
+        self._evict(now)
+        return client
+
+    def route(self, method_name: str, kind: str = "structured") -> Callable[..., Any]:
+        """
+        Tool callable that takes an optional `database` argument and calls
+        `method_name` on that database's client. `kind` is "structured" or
+        "json" for coroutine tools, which report a bad database as an error
+        result, or "stream" for batch streamers, which raise TenantError.
+        """
+        if kind == "stream":
+            def stream(*args, database: Optional[str] = None, **kwargs):
+                return getattr(self.get(database), method_name)(*args, **kwargs)
+            stream.__name__ = method_name
+            return stream
+
+        async def call(*args, database: Optional[str] = None, **kwargs):
+            try:
+                client = self.get(database)
+            except TenantError as e:
+                error = {"error": str(e)}
+                return error if kind == "structured" else bson_codec.dumps(error)
+            return await getattr(client, method_name)(*args, **kwargs)
+        call.__name__ = method_name
+        return call
+
+    def close(self) -> None:
+        """Close the Motor clients created for other URIs (the default client is closed by its owner)"""
+        for owner in self._pools.values():
+            if owner is not self.default and owner.client is not None:
+                owner.client.close()
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        self._evict(now)
+        return {
+            "max_tenants": self.max_tenants,
+            "idle_timeout_seconds": self.idle_timeout,
+            "active": len(self._tenants),
+            "created": self.created,
+            "evicted": self.evicted,
+            "pools": len(self._pools),
+            "tenants": {
+                database: {
+                    "idle_seconds": round(now - last_used, 1),
+                    "cache": client.cache_stats(),
+                    "shapes": client.shape_tracker.stats(),
+                }
+                for database, (client, last_used) in reversed(self._tenants.items())
+            },
+        }
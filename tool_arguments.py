@@ -0,0 +1,155 @@
+"""
+Validation of tools/call arguments against each tool's inputSchema.
+
+Every schema is compiled once, when the registry is built, into a table of
+per-argument converters, so checking a call is one dict lookup per
+argument. A call is rejected before it reaches admission control or the
+database when it has an argument the tool does not take, is missing a
+required one, or passes a value of the wrong type. The rejection is a
+JSON-RPC "Invalid params" error naming the argument.
+
+Values that clients commonly send in a looser form are coerced rather
+than rejected: integers as numeric strings or integral floats, booleans
+as "true"/"false", and the JSON-string arguments (query, pipeline,
+documents, ...) as JSON objects or arrays, which are serialized. An
+explicit null for an optional argument means "not given".
+
+`query` and `pipeline` are also parsed up front with the client's
+FilterParser, so malformed ones are rejected here. The parsed value lands
+in the parser's cache and the tool reuses it, so this costs nothing extra
+for valid calls.
+"""
+import json
+from typing import Any, Callable, Dict, Mapping, Optional
+
+# JSON-RPC "Invalid params"
+INVALID_PARAMS = -32602
+
+# String arguments that carry JSON; objects and arrays sent for them are serialized
+JSON_ARGUMENTS = frozenset({
+    "query", "pipeline", "projection", "sort", "update", "document", "documents", "operations",
+})
+
+
+class InvalidArguments(ValueError):
+    """Raised when tools/call arguments do not match the tool's inputSchema"""
+
+    rpc_code = INVALID_PARAMS
+
+    def __init__(self, tool_name: str, reason: str):
+        super().__init__(f"Invalid arguments for '{tool_name}': {reason}")
+        self.tool_name = tool_name
+
+
+def _to_string(value: Any) -> str:
+    if isinstance(value, str):
+        return value
+    raise TypeError("must be a string")
+
+
+def _to_json_string(value: Any) -> str:
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, separators=(",", ":"))
+    raise TypeError("must be a JSON string, object or array")
+
+
+def _to_integer(value: Any) -> int:
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, str):
+        try:
+            return int(value.strip())
+        except ValueError:
+            pass
+    raise TypeError("must be an integer")
+
+
+def _to_boolean(value: Any) -> bool:
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.strip().lower() in ("true", "false"):
+        return value.strip().lower() == "true"
+    raise TypeError("must be a boolean")
+
+
+def _unchecked(value: Any) -> Any:
+    return value
+
+
+def _to_object(value: Any) -> Dict[str, Any]:
+    if isinstance(value, dict):
+        return value
+    raise TypeError("must be an object")
+
+
+def _to_array(value: Any) -> list:
+    if isinstance(value, list):
+        return value
+    raise TypeError("must be an array")
+
+
+_CONVERTERS: Dict[str, Callable[[Any], Any]] = {
+    "string": _to_string,
+    "integer": _to_integer,
+    "boolean": _to_boolean,
+    "object": _to_object,
+    "array": _to_array,
+}
+
+
+class ArgumentValidator:
+    """Checks and coerces one tool's arguments; built from its inputSchema"""
+
+    __slots__ = ("tool_name", "converters", "parsers", "required", "rejected")
+
+    def __init__(self, tool_name: str, properties: Mapping[str, Any], required=(),
+                 parsers: Optional[Mapping[str, Callable[[str], Any]]] = None):
+        self.tool_name = tool_name
+        self.converters: Dict[str, Callable[[Any], Any]] = {}
+        for name, schema in properties.items():
+            kind = str(schema.get("type", "")).lower()
+            if kind == "string" and name in JSON_ARGUMENTS:
+                self.converters[name] = _to_json_string
+            else:
+                # Types this module does not know are passed through unchecked
+                self.converters[name] = _CONVERTERS.get(kind, _unchecked)
+        self.parsers = {name: parse for name, parse in (parsers or {}).items() if name in self.converters}
+        self.required = frozenset(required)
+        self.rejected = 0
+
+    def __call__(self, arguments: Any) -> Dict[str, Any]:
+        """Return the coerced arguments, or raise InvalidArguments"""
+        if arguments is None:
+            arguments = {}
+        elif not isinstance(arguments, dict):
+            self._reject("arguments must be an object")
+        validated = {}
+        for name, value in arguments.items():
+            converter = self.converters.get(name)
+            if converter is None:
+                self._reject(f"unexpected argument '{name}' (expected {', '.join(self.converters) or 'none'})")
+            if value is None and name not in self.required:
+                continue
+            try:
+                validated[name] = converter(value)
+            except TypeError as e:
+                self._reject(f"'{name}' {e}")
+        missing = self.required.difference(validated)
+        if missing:
+            self._reject(f"missing required argument(s) {', '.join(sorted(missing))}")
+        for name, parse in self.parsers.items():
+            value = validated.get(name)
+            if value:
+                try:
+                    parse(value)
+                except ValueError as e:
+                    self._reject(f"'{name}' is not valid: {e}")
+        return validated
+
+    def _reject(self, reason: str):
+        self.rejected += 1
+        raise InvalidArguments(self.tool_name, reason)
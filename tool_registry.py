@@ -0,0 +1,127 @@
+import hashlib
+import json
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple
+
+from metrics import instrument_stream, instrument_tool
+from tool_arguments import ArgumentValidator
+
+
+@dataclass(frozen=True)
+class ToolRegistry:
+    """
+    Immutable snapshot of the tools exposed by a MongoDBClient.
+
+    Built once at startup: holds the name -> callable dispatch table (wrapped
+    for metrics), the structured (dict-returning) and streaming variants of
+    tools that have them, the MCP-format tool definitions, an argument
+    validator compiled from each inputSchema, and the tools/list result
+    pre-serialized to JSON together with its ETag.
+    """
+
+    callables: Mapping[str, Callable[..., Any]]
+    structured: Mapping[str, Callable[..., Any]]
+    streamers: Mapping[str, Callable[..., Any]]
+    validators: Mapping[str, ArgumentValidator]
+    tools: Tuple[Mapping[str, Any], ...]
+    tools_list_json: bytes
+    etag: str
+
+    @classmethod
+    def from_client(cls, client, tenants=None) -> "ToolRegistry":
+        """
+        Build the registry from a client's get_available_tools() definitions.
+
+        With a TenantManager that serves more than the default database,
+        every tool takes an optional `database` argument and runs on that
+        database's client.
+        """
+        callables: Dict[str, Callable[..., Any]] = {}
+        structured: Dict[str, Callable[..., Any]] = {}
+        streamers: Dict[str, Callable[..., Any]] = {}
+        validators: Dict[str, ArgumentValidator] = {}
+        # Filters and pipelines are parsed while validating, into the cache the tools read
+        parsers = {"query": client.filters.parse_filter, "pipeline": client.filters.parse_pipeline}
+        tools = []
+        for tool_name, tool_info in client.get_available_tools().items():
+            schema = tool_info["schema"]["function"]
+            properties = schema["parameters"]["properties"]
+            tool_callable = tool_info["callable"]
+            structured_callable = tool_info.get("structured_callable")
+            stream_callable = tool_info.get("stream_callable")
+            if tenants is not None and tenants.multi_database:
+                tool_callable = tenants.route(tool_callable.__name__, "json")
+                if structured_callable is not None:
+                    structured_callable = tenants.route(structured_callable.__name__, "structured")
+                if stream_callable is not None:
+                    stream_callable = tenants.route(stream_callable.__name__, "stream")
+                properties = {**properties, "database": tenants.DATABASE_PROPERTY}
+            callables[tool_name] = instrument_tool(tool_name, tool_callable)
+            if structured_callable is not None:
+                structured[tool_name] = instrument_tool(tool_name, structured_callable)
+            if stream_callable is not None:
+                streamers[tool_name] = instrument_stream(tool_name, stream_callable)
+            validators[tool_name] = ArgumentValidator(
+                tool_name, properties, schema["parameters"]["required"], parsers=parsers
+            )
+            tools.append({
+                "name": schema["name"],
+                "description": schema["description"],
+                "inputSchema": {
+                    "type": "object",
+                    "properties": properties,
+                    "required": schema["parameters"]["required"]
+                }
+            })
+
+        tools_list_json = json.dumps({"tools": tools}, separators=(",", ":")).encode()
+        etag = '"' + hashlib.sha256(tools_list_json).hexdigest()[:32] + '"'
+        return cls(
+            callables=MappingProxyType(callables),
+            structured=MappingProxyType(structured),
+            streamers=MappingProxyType(streamers),
+            validators=MappingProxyType(validators),
+            tools=tuple(MappingProxyType(tool) for tool in tools),
+            tools_list_json=tools_list_json,
+            etag=etag,
+        )
+
+    def get(self, tool_name: str) -> Optional[Callable[..., Any]]:
+        """Return the callable for a tool, or None if it is not registered"""
+        return self.callables.get(tool_name)
+
+    def get_structured(self, tool_name: str) -> Optional[Callable[..., Any]]:
+        """Return the dict-returning variant of a tool, or None if it has none"""
+        return self.structured.get(tool_name)
+
+    def get_streamer(self, tool_name: str) -> Optional[Callable[..., Any]]:
+        """Return the batch-streaming variant of a tool, or None if it has none"""
+        return self.streamers.get(tool_name)
+
+    def validate(self, tool_name: str, arguments: Any) -> Dict[str, Any]:
+        """Check and coerce a registered tool's arguments; raises InvalidArguments"""
+        return self.validators[tool_name](arguments)
+
+    def tools_list_result(self) -> Dict[str, Any]:
+        """tools/list result as a fresh dict, for responses built as Python objects"""
+        return {"tools": [dict(tool) for tool in self.tools]}
+
+    def tools_list_response(self, request_id: Any) -> bytes:
+        """Complete JSON-RPC tools/list response, splicing the cached result in"""
+        return (
+            b'{"jsonrpc":"2.0","id":' + json.dumps(request_id).encode()
+            + b',"result":' + self.tools_list_json + b'}'
+        )
+
+    def etag_matches(self, if_none_match: Optional[str]) -> bool:
+        """Whether an If-None-Match header value matches the current ETag"""
+        if not if_none_match:
+            return False
+        for candidate in if_none_match.split(","):
+            candidate = candidate.strip()
+            if candidate.startswith("W/"):
+                candidate = candidate[2:]
+            if candidate == "*" or candidate == self.etag:
+                return True
+        return False
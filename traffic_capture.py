@@ -0,0 +1,146 @@
+"""
+Optional capture of incoming JSON-RPC traffic to a JSONL trace.
+
+With MCP_CAPTURE_FILE set, every POST / request (or a sampled fraction,
+MCP_CAPTURE_SAMPLE_RATE) is appended to that file as one JSON line:
+
+    {"ts": "2025-01-01T12:00:00.123456+00:00", "t": 1735732800.123456,
+     "method": "tools/call", "tool": "find_documents", "status": 200,
+     "latency_ms": 4.21, "body": "<raw request body>"}
+
+"t" is the arrival time in epoch seconds, used to reproduce the original
+pacing; "body" is the request exactly as received, so malformed requests
+replay as they came in. An Accept header other than JSON is kept so
+streamed calls replay as streams. benchmarks/replay_traffic.py re-issues
+a trace against a server.
+
+Lines are written from a background thread; when the queue is full they
+are dropped (and counted) rather than delaying requests. Lines that cannot
+be written (e.g. the path is not writable) are logged and counted as
+write_errors; the writer keeps going and reopens the file for the next
+line. On Vercel only
+/tmp is writable. Under several workers (serve.py) put "{pid}" in the
+path so each process appends to its own file.
+"""
+import json
+import logging
+import os
+import queue
+import random
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+CAPTURE_FILE = os.getenv("MCP_CAPTURE_FILE", "")
+CAPTURE_SAMPLE_RATE = float(os.getenv("MCP_CAPTURE_SAMPLE_RATE", "1.0"))
+CAPTURE_QUEUE_SIZE = int(os.getenv("MCP_CAPTURE_QUEUE_SIZE", "10000"))
+
+logger = logging.getLogger("mcp")
+
+
+class TrafficCapture:
+    """Appends request records to a JSONL file from a writer thread"""
+
+    def __init__(self, path: Optional[str] = None, sample_rate: float = 1.0, queue_size: int = 10000):
+        self.path = path.replace("{pid}", str(os.getpid())) if path else None
+        self.sample_rate = sample_rate
+        self._queue: "queue.Queue[Optional[str]]" = queue.Queue(maxsize=queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.captured = 0
+        self.dropped = 0
+        self.write_errors = 0
+        self.last_error: Optional[str] = None
+
+    @classmethod
+    def from_env(cls) -> "TrafficCapture":
+        """Capture to MCP_CAPTURE_FILE (unset disables capture) at MCP_CAPTURE_SAMPLE_RATE"""
+        return cls(path=CAPTURE_FILE, sample_rate=CAPTURE_SAMPLE_RATE, queue_size=CAPTURE_QUEUE_SIZE)
+
+    @property
+    def enabled(self) -> bool:
+        return self.path is not None
+
+    def should_capture(self) -> bool:
+        """Decide, once the request has been answered, whether it goes into the trace"""
+        return self.enabled and (self.sample_rate >= 1.0 or random.random() < self.sample_rate)
+
+    def record(self, raw_body: bytes, arrived_at: float, latency: float, status: int,
+               method: str = "", tool: str = "", accept: Optional[str] = None) -> None:
+        """Queue one request; `arrived_at` is epoch seconds and `latency` seconds"""
+        entry: Dict[str, Any] = {
+            "ts": datetime.fromtimestamp(arrived_at, tz=timezone.utc).isoformat(),
+            "t": round(arrived_at, 6),
+            "method": method,
+            "tool": tool,
+            "status": status,
+            "latency_ms": round(latency * 1000, 3),
+            "body": raw_body.decode("utf-8", "replace"),
+        }
+        if accept and "json" not in accept:
+            entry["accept"] = accept
+        self._ensure_writer()
+        try:
+            self._queue.put_nowait(json.dumps(entry))
+            self.captured += 1
+        except queue.Full:
+            self.dropped += 1
+
+    def _ensure_writer(self) -> None:
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._write, name="mcp-capture", daemon=True)
+                    self._thread.start()
+
+    def _write(self) -> None:
+        f = None
+        try:
+            while True:
+                line = self._queue.get()
+                if line is None:
+                    return
+                try:
+                    if f is None:
+                        f = open(self.path, "a", encoding="utf-8")
+                    f.write(line + "\n")
+                    if self._queue.empty():
+                        f.flush()
+                except Exception as e:
+                    self.write_errors += 1
+                    if self.last_error is None or self.write_errors % 1000 == 1:
+                        logger.error("traffic capture write failed", extra={"fields": {
+                            "path": self.path, "error": str(e), "write_errors": self.write_errors,
+                        }})
+                    self.last_error = str(e)
+                    f = self._discard(f)
+        finally:
+            self._discard(f)
+
+    @staticmethod
+    def _discard(f) -> None:
+        """Close a file the writer has given up on; always returns None"""
+        if f is not None:
+            try:
+                f.close()
+            except Exception:
+                pass
+        return None
+
+    def close(self) -> None:
+        """Write out queued records and stop the writer thread"""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "path": self.path,
+            "sample_rate": self.sample_rate,
+            "captured": self.captured,
+            "dropped": self.dropped,
+            "write_errors": self.write_errors,
+            "last_error": self.last_error,
+        }
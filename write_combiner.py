@@ -0,0 +1,150 @@
+"""
+Micro-batching of concurrent insert_document calls.
+
+With MCP_WRITE_COMBINER=true, single-document inserts into the same
+collection are held for up to MCP_WRITE_COMBINE_WINDOW_MS (default 2) and
+sent together as one unordered insert_many. A batch is sent early once it
+holds MCP_WRITE_COMBINE_MAX_DOCS documents (default 100) or
+MCP_WRITE_COMBINE_MAX_BYTES of encoded BSON (default 1 MB). Documents are
+given their _id before queueing, so every caller still gets its own
+inserted_id, and a write error on one document (e.g. a duplicate key) is
+raised only to the caller that sent it.
+
+A lone insert waits for the window to pass, so the combiner trades a
+little latency at low concurrency for far fewer round trips at high
+concurrency; it is off by default. A caller cancelled while its batch is
+pending does not take its document out of the batch.
+"""
+import asyncio
+import os
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import bson
+
+
+class _Batch:
+    __slots__ = ("collection", "documents", "futures", "size")
+
+    def __init__(self, collection):
+        self.collection = collection
+        self.documents: List[Dict[str, Any]] = []
+        self.futures: List["asyncio.Future"] = []
+        self.size = 0
+
+
+class WriteCombiner:
+    """Per-collection batches of pending single-document inserts"""
+
+    def __init__(self, enabled: bool = False, window: float = 0.002, max_documents: int = 100,
+                 max_bytes: int = 1024 * 1024):
+        self.enabled = enabled
+        self.window = window
+        self.max_documents = max_documents
+        self.max_bytes = max_bytes
+        self._pending: Dict[str, _Batch] = {}
+        # Running flushes, referenced so they are not garbage collected mid-write
+        self._flushing: Set["asyncio.Task"] = set()
+        self.batches = 0
+        self.documents = 0
+        self.flush_reasons = {"window": 0, "documents": 0, "bytes": 0}
+        self.bypassed = 0
+        self.failed_documents = 0
+
+    @classmethod
+    def from_env(cls) -> "WriteCombiner":
+        """
+        Build a combiner from MCP_WRITE_COMBINER (off unless "true"),
+        MCP_WRITE_COMBINE_WINDOW_MS, MCP_WRITE_COMBINE_MAX_DOCS and
+        MCP_WRITE_COMBINE_MAX_BYTES
+        """
+        return cls(
+            enabled=os.getenv("MCP_WRITE_COMBINER", "false").lower() in ("1", "true", "yes"),
+            window=float(os.getenv("MCP_WRITE_COMBINE_WINDOW_MS", "2")) / 1000,
+            max_documents=int(os.getenv("MCP_WRITE_COMBINE_MAX_DOCS", "100")),
+            max_bytes=int(os.getenv("MCP_WRITE_COMBINE_MAX_BYTES", str(1024 * 1024))),
+        )
+
+    async def insert(self, collection_name: str, collection, document: Dict[str, Any]) -> Any:
+        """Insert one document as part of the collection's next batch; returns its _id"""
+        if "_id" not in document:
+            document["_id"] = bson.ObjectId()
+        size = len(bson.encode(document))
+        if size >= self.max_bytes:
+            # Too big to share a batch; a failure here must not fail other callers
+            self.bypassed += 1
+            return (await collection.insert_one(document)).inserted_id
+
+        batch = self._pending.get(collection_name)
+        if batch is None:
+            batch = self._pending[collection_name] = _Batch(collection)
+            asyncio.get_running_loop().call_later(self.window, self._flush_window, collection_name, batch)
+        future = asyncio.get_running_loop().create_future()
+        batch.documents.append(document)
+        batch.futures.append(future)
+        batch.size += size
+        if len(batch.documents) >= self.max_documents:
+            self._start_flush(collection_name, batch, "documents")
+        elif batch.size >= self.max_bytes:
+            self._start_flush(collection_name, batch, "bytes")
+        return await future
+
+    def _flush_window(self, collection_name: str, batch: _Batch) -> None:
+        if self._pending.get(collection_name) is batch:
+            self._start_flush(collection_name, batch, "window")
+
+    def _start_flush(self, collection_name: str, batch: _Batch, reason: str) -> None:
+        del self._pending[collection_name]
+        self.flush_reasons[reason] += 1
+        task = asyncio.ensure_future(self._flush(batch))
+        self._flushing.add(task)
+        task.add_done_callback(self._flushing.discard)
+
+    async def _flush(self, batch: _Batch) -> None:
+        from pymongo.errors import BulkWriteError, WriteError
+
+        self.batches += 1
+        self.documents += len(batch.documents)
+        outcomes: List[Tuple[Optional[BaseException], Any]]
+        try:
+            await batch.collection.insert_many(batch.documents, ordered=False)
+            outcomes = [(None, doc["_id"]) for doc in batch.documents]
+        except BulkWriteError as e:
+            if e.details.get("writeConcernErrors"):
+                outcomes = [(e, None)] * len(batch.documents)
+            else:
+                failures = {error["index"]: error for error in e.details.get("writeErrors", [])}
+                outcomes = []
+                for index, doc in enumerate(batch.documents):
+                    error = failures.get(index)
+                    if error is None:
+                        outcomes.append((None, doc["_id"]))
+                    else:
+                        outcomes.append((WriteError(error.get("errmsg"), error.get("code"), error), None))
+        except Exception as e:
+            outcomes = [(e, None)] * len(batch.documents)
+
+        for future, (error, inserted_id) in zip(batch.futures, outcomes):
+            if future.done():
+                continue  # The caller was cancelled
+            if error is None:
+                future.set_result(inserted_id)
+            else:
+                self.failed_documents += 1
+                future.set_exception(error)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "window_ms": round(self.window * 1000, 3),
+            "max_documents": self.max_documents,
+            "max_bytes": self.max_bytes,
+            "pending_batches": len(self._pending),
+            "batches": self.batches,
+            "documents": self.documents,
+            "average_batch": round(self.documents / self.batches, 2) if self.batches else 0.0,
+            # Each document beyond the first in a batch is an insert round trip saved
+            "round_trips_saved": self.documents - self.batches,
+            "flush_reasons": dict(self.flush_reasons),
+            "bypassed": self.bypassed,
+            "failed_documents": self.failed_documents,
+        }